@@ -0,0 +1,153 @@
+"""Allocation tracking for the steady-state frame mode, and the headless soak that checks it.
+
+A frame in steady state allocates only what it frees again before it ends:
+spawns reuse retired pieces (World.free_pieces), the piece list is packed in
+place, the HUD score is stamped from prerendered digits into one Surface and
+the pause button's Rect is made once. Nothing is left behind for the garbage
+collector, so Game(steady_state=True) switches automatic collection off for
+the length of a session (and runs it at game over) and hour-long kiosk
+sessions never stop for a collection mid-game.
+
+AllocationCounter tallies the gc-tracked objects each frame leaves allocated
+(from the collector's own counter, which every container allocation raises and
+every deallocation lowers; its growth is what triggers collections) and the
+collections that ran. With trace=True it also follows the bytes tracemalloc
+traces. Those go up and down a little from frame to frame with the number of
+pieces on screen (their rects, the list holding them), so it keeps the
+high-water mark per minute of frames, which must not grow by more than that.
+
+    python allocations.py --minutes 10    # headless soak; fails if steady frames leave anything behind
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+
+from simulation import FPS
+
+SOAK_WARMUP_SECONDS = 30  # Game time to fill the caches and free list before counting
+WINDOW_FRAMES = 60 * FPS  # Frames per traced-memory high-water mark
+GROWTH_TOLERANCE = 4096  # Bytes the high-water mark may move with what is on screen (a leak of one
+                         # small object a second adds about 30 KB over a 10-minute soak)
+
+
+class AllocationCounter:
+    """Counts the gc-tracked objects frames leave allocated and the garbage collections (and traced bytes)"""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.frames = 0
+        self.leaky_frames = 0  # Frames that left objects allocated or ran a collection
+        self.objects = 0  # Net gc-tracked objects left by frames
+        self.max_objects = 0
+        self.collections = 0
+        self.start_objects = None
+        self.start_collections = 0
+        self.baseline = 0  # Traced bytes when counting started (trace=True)
+        self.high_water = []  # Most traced bytes above the baseline, per WINDOW_FRAMES frames
+
+    def start(self):
+        gc.callbacks.append(self.collected)
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.mark()
+
+    def stop(self):
+        if self.collected in gc.callbacks:
+            gc.callbacks.remove(self.collected)
+        if self.trace:
+            tracemalloc.stop()
+
+    def collected(self, phase, info):
+        if phase == "start":
+            self.collections += 1
+
+    def mark(self):
+        """Start a frame"""
+        self.start_collections = self.collections
+        self.start_objects = gc.get_count()[0]
+
+    def frame(self):
+        """End the frame begun by the last mark() (or frame()) and begin the next"""
+        # A collection resets the collector's counter, so that frame's objects can't be told
+        objects = gc.get_count()[0] - self.start_objects if self.collections == self.start_collections else 0
+        self.frames += 1
+        self.objects += objects
+        if objects > 0 or self.collections != self.start_collections:
+            self.leaky_frames += 1
+        self.max_objects = max(self.max_objects, objects)
+        if self.trace and self.frames % WINDOW_FRAMES == 0:
+            self.high_water.append(tracemalloc.get_traced_memory()[1] - self.baseline)
+            tracemalloc.reset_peak()
+        self.mark()
+
+    def growing(self):
+        """Whether traced memory reached clearly higher in the last window than in the first"""
+        return len(self.high_water) > 1 and self.high_water[-1] > self.high_water[0] + GROWTH_TOLERANCE
+
+    def report(self):
+        frames = max(self.frames, 1)
+        text = (f"Allocations: {self.frames:,} steady frames, {self.leaky_frames:,} left objects allocated; "
+                f"{self.objects / frames:+.3f} gc objects/frame (most {self.max_objects}), "
+                f"{self.collections} collections")
+        if self.high_water:
+            text += (f"; traced memory high-water {self.high_water[0]:+,} bytes in the first minute, "
+                     f"{self.high_water[-1]:+,} in the last")
+        return text
+
+
+def soak(minutes, seed=0, dirty_rects=False, steady_state=True, warmup_seconds=SOAK_WARMUP_SECONDS):
+    """Play one endless (invincible) session headless; returns the counter of its frames after the warm-up"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    # Imported here so the counter itself doesn't need pygame
+    from flappy_chess import Game
+    from simulation import autopilot_jump
+
+    game = Game(seed=seed, save_dir=None, dirty_rects=dirty_rects, steady_state=steady_state)
+    game.finish_loading()
+    game.start_game()
+    game.music.stop()  # Its decoder thread allocates whole tracks, and isn't part of a frame
+    world = game.world
+    world.invincible = True
+    counter = AllocationCounter(trace=True)
+    warmup = int(warmup_seconds * FPS)
+    for frame in range(warmup + int(minutes * 60 * FPS)):
+        if autopilot_jump(world):
+            game.request_jump()
+        game.update()
+        game.draw(0.5)
+        if frame == warmup:
+            counter.start()
+        elif frame > warmup:
+            counter.frame()
+    counter.stop()
+    counter.pieces = world.spawned
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless soak of the steady-state frame mode")
+    parser.add_argument("--minutes", type=float, default=10.0, help="game time to play (at %d FPS)" % FPS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dirty-rects", action="store_true", help="soak the dirty-rect render path")
+    parser.add_argument("--normal", action="store_true", help="soak the normal mode instead, for comparison")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counter = soak(args.minutes, args.seed, args.dirty_rects, steady_state=not args.normal)
+    print(counter.report())
+    print(f"{counter.pieces:,} pieces spawned; soak took {time.perf_counter() - start:.0f} s")
+    # Not assert: the soak is a gate, and python -O would skip it
+    if counter.leaky_frames or counter.collections:
+        raise SystemExit("Failed: frames left objects for the garbage collector")
+    if counter.growing():
+        raise SystemExit("Failed: traced memory grew over the soak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Image loading shared by the renderer and the pixel-collision masks"""
+import queue
+import threading
+import time
+
+import pygame
+
+PLAYER_SHEET = "jetpack fly rough.png"
+FALLBACK_GREY = (100, 100, 100)
+
+
+def piece_image_path(color, piece_type):
+    return f"{color}_{piece_type}.png"
+
+
+# Names of the sprites in the asset bundle (sizes included, so resizing one invalidates it)
+def piece_asset_name(color, piece_type, size):
+    return f"{color}_{piece_type}@{size[0]}x{size[1]}"
+
+
+def player_asset_name(size):
+    return f"player frames@{size[0]}x{size[1]}"
+
+
+def load_piece_image(color, piece_type, size, convert=True):
+    """Decode and scale a piece sprite, falling back to a grey square if it is missing
+
+    convert=False skips the pixel-format conversion, which needs a display mode.
+    """
+    try:
+        image = pygame.image.load(piece_image_path(color, piece_type))
+        if convert:
+            image = image.convert_alpha()
+        return pygame.transform.scale(image, size)
+    except:
+        # Fallback if image not found
+        image = pygame.Surface(size)
+        image.fill(FALLBACK_GREY)
+        return image
+
+
+def load_player_frames(size, sheet_path=PLAYER_SHEET, convert=True, layout=(2, 2)):
+    """Split a jetpack sprite sheet into frames scaled to the player size
+
+    layout is (columns, rows): most sheets are 2x2, some skins have 3 frames side by side.
+    """
+    sprite_sheet = pygame.image.load(sheet_path)
+    if convert:
+        sprite_sheet = sprite_sheet.convert_alpha()
+    sheet_width, sheet_height = sprite_sheet.get_size()
+    columns, rows = layout
+    frame_width = sheet_width // columns
+    frame_height = sheet_height // rows
+    
+    frames = []
+    # Extract the frames row by row
+    for row in range(rows):
+        for col in range(columns):
+            frame = sprite_sheet.subsurface(
+                (col * frame_width, row * frame_height, frame_width, frame_height)
+            )
+            # Scale frame to desired size
+            frames.append(pygame.transform.scale(frame, size))
+    return frames
+
+
+class AssetLoader:
+    """Loads assets on a background thread while the main thread keeps drawing frames
+    
+    Each job is split in two: load() decodes and scales on the loader thread, then
+    finish(result) converts the surface to the display's pixel format and stores
+    it. finish always runs on the main thread, from poll() or wait().
+    """
+    
+    def __init__(self):
+        self.jobs = []
+        self.results = queue.Queue()
+        self.thread = None
+        self.finished = 0
+        self.timings = []  # (name, seconds on the loader thread, seconds finishing on the main thread)
+    
+    def add(self, name, load, finish):
+        self.jobs.append((name, load, finish))
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.load_all, name="asset-loader", daemon=True)
+        self.thread.start()
+    
+    def load_all(self):
+        for name, load, finish in self.jobs:
+            start = time.perf_counter()
+            try:
+                result = load()
+            except Exception as error:
+                # Handed to the main thread, which re-raises it
+                result = error
+            self.results.put((name, result, finish, time.perf_counter() - start))
+    
+    @property
+    def done(self):
+        return self.finished == len(self.jobs)
+    
+    @property
+    def progress(self):
+        return self.finished / len(self.jobs) if self.jobs else 1.0
+    
+    def finish_one(self, block):
+        name, result, finish, load_seconds = self.results.get(block)
+        if isinstance(result, Exception):
+            raise result
+        start = time.perf_counter()
+        finish(result)
+        self.timings.append((name, load_seconds, time.perf_counter() - start))
+        self.finished += 1
+    
+    def poll(self, budget=0.004):
+        """Finish loaded assets until the time budget (seconds) is used; True once everything is in"""
+        deadline = time.perf_counter() + budget
+        while not self.done and time.perf_counter() < deadline:
+            try:
+                self.finish_one(block=False)
+            except queue.Empty:
+                break
+        return self.done
+    
+    def wait(self):
+        """Block until every asset is loaded and finished"""
+        while not self.done:
+            self.finish_one(block=True)
@@ -0,0 +1,232 @@
+"""Animation atlas: every (skin, frame, tilt angle) variant of the player, rendered once.
+
+The player tilts with its velocity (nose up on a flap, diving as it falls).
+Rotating a frame with pygame.transform.rotozoom every draw costs far more than
+blitting it, so the atlas renders each skin's frames at every TILT_STEP angle up
+front, in a worker process if it has an executor, and drawing becomes one
+lookup and one blit. Skins are kept in least-recently-used order under a byte
+budget; skins not in use are evicted first, the ones in use never.
+
+    python atlas.py              # build every skin, in-process and in workers
+"""
+import argparse
+import math
+import os
+import time
+from collections import OrderedDict
+
+import pygame
+
+from assets import PLAYER_SHEET, load_player_frames
+from simulation import PLAYER_FRAME_COUNT
+
+TILT_STEP = 5  # Degrees between precomputed angles
+TILT_UP = 25  # Furthest the nose points up (degrees, counter-clockwise)
+TILT_DOWN = -60  # And down
+TILT_PER_VELOCITY = 3  # Degrees of tilt per pixel/tick of vertical speed
+ATLAS_BUDGET = 8 * 1024 * 1024  # Bytes of rendered variants kept before skins not in use are evicted
+
+# Skin -> (sprite sheet, (columns, rows)), as the web build slices them
+SKIN_SHEETS = {
+    "default": (PLAYER_SHEET, (2, 2)),
+    "gold": ("jetpack fly gold skin.png", (2, 2)),
+    "silver": ("jetpack fly silver skin.png", (2, 2)),
+    "bronze": ("jetpack fly bronze skin.png", (2, 2)),
+    "tin": ("jetpack fly tin robot skin.png", (2, 2)),
+    "copper": ("jetpack fly copper robot skin.png", (2, 2)),
+    "arcticResearcher": ("arctic researcher skin jetpack fly.png", (3, 1)),
+    "legendaryCrazedRobot": ("legendary crazed robot skin jetpack fly.png", (2, 2)),
+    "legendaryCyborg": ("legendary cyborg skin jetpack fly.png", (3, 1)),
+    "legendaryMage": ("legendary mage skin jetpack fly.png", (2, 2)),
+    "legendarySamurai": ("legendary samurai skin jetpack fly.png", (3, 1)),
+    "longHair": ("long hair skin jetpack fly.png", (3, 1)),
+    "merchant": ("merchant skin jetpack fly.png", (3, 1)),
+    "pirate": ("pirate skin jetpack fly.png", (3, 1)),
+    "rareCat": ("rare cat skin jetpack fly.png", (2, 2)),
+    "rareFish": ("rare fish skin jetpack fly.png", (2, 2)),
+    "rareGorilla": ("rare gorilla skin jetpack fly.png", (2, 2)),
+    "rareIceMonster": ("rare ice monster skin jetpack fly.png", (3, 1)),
+    "steampunkGorilla": ("steampunk gorilla skin jetpack fly.png", (2, 2)),
+    "steamshipPilot": ("steamship pilot skin jetpack fly.png", (2, 2)),
+}
+
+TILT_ANGLES = list(range(TILT_DOWN, TILT_UP + 1, TILT_STEP))
+
+
+def tilt_index(velocity, angles=TILT_ANGLES):
+    """Index into angles of the tilt for a vertical velocity (rising tilts up, falling down)"""
+    angle = min(max(-velocity * TILT_PER_VELOCITY, angles[0]), angles[-1])
+    step = (angles[-1] - angles[0]) / (len(angles) - 1) if len(angles) > 1 else 1
+    return int((angle - angles[0]) / step + 0.5)
+
+
+def render_skin(skin, size, angles):
+    """Every frame of a skin at every angle: [frame][angle] -> (Surface, x offset, y offset)
+
+    Rotated frames are bigger than the player; the offsets keep them centred on it.
+    """
+    sheet, layout = SKIN_SHEETS[skin]
+    frames = load_player_frames(size, sheet, convert=False, layout=layout)
+    variants = []
+    for frame in frames:
+        rotated = []
+        for angle in angles:
+            image = pygame.transform.rotozoom(frame, angle, 1) if angle else frame
+            width, height = image.get_size()
+            rotated.append((image, (size[0] - width) // 2, (size[1] - height) // 2))
+        variants.append(rotated)
+    return variants
+
+
+def render_skin_bytes(skin, size, angles):
+    """render_skin for a worker process: Surfaces don't pickle, so their RGBA pixels come back instead"""
+    return [[(pygame.image.tobytes(image, "RGBA"), image.get_size(), dx, dy) for image, dx, dy in frame]
+            for frame in render_skin(skin, size, angles)]
+
+
+def variants_size(variants):
+    return sum(image.get_width() * image.get_height() * 4 for frame in variants for image, _, _ in frame)
+
+
+class AnimationAtlas:
+    """Player sprites per skin, frame and tilt, rendered ahead and kept under a memory budget
+
+    prepare(skin) starts rendering a skin (in the executor's worker process if
+    there is one); lookup() then finds a variant in two list indexes. Skins
+    marked in use are never evicted.
+    """
+
+    def __init__(self, size, angles=TILT_ANGLES, budget=ATLAS_BUDGET, executor=None):
+        self.size = size
+        self.angles = list(angles)
+        self.budget = budget
+        self.executor = executor
+        self.skins = OrderedDict()  # Skin -> variants, least recently used first
+        self.pending = {}  # Skin -> Future from the executor
+        self.in_use = set()
+        self.bytes = 0
+        self.builds = 0
+        self.evictions = 0
+        self.build_seconds = 0.0  # On this thread (waiting for or converting worker results included)
+
+    def prepare(self, skin):
+        """Start rendering a skin if it isn't ready or on its way"""
+        if skin in self.skins or skin in self.pending:
+            return
+        if self.executor is not None:
+            self.pending[skin] = self.executor.submit(render_skin_bytes, skin, self.size, self.angles)
+        else:
+            start = time.perf_counter()
+            self.store(skin, render_skin(skin, self.size, self.angles))
+            self.build_seconds += time.perf_counter() - start
+
+    def variants(self, skin):
+        """The skin's variants, rendering them (or waiting for the worker) if needed"""
+        variants = self.skins.get(skin)
+        if variants is not None:
+            self.skins.move_to_end(skin)
+            return variants
+        self.prepare(skin)
+        future = self.pending.pop(skin, None)
+        if future is not None:
+            start = time.perf_counter()
+            self.store(skin, [[(pygame.image.frombytes(pixels, image_size, "RGBA"), dx, dy)
+                               for pixels, image_size, dx, dy in frame] for frame in future.result()])
+            self.build_seconds += time.perf_counter() - start
+        return self.skins[skin]
+
+    def poll(self):
+        """Take in skins the worker has finished, without waiting"""
+        for skin, future in list(self.pending.items()):
+            if future.done():
+                self.variants(skin)
+
+    def store(self, skin, variants):
+        if pygame.display.get_surface() is not None:
+            # Display format blits several times faster
+            variants = [[(image.convert_alpha(), dx, dy) for image, dx, dy in frame] for frame in variants]
+        self.skins[skin] = variants
+        self.bytes += variants_size(variants)
+        self.builds += 1
+        self.evict()
+
+    def evict(self):
+        """Drop the least recently used skins not in use until the atlas fits its budget"""
+        # The most recently used skin stays even if it alone is over budget
+        for skin in list(self.skins)[:-1]:
+            if self.bytes <= self.budget:
+                return
+            if skin in self.in_use:
+                continue
+            self.bytes -= variants_size(self.skins.pop(skin))
+            self.evictions += 1
+
+    def use(self, skin):
+        """Make skin the one in use (pinned against eviction) and return its variants"""
+        self.in_use = {skin}
+        variants = self.variants(skin)
+        self.evict()
+        return variants
+
+    def lookup(self, skin, frame, velocity):
+        """(Surface, x offset, y offset) for a player frame at the tilt its velocity calls for"""
+        variants = self.variants(skin)
+        # frame counts through PLAYER_FRAME_COUNT; a skin with fewer frames spreads its own over that cycle
+        index = frame % PLAYER_FRAME_COUNT * len(variants) // PLAYER_FRAME_COUNT
+        return variants[index][tilt_index(velocity, self.angles)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render every player skin's tilt variants and time it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes for the parallel build")
+    parser.add_argument("--budget-mb", type=float, default=ATLAS_BUDGET / 1024 / 1024)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 600))
+    size = (60, 60)
+    skins = [skin for skin, (sheet, _) in SKIN_SHEETS.items() if os.path.exists(sheet)]
+    budget = int(args.budget_mb * 1024 * 1024)
+
+    atlas = AnimationAtlas(size, budget=budget)
+    start = time.perf_counter()
+    for skin in skins:
+        atlas.prepare(skin)
+    in_process = time.perf_counter() - start
+    print(f"{len(skins)} skins x {len(atlas.angles)} angles in-process: {in_process * 1000:.0f} ms; "
+          f"{atlas.bytes / 1024 / 1024:.1f} MB kept, {atlas.evictions} skins evicted for the {args.budget_mb:g} MB budget")
+
+    # The game itself renders its one skin on the asset loader thread and never needs the pool
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        atlas = AnimationAtlas(size, budget=budget, executor=executor)
+        start = time.perf_counter()
+        for skin in skins:
+            atlas.prepare(skin)
+        submitted = time.perf_counter() - start
+        for skin in skins:
+            atlas.variants(skin)
+        print(f"With {args.workers} worker processes: {submitted * 1000:.1f} ms to submit, "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms until all were in")
+
+    # Per-draw cost: rotating on the fly against one lookup and blit
+    frame = load_player_frames(size)[0]
+    velocities = [(index % 40) * 0.5 - 8 for index in range(2000)]
+    start = time.perf_counter()
+    for velocity in velocities:
+        screen.blit(pygame.transform.rotozoom(frame, -velocity * TILT_PER_VELOCITY, 1), (100, 300))
+    rotating = (time.perf_counter() - start) / len(velocities)
+    atlas = AnimationAtlas(size)
+    atlas.use("default")
+    start = time.perf_counter()
+    for index, velocity in enumerate(velocities):
+        image, dx, dy = atlas.lookup("default", index, velocity)
+        screen.blit(image, (100 + dx, 300 + dy))
+    looking_up = (time.perf_counter() - start) / len(velocities)
+    print(f"Drawing a tilted player: rotozoom each frame {rotating * 1e6:.1f} us, "
+          f"atlas lookup {looking_up * 1e6:.1f} us ({rotating / looking_up:.0f}x faster)")
+    print(f"{math.ceil(atlas.bytes / 1024)} KB for one skin")
+
+
+if __name__ == "__main__":
+    main()
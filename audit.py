@@ -0,0 +1,275 @@
+"""Batch anti-cheat audit: re-simulate submitted runs and flag the ones whose claims don't hold.
+
+Submissions are read as a stream, either as replay files (.fcr, or directories
+of them) or as JSON lines (a file, or - for stdin), one run per line:
+
+    {"id": "run-1", "seed": 42, "jumps": [31, 77, 120], "score": 9, "death_tick": 904}
+
+jumps are the ticks the player jumped on, death_tick the tick of the fatal
+collision (null if the run ended without one). Jumps must be on strictly
+increasing ticks from 1 to the end of the run, and a run may last at most
+MAX_RUN_TICKS; anything else is invalid, as it couldn't have been recorded by
+the game. Every run is re-played
+(replay.play_replay) and flagged if its score or death tick differs from the
+claim. The rule set is the auditor's, not the submitter's: runs recorded under
+any other (--rules, the game's swept collisions by default) are invalid.
+
+Runs go to a process pool in batches, with only a few batches in flight so the
+input is never read far ahead. Each finished batch is appended to the results
+log (one JSON line per run), which doubles as the checkpoint: re-running with
+the same log skips every run already in it.
+
+    python audit.py submissions/ --results audit.jsonl
+    cat day.jsonl | python audit.py - --results audit.jsonl --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from replay import JUMP, KNOWN_RULES, PIXEL_COLLISIONS, SWEPT_COLLISIONS, Replay, ReplayError, play_replay
+from simulation import TICK_RATE
+
+BATCH_SIZE = 64  # Runs per task sent to a worker
+BATCHES_PER_WORKER = 4  # Batches in flight per worker: enough to keep them busy, few enough to stay streaming
+REPORT_SECONDS = 2.0
+MAX_RUN_TICKS = 60 * 60 * TICK_RATE  # An hour: longer runs are rejected rather than simulated
+RULE_SETS = {
+    "swept": SWEPT_COLLISIONS,  # The game's own
+    "pixel": SWEPT_COLLISIONS | PIXEL_COLLISIONS,
+    "discrete": 0,
+}
+
+_narrowphase = None  # Per process, so pixel-collision runs share one set of masks
+
+
+def non_negative(field, value):
+    """value if it is a non-negative integer (what the replay format can hold), else ValueError"""
+    if type(value) is not int or value < 0:
+        raise ValueError(f"{field} must be a non-negative integer, not {value!r}")
+    return value
+
+
+def check_replay(replay):
+    """Raise ReplayError unless the replay's events and length are ones the game could have recorded"""
+    if replay.final_tick > MAX_RUN_TICKS:
+        raise ReplayError(f"run of {replay.final_tick} ticks is longer than {MAX_RUN_TICKS}")
+    previous = 0
+    for tick, _ in replay.events:
+        # play_replay applies an event only on the tick after the last one, so these would be dropped
+        if tick <= previous:
+            raise ReplayError(f"event on tick {tick} after one on tick {previous}" if previous
+                              else f"event on tick {tick}; ticks start at 1")
+        if tick > replay.final_tick:
+            raise ReplayError(f"event on tick {tick} after the run ended on tick {replay.final_tick}")
+        previous = tick
+
+
+def submission_replay(record):
+    """Replay for one JSON submission"""
+    death_tick = record.get("death_tick")
+    if death_tick is not None:
+        non_negative("death_tick", death_tick)
+    events = [(non_negative("jumps", tick), JUMP) for tick in record["jumps"]]
+    final_tick = record.get("final_tick", death_tick)
+    if final_tick is None:
+        raise ValueError("a run needs a death_tick or a final_tick")
+    replay = Replay(non_negative("seed", record["seed"]), events, non_negative("final_tick", final_tick),
+                    non_negative("score", record["score"]), death_tick,
+                    non_negative("rules", record.get("rules", SWEPT_COLLISIONS)))
+    check_replay(replay)
+    return replay
+
+
+def read_submissions(sources):
+    """Yield (run id, replay bytes or the error that makes the submission invalid), streaming"""
+    for source in sources:
+        if source == "-" or source.endswith(".jsonl"):
+            stream = sys.stdin if source == "-" else open(source)
+            with stream:
+                for number, line in enumerate(stream, 1):
+                    if not line.strip():
+                        continue
+                    run_id = f"{source}:{number}"
+                    try:
+                        record = json.loads(line)
+                        run_id = str(record.get("id", run_id))
+                        yield run_id, submission_replay(record).to_bytes()
+                    except (ValueError, KeyError, TypeError, AttributeError, ReplayError) as error:
+                        yield run_id, f"bad submission: {error!r}"
+        elif os.path.isdir(source):
+            with os.scandir(source) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".fcr") and entry.is_file():
+                        with open(entry.path, "rb") as f:
+                            yield entry.path, f.read()
+        else:
+            with open(source, "rb") as f:
+                yield source, f.read()
+
+
+def verify_run(run_id, data, rules=SWEPT_COLLISIONS):
+    """Re-play one submission under rules and return its result line"""
+    global _narrowphase
+    if isinstance(data, str):
+        return {"id": run_id, "status": "invalid", "error": data, "rules": rules}
+    try:
+        replay = Replay.from_bytes(data)
+        check_replay(replay)
+    except ReplayError as error:
+        return {"id": run_id, "status": "invalid", "error": str(error), "rules": rules}
+    if replay.rules & ~KNOWN_RULES:
+        return {"id": run_id, "status": "invalid", "error": f"unknown rule bits in {replay.rules}", "rules": rules}
+    if replay.rules != rules:
+        return {"id": run_id, "status": "invalid", "error": f"recorded under rules {replay.rules}, not {rules}",
+                "rules": rules}
+    if replay.rules & PIXEL_COLLISIONS and _narrowphase is None:
+        from collision import MaskNarrowphase
+        _narrowphase = MaskNarrowphase()
+    start = time.perf_counter()
+    world = play_replay(replay, _narrowphase)
+    problems = []
+    if world.score != replay.score:
+        problems.append("score")
+    if world.collision_tick != replay.collision_tick:
+        problems.append("death_tick")
+    if world.tick != replay.final_tick and "death_tick" not in problems:
+        problems.append("final_tick")
+    return {
+        "id": run_id,
+        "status": "mismatch" if problems else "ok",
+        "problems": problems,
+        "rules": rules,
+        "seed": replay.seed,
+        "score": world.score,
+        "claimed_score": replay.score,
+        "death_tick": world.collision_tick,
+        "claimed_death_tick": replay.collision_tick,
+        "ticks": world.tick,
+        "seconds": round(time.perf_counter() - start, 6),
+    }
+
+
+def verify_batch(batch, rules=SWEPT_COLLISIONS):
+    return [verify_run(run_id, data, rules) for run_id, data in batch]
+
+
+def read_checkpoint(path):
+    """Ids of the runs already in the results log"""
+    done = set()
+    if path is None or not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                # A line cut short by a crash: that run is simply verified again
+                pass
+    return done
+
+
+def batches(submissions, done, size):
+    batch = []
+    for run_id, data in submissions:
+        if run_id in done:
+            continue
+        batch.append((run_id, data))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_audit(sources, results_path=None, workers=None, batch_size=BATCH_SIZE, progress=None,
+              rules=SWEPT_COLLISIONS):
+    """Verify every submission not already in the results log under rules; returns the totals
+
+    Results are appended to results_path batch by batch (and flushed to disk), so
+    an interrupted audit resumes where it stopped.
+    """
+    totals = {"ok": 0, "mismatch": 0, "invalid": 0, "skipped": 0, "ticks": 0}
+    done = read_checkpoint(results_path)
+    totals["skipped"] = len(done)
+    log = open(results_path, "a") if results_path else None
+
+    def record(results):
+        for result in results:
+            totals[result["status"]] += 1
+            totals["ticks"] += result.get("ticks", 0)
+            if result["status"] != "ok" and progress:
+                progress(totals, result)
+        if log is not None:
+            log.write("".join(json.dumps(result) + "\n" for result in results))
+            log.flush()
+            os.fsync(log.fileno())
+        if progress:
+            progress(totals, None)
+
+    try:
+        pending_batches = batches(read_submissions(sources), done, batch_size)
+        if workers == 1:
+            for batch in pending_batches:
+                record(verify_batch(batch, rules))
+            return totals
+
+        limit = BATCHES_PER_WORKER * (workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = set()
+            for batch in pending_batches:
+                in_flight.add(pool.submit(verify_batch, batch, rules))
+                if len(in_flight) >= limit:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(future.result())
+            for future in wait(in_flight).done:
+                record(future.result())
+        return totals
+    finally:
+        if log is not None:
+            log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate submitted Flappy Chess runs and flag false claims")
+    parser.add_argument("sources", nargs="+", help=".fcr files, directories of them, .jsonl files or - for stdin")
+    parser.add_argument("--results", metavar="PATH", help="append results here and skip runs already in it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (1 runs in-process)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="runs per task sent to a worker")
+    parser.add_argument("--rules", choices=list(RULE_SETS), default="swept",
+                        help="the rule set runs must have been played under")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    last_report = [start]
+
+    def progress(totals, flagged):
+        if flagged is not None:
+            detail = flagged.get("error") or (f"score {flagged['score']} (claimed {flagged['claimed_score']}), "
+                                              f"death tick {flagged['death_tick']} "
+                                              f"(claimed {flagged['claimed_death_tick']})")
+            print(f"{flagged['status'].upper():<8} {flagged['id']}: {detail}")
+            return
+        now = time.perf_counter()
+        if now - last_report[0] >= REPORT_SECONDS:
+            last_report[0] = now
+            verified = totals["ok"] + totals["mismatch"] + totals["invalid"]
+            print(f"{verified:,} runs, {verified / (now - start):,.0f} runs/s, "
+                  f"{totals['mismatch'] + totals['invalid']:,} flagged", flush=True)
+
+    totals = run_audit(args.sources, args.results, args.workers, args.batch_size, progress, RULE_SETS[args.rules])
+    elapsed = time.perf_counter() - start
+    verified = totals["ok"] + totals["mismatch"] + totals["invalid"]
+    print(f"\n{verified:,} runs in {elapsed:.1f}s ({verified / max(elapsed, 1e-9):,.0f} runs/s, "
+          f"{totals['ticks'] / max(elapsed, 1e-9):,.0f} ticks/s): {totals['ok']:,} ok, "
+          f"{totals['mismatch']:,} mismatched, {totals['invalid']:,} invalid"
+          + (f"; {totals['skipped']:,} already in {args.results}" if totals["skipped"] else ""))
+    if totals["mismatch"] or totals["invalid"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
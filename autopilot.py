@@ -0,0 +1,131 @@
+"""Autopilot: decide each jump by playing the next moment out on cheap clones of the world.
+
+Every tick the planner clones the session a few dozen times and plays each copy
+forward over a short horizon, once jumping now and once not. The copies roll their
+own piece moves and spawns, so the planner predicts trajectories rather than
+reading the session's future. Whichever first move survives longer on average wins.
+Used for attract-mode demos (flappy_chess.py --autopilot) and unattended soak tests.
+
+    python autopilot.py --games 20
+"""
+import argparse
+import random
+import time
+
+from simulation import SCREEN_HEIGHT, TICK_RATE, World, autopilot_jump
+
+PLAN_HORIZON = 36  # Ticks each rollout looks ahead
+PLAN_ROLLOUTS = 24  # Rollout pairs (jump / don't jump) per decision
+FRAME_BUDGET = 0.012  # Seconds of planning allowed per tick, leaving room to draw in a 16 ms frame
+CALM_PAIRS = 4  # Stop early once this many pairs all survive the whole horizon: nothing is close
+HOVER_BAND = (SCREEN_HEIGHT * 0.25, SCREEN_HEIGHT * 0.7)  # Heights rollouts hover around after the first move
+
+
+class Planner:
+    """Monte Carlo lookahead over world clones; call choose(world) once per tick"""
+
+    def __init__(self, seed=0, horizon=PLAN_HORIZON, rollouts=PLAN_ROLLOUTS, budget=FRAME_BUDGET):
+        self.rng = random.Random(seed)
+        self.horizon = horizon
+        self.rollouts = rollouts
+        self.budget = budget  # None plans every rollout regardless of time (reproducible soak tests)
+
+        # Metrics
+        self.decisions = 0
+        self.total_rollouts = 0
+        self.total_seconds = 0.0
+        self.last_rollouts = 0
+        self.last_seconds = 0.0
+
+    def rollout(self, world, jump, seed):
+        """Ticks survived (up to the horizon) after making the given first move"""
+        rng = random.Random(seed)
+        target = rng.uniform(*HOVER_BAND)
+        sim = world.clone(rng)
+        sim.narrowphase = None  # Plan on hitboxes: slightly cautious and much cheaper
+        sim.invincible = False
+        player = sim.player
+        step = sim.step
+        step(jump)
+        for _ in range(self.horizon - 1):
+            if sim.game_over:
+                break
+            step(player.y > target and player.velocity > 0)
+        return sim.tick - world.tick
+
+    def choose(self, world):
+        """True if the player should jump on the coming tick"""
+        start = time.perf_counter()
+        default = autopilot_jump(world)
+        if world.game_over or world.paused:
+            return default
+
+        # Both first moves face the same sampled futures (common random numbers)
+        base = self.rng.getrandbits(32)
+        survived = {False: 0, True: 0}
+        pairs = 0
+        deadline = start + self.budget if self.budget else None
+        while pairs < self.rollouts:
+            survived[False] += self.rollout(world, False, base + pairs)
+            survived[True] += self.rollout(world, True, base + pairs)
+            pairs += 1
+            if pairs == CALM_PAIRS and survived[False] == survived[True] == pairs * self.horizon:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        elapsed = time.perf_counter() - start
+        self.decisions += 1
+        self.last_rollouts = pairs * 2
+        self.last_seconds = elapsed
+        self.total_rollouts += pairs * 2
+        self.total_seconds += elapsed
+
+        if survived[True] == survived[False]:
+            return default
+        return survived[True] > survived[False]
+
+    @property
+    def rollouts_per_second(self):
+        return self.total_rollouts / self.total_seconds if self.total_seconds else 0.0
+
+    def stats(self):
+        if not self.decisions:
+            return "Autopilot: no decisions yet"
+        return (f"Autopilot: {self.decisions} decisions, {self.total_rollouts / self.decisions:.1f} rollouts "
+                f"and {self.total_seconds / self.decisions * 1000:.2f} ms per decision, "
+                f"{self.rollouts_per_second:,.0f} rollouts/s")
+
+
+def play_game(seed, planner, max_ticks):
+    """Play one headless game with the planner; returns the finished World"""
+    world = World(seed)
+    while not world.game_over and world.tick < max_ticks:
+        world.step(planner.choose(world))
+    return world
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless Flappy Chess games with the lookahead autopilot")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--max-ticks", type=int, default=5 * 60 * TICK_RATE)
+    parser.add_argument("--horizon", type=int, default=PLAN_HORIZON)
+    parser.add_argument("--rollouts", type=int, default=PLAN_ROLLOUTS, help="rollout pairs per decision")
+    parser.add_argument("--no-budget", action="store_true",
+                        help="always plan every rollout, ignoring the per-frame time budget")
+    args = parser.parse_args()
+
+    planner = Planner(args.seed, args.horizon, args.rollouts, None if args.no_budget else FRAME_BUDGET)
+    scores = []
+    for game in range(args.games):
+        world = play_game(args.seed + game, planner, args.max_ticks)
+        scores.append(world.score)
+        ending = f"hit a {world.collided_piece.piece_type}" if world.game_over else "survived"
+        print(f"Game {game + 1}: score {world.score}, {world.tick / TICK_RATE:.1f}s, {ending}")
+    print(f"Mean score {sum(scores) / len(scores):.2f}")
+    print(planner.stats())
+
+
+if __name__ == "__main__":
+    main()
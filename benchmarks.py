@@ -0,0 +1,310 @@
+"""Benchmark suite with JSON baselines: fails when a metric gets slower than its baseline allows.
+
+Runs headlessly under SDL's dummy video and audio drivers. Every metric is a time
+in microseconds (lower is better), the best of several repeats to shrug off noise.
+
+    python benchmarks.py --save baseline.json             # record a baseline on this machine
+    python benchmarks.py --baseline baseline.json         # exit 1 if anything is >25% slower
+    python benchmarks.py --baseline baseline.json --threshold 0.5 --only draw
+
+Baselines are only comparable on the machine (and Python/pygame versions) they were
+recorded with; the file notes both.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from simulation import PIECE_TYPES, SCREEN_WIDTH, SCREEN_HEIGHT, ChessPiece, World, autopilot_jump
+
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown before a metric counts as a regression
+COLLISION_PIECE_COUNTS = [5, 50, 200, 1000]
+PIECES_PER_BATCH = 100
+UPDATE_TICKS = 100
+MIXED_PIECE_COUNTS = [1000, 10000]  # Every type at once, at swarm-like piece counts
+MIXED_UPDATES = 100000  # Piece updates timed per repeat of each mixed count
+PARTICLE_COUNT = 20000  # Live particles for the effects benchmark
+KNIGHT_L_SPEED = 8 * (2/3)  # What setup_movement gives Knights (reset to 0 at the end of __init__)
+
+
+def best_time(function, repeat, number=1):
+    """Fastest of `repeat` timings of `number` calls, in microseconds per call"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6
+
+
+def make_pieces(piece_type, seed, knight_moves=False, count=PIECES_PER_BATCH):
+    """count pieces of one type, or of every type in turn if piece_type is None"""
+    rng = random.Random(seed)
+    pieces = []
+    for index in range(count):
+        kind = piece_type or PIECE_TYPES[index % len(PIECE_TYPES)]
+        piece = ChessPiece(kind, rng.uniform(200, SCREEN_WIDTH), rng.uniform(50, SCREEN_HEIGHT - 100), rng)
+        if knight_moves:
+            piece.knight_move_speed = KNIGHT_L_SPEED
+        pieces.append(piece)
+    return pieces
+
+
+def bench_piece_updates(repeat):
+    """ChessPiece.update per call for each type (Queens switch modes as they go)"""
+    cases = [(piece_type, piece_type, False) for piece_type in PIECE_TYPES]
+    # Knights as spawned sit still; give them their L-move speed so the L-shape path is timed too
+    cases.append(("Knight_L", "Knight", True))
+    results = {}
+    for name, piece_type, knight_moves in cases:
+        batches = []
+
+        def run():
+            pieces = batches.pop()
+            for _ in range(UPDATE_TICKS):
+                for piece in pieces:
+                    piece.update(1.0)
+
+        # Fresh pieces for every repeat so each timing covers the same part of their lives
+        batches.extend(make_pieces(piece_type, seed, knight_moves) for seed in range(repeat))
+        results[f"piece_update.{name}"] = best_time(run, repeat) / (UPDATE_TICKS * PIECES_PER_BATCH)
+
+    # All types together at large counts, with the speed multiplier stepping up as it does in play
+    for count in MIXED_PIECE_COUNTS:
+        ticks = MIXED_UPDATES // count
+        speeds = [1.0 + 0.1 * (tick * 10 // ticks) for tick in range(ticks)]
+        batches = [make_pieces(None, seed, count=count) for seed in range(repeat)]
+
+        def run():
+            pieces = batches.pop()
+            for speed in speeds:
+                for piece in pieces:
+                    piece.update(speed)
+
+        results[f"piece_update.mixed_{count}"] = best_time(run, repeat) / (ticks * count)
+    return results
+
+
+def bench_spawn(repeat):
+    """World.spawn_chess_piece per call"""
+    world = World(0)
+
+    def run():
+        for _ in range(PIECES_PER_BATCH):
+            world.spawn_chess_piece()
+        world.chess_pieces.clear()
+
+    return {"spawn_chess_piece": best_time(run, repeat, 10) / PIECES_PER_BATCH}
+
+
+def bench_collisions(repeat):
+    """World.check_collisions per call with growing numbers of pieces on screen"""
+    results = {}
+    for count in COLLISION_PIECE_COUNTS:
+        world = World(1, spawn_delay=1, spawn_count=max(count // 60, 1), max_pieces=count, invincible=True)
+        while len(world.chess_pieces) < count:
+            world.step(autopilot_jump(world))
+        results[f"check_collisions.{count}"] = best_time(world.check_collisions, repeat, 200)
+    return results
+
+
+def bench_draw(repeat):
+    """Game.draw per full frame on each screen"""
+    from flappy_chess import Game
+
+    game = Game(seed=3)
+    game.finish_loading()
+    results = {"draw.title": best_time(game.draw, repeat, 20)}
+
+    game.start_game()
+    for _ in range(240):
+        if autopilot_jump(game.world):
+            game.request_jump()
+        game.update()
+    results["draw.playing"] = best_time(lambda: game.draw(0.5), repeat, 20)
+
+    game.world.paused = True
+    results["draw.paused"] = best_time(game.draw, repeat, 20)
+
+    game.world.paused = False
+    game.world.game_over = True
+    results["draw.game_over"] = best_time(game.draw, repeat, 20)
+    game.music.stop()
+    return results
+
+
+def bench_particles(repeat):
+    """ParticleEngine step and draw per frame with PARTICLE_COUNT live particles spread over the screen"""
+    import pygame
+    from particles import EFFECTS, ParticleEngine
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    engine = ParticleEngine(seed=0, capacity=PARTICLE_COUNT)
+    rng = random.Random(0)
+
+    def refill():
+        while len(engine) < PARTICLE_COUNT:
+            engine.burst(rng.choice(sorted(EFFECTS)), rng.uniform(100, SCREEN_WIDTH - 100),
+                         rng.uniform(100, SCREEN_HEIGHT - 100))
+
+    def step():
+        refill()
+        engine.step()
+
+    def draw():
+        refill()
+        engine.draw(screen)
+
+    return {f"particles.step_{PARTICLE_COUNT}": best_time(step, repeat, 20),
+            f"particles.draw_{PARTICLE_COUNT}": best_time(draw, repeat, 20)}
+
+
+def bench_save_store(repeat):
+    """SaveStore change on the calling thread, and recovery of a journal at its longest (just before compaction)"""
+    from savestore import COMPACT_EVERY, SaveStore
+    directory = tempfile.mkdtemp(prefix="flappy-bench-")
+    try:
+        store = SaveStore(os.path.join(directory, "record"))
+
+        def record():
+            for _ in range(100):
+                store.add("coins", 1)
+
+        results = {"save_store.record": best_time(record, repeat, 10) / 100}
+        store.close()
+
+        # COMPACT_EVERY entries waiting in the journal: the most a crash can leave to replay
+        crashed = SaveStore(os.path.join(directory, "recover"), compact_every=COMPACT_EVERY + 1)
+        for _ in range(COMPACT_EVERY):
+            crashed.add("coins", 1)
+        crashed.flush()
+        results["save_store.recovery"] = best_time(lambda: SaveStore(crashed.directory), repeat)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import flappy_chess
+imported = time.perf_counter()
+game = flappy_chess.Game()
+initialized = time.perf_counter()
+game.draw()
+first_frame = time.perf_counter()
+game.finish_loading()
+ready = time.perf_counter()
+print((imported - start) * 1e6, *((mark - imported) * 1e6 for mark in (initialized, first_frame, ready)))
+"""
+STARTUP_STEPS = ["startup.import", "startup.game_init", "startup.first_frame", "startup.assets_ready"]
+
+
+def bench_startup(repeat):
+    """Import time, then time from Game() to the end of __init__, the first frame and all assets (fresh interpreters)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    results = {}
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=here, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        # The timings are the last line (the game logs its own startup report before it)
+        for name, value in zip(STARTUP_STEPS, output.splitlines()[-1].split()):
+            results[name] = min(float(value), results.get(name, float("inf")))
+    return results
+
+
+# Metric name prefix -> benchmark producing those metrics
+BENCHMARKS = {
+    "piece_update": bench_piece_updates,
+    "spawn_chess_piece": bench_spawn,
+    "check_collisions": bench_collisions,
+    "draw": bench_draw,
+    "particles": bench_particles,
+    "save_store": bench_save_store,
+    "startup": bench_startup,
+}
+
+
+def run_suite(repeat=5, only=None):
+    """Run the benchmarks (those with metrics containing `only`, if given); returns {metric: microseconds}"""
+    metrics = {}
+    for prefix, benchmark in BENCHMARKS.items():
+        if only and only not in prefix and not only.startswith(prefix):
+            continue
+        results = benchmark(repeat)
+        metrics.update((name, value) for name, value in results.items() if not only or only in name)
+    return metrics
+
+
+def environment():
+    import pygame
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+    }
+
+
+def compare(metrics, baseline, threshold):
+    """(name, baseline, current, change) for every metric, and the names that regressed"""
+    rows = []
+    regressions = []
+    for name, value in metrics.items():
+        reference = baseline.get(name)
+        change = value / reference - 1 if reference else None
+        rows.append((name, reference, value, change))
+        if change is not None and change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flappy Chess benchmark suite")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against this baseline and fail on regressions")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default %(default)s = 25%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per metric (the best one counts)")
+    parser.add_argument("--only", metavar="TEXT", help="only metrics whose name contains TEXT")
+    args = parser.parse_args()
+
+    metrics = run_suite(args.repeat, args.only)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+    rows, regressions = compare(metrics, baseline, args.threshold)
+    for name, reference, value, change in rows:
+        line = f"{name:<28} {value:12.2f} us"
+        if change is not None:
+            flag = "  REGRESSED" if name in regressions else ""
+            line += f"   baseline {reference:12.2f} us  {change:+7.1%}{flag}"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "metrics": metrics}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save}")
+
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
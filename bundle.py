@@ -0,0 +1,208 @@
+"""Packed asset bundle: every sprite the game draws, pre-sliced and pre-scaled, in one file.
+
+Decoding and rescaling a few dozen PNGs is most of the game's startup work.
+build_bundle runs the game's image loaders once and stores what they return as
+raw RGBA pixels; AssetBundle memory-maps the file and hands out Surfaces that
+read those pixels in place (pygame.image.frombuffer), so loading an image costs
+no decoding, scaling or copying.
+
+Layout: BUNDLE_MAGIC, the index length (4 bytes, little-endian), the JSON index,
+then pixel blocks starting at the next BLOCK_ALIGNMENT boundary, each one
+aligned too. The index records the size, mtime and SHA-1 of every source file,
+and the game rebuilds the bundle in the background when any of them (or the
+recipe) changes.
+
+    python bundle.py            # build assets.bundle if it is missing or stale
+    python bundle.py --force    # rebuild regardless
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import pygame
+
+BUNDLE_PATH = "assets.bundle"
+BUNDLE_MAGIC = b"FCBUNDLE"
+BUNDLE_VERSION = 1  # Bump when the format or what the loaders produce changes
+BLOCK_ALIGNMENT = 64
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_stamp(path):
+    """[size, mtime in ns, SHA-1] of a source file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns, file_digest(path)]
+    except OSError:
+        return None
+
+
+def recipe_key(recipe):
+    """Hash of the recipe's names and sources: adding, renaming or resizing an entry changes it"""
+    description = [BUNDLE_VERSION] + [[name, list(sources)] for name, sources, _ in recipe]
+    return hashlib.sha1(json.dumps(description).encode()).hexdigest()
+
+
+def build_bundle(recipe, path=BUNDLE_PATH):
+    """Run every load in the recipe and pack the Surfaces it returns; returns the index
+
+    recipe is a list of (name, source files, load), where load() returns a
+    Surface, None, or a list/tuple of those (see flappy_chess.bundle_recipe).
+    Entries whose load raises are left out, so the game loads them itself.
+    """
+    sources = {}
+    entries = {}
+    blocks = []
+    offset = 0
+    for name, entry_sources, load in recipe:
+        for source in entry_sources:
+            if source not in sources:
+                sources[source] = source_stamp(source)
+        try:
+            value = load()
+        except Exception:
+            continue
+        many = isinstance(value, (list, tuple))
+        images = []
+        for surface in (value if many else [value]):
+            if surface is None:
+                images.append(None)
+                continue
+            pixels = pygame.image.tobytes(surface, "RGBA")
+            images.append([offset, surface.get_width(), surface.get_height()])
+            padding = -len(pixels) % BLOCK_ALIGNMENT
+            blocks.append(pixels + bytes(padding))
+            offset += len(pixels) + padding
+        entries[name] = {"many": many, "images": images}
+
+    index = {"version": BUNDLE_VERSION, "recipe": recipe_key(recipe), "sources": sources, "entries": entries}
+    encoded = json.dumps(index, sort_keys=True).encode()
+    header = BUNDLE_MAGIC + struct.pack("<I", len(encoded)) + encoded
+    header += bytes(-len(header) % BLOCK_ALIGNMENT)
+    # Written beside the old bundle and swapped in, so a running game never sees half a file
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        for block in blocks:
+            f.write(block)
+    os.replace(temporary, path)
+    return index
+
+
+class AssetBundle:
+    """A built bundle, memory-mapped; load(name) returns what the recipe entry's load returned"""
+
+    def __init__(self, path=BUNDLE_PATH):
+        with open(path, "rb") as f:
+            # The mapping outlives the file object; Surfaces keep views into it
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic_size = len(BUNDLE_MAGIC)
+        if self.data[:magic_size] != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not an asset bundle")
+        (index_size,) = struct.unpack_from("<I", self.data, magic_size)
+        index_start = magic_size + 4
+        self.index = json.loads(self.data[index_start:index_start + index_size])
+        header_size = index_start + index_size
+        self.data_start = header_size + -header_size % BLOCK_ALIGNMENT
+        self.view = memoryview(self.data)
+        self.path = path
+
+    def __contains__(self, name):
+        return name in self.index["entries"]
+
+    def surface(self, offset, width, height):
+        start = self.data_start + offset
+        return pygame.image.frombuffer(self.view[start:start + width * height * 4], (width, height), "RGBA")
+
+    def load(self, name):
+        entry = self.index["entries"][name]
+        surfaces = [None if image is None else self.surface(*image) for image in entry["images"]]
+        return surfaces if entry["many"] else surfaces[0]
+
+    def is_current(self, recipe):
+        """True if the bundle was built from this recipe and none of its source files changed
+
+        Files whose size and mtime match the index are trusted; the others (after a
+        checkout, say) are hashed, so touching a file doesn't force a rebuild.
+        """
+        index = self.index
+        if index["version"] != BUNDLE_VERSION or index["recipe"] != recipe_key(recipe):
+            return False
+        for source, stamp in index["sources"].items():
+            try:
+                stat = os.stat(source)
+            except OSError:
+                if stamp is not None:
+                    return False
+                continue
+            if stamp is None:
+                return False
+            if [stat.st_size, stat.st_mtime_ns] != stamp[:2] and file_digest(source) != stamp[2]:
+                return False
+        return True
+
+
+def open_bundle(recipe, path=BUNDLE_PATH):
+    """The bundle at path if it is current for the recipe, else None (missing, stale or unreadable)"""
+    try:
+        bundle = AssetBundle(path)
+    except (OSError, ValueError):
+        return None
+    return bundle if bundle.is_current(recipe) else None
+
+
+def rebuild(recipe, path=BUNDLE_PATH):
+    try:
+        build_bundle(recipe, path)
+    except Exception as error:
+        # A read-only install just keeps loading the PNGs
+        print(f"Could not rebuild {path}: {error}")
+
+
+def start_rebuild(recipe, path=BUNDLE_PATH):
+    """Build the bundle on a background thread (the old file stays usable until it is swapped)"""
+    thread = threading.Thread(target=rebuild, args=(recipe, path), name="bundle-builder", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the Flappy Chess sprites into an asset bundle")
+    parser.add_argument("--path", default=BUNDLE_PATH)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the bundle is current")
+    args = parser.parse_args()
+
+    from flappy_chess import bundle_recipe
+    recipe = bundle_recipe()
+    if not args.force and open_bundle(recipe, args.path) is not None:
+        print(f"{args.path} is up to date")
+        return
+
+    start = time.perf_counter()
+    index = build_bundle(recipe, args.path)
+    built = time.perf_counter() - start
+    images = sum(len(entry["images"]) for entry in index["entries"].values())
+    print(f"Packed {images} images from {len(index['sources'])} files into {args.path} "
+          f"({os.path.getsize(args.path) / 1e6:.1f} MB) in {built * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    bundle = AssetBundle(args.path)
+    for name in index["entries"]:
+        bundle.load(name)
+    print(f"Loading everything from the bundle: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Gym-style reset/step environments for training agents on the headless rules.
+
+FlappyChessEnv wraps one simulation.World; VectorEnv steps a batch of them in one
+call and resets finished ones automatically. Both follow the Gymnasium calling
+convention (reset -> (obs, info), step -> (obs, reward, terminated, truncated, info))
+without depending on gym itself. Nothing is rendered.
+
+Observations are float32 vectors:
+
+    [0] player y / SCREEN_HEIGHT
+    [1] player velocity / -JUMP_STRENGTH
+    then NEAREST_PIECES slots, nearest piece first, of PIECE_FEATURES values each:
+        present (1 or 0), dx / SCREEN_WIDTH, dy / SCREEN_HEIGHT (piece centre minus
+        player centre), x and y movement over the last tick in pixels, type index
+        into PIECE_TYPES (empty slots are all zeros)
+
+The reward is the score gained during the step, so an episode's return is its score.
+
+    python env.py --envs 64 --steps 200000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, TICK_RATE, JUMP_STRENGTH, MAX_PIECES, PIECE_TYPES, World, new_seed,
+)
+
+NEAREST_PIECES = MAX_PIECES
+PIECE_FEATURES = 6
+OBSERVATION_SIZE = 2 + NEAREST_PIECES * PIECE_FEATURES
+MAX_EPISODE_TICKS = TICK_RATE * 60 * 5  # Truncate episodes after five minutes of play
+TYPE_INDEX = {piece_type: float(index) for index, piece_type in enumerate(PIECE_TYPES)}
+EMPTY_SLOT = [0.0] * PIECE_FEATURES
+
+
+def observation_values(world, nearest=NEAREST_PIECES):
+    """Flat list of the observation values for one world (see the module docstring)"""
+    player = world.player
+    center_x = player.x + player.width / 2
+    center_y = player.y + player.height / 2
+    values = [player.y / SCREEN_HEIGHT, player.velocity / -JUMP_STRENGTH]
+    pieces = world.chess_pieces
+    if not pieces:
+        return values + EMPTY_SLOT * nearest
+
+    rows = []
+    for piece in pieces:
+        x = piece.x
+        y = piece.y
+        dx = x + piece.width / 2 - center_x
+        dy = y + piece.height / 2 - center_y
+        # Spawn index breaks distance ties the same way every run
+        rows.append((dx * dx + dy * dy, piece.spawn_index,
+                     (1.0, dx / SCREEN_WIDTH, dy / SCREEN_HEIGHT, x - piece.prev_x, y - piece.prev_y,
+                      TYPE_INDEX[piece.piece_type])))
+    rows.sort()
+    for row in rows[:nearest]:
+        values += row[2]
+    if len(rows) < nearest:
+        values += EMPTY_SLOT * (nearest - len(rows))
+    return values
+
+
+class FlappyChessEnv:
+    """One game as a reset/step environment; action 1 jumps, 0 does nothing"""
+
+    observation_size = OBSERVATION_SIZE
+    action_count = 2
+
+    def __init__(self, max_ticks=MAX_EPISODE_TICKS, **world_settings):
+        self.max_ticks = max_ticks
+        self.world_settings = world_settings  # Passed on to World (spawn_delay, speed_scales, ...)
+        self.seeds = random.Random()
+        self.world = None
+
+    def reset(self, seed=None):
+        """Start a new episode; a seed makes it and every later episode reproducible"""
+        if seed is not None:
+            self.seeds.seed(seed)
+            world_seed = seed
+        else:
+            world_seed = self.seeds.getrandbits(64)
+        self.world = World(world_seed, **self.world_settings)
+        return np.array(observation_values(self.world), dtype=np.float32), {"seed": world_seed}
+
+    def step(self, action):
+        world = self.world
+        reward = world.step(bool(action))
+        terminated = world.game_over
+        truncated = not terminated and world.tick >= self.max_ticks
+        info = {"score": world.score, "tick": world.tick}
+        return (np.array(observation_values(world), dtype=np.float32), float(reward), terminated, truncated,
+                info)
+
+
+class VectorEnv:
+    """N games stepped together; finished games restart at once with the next seed
+
+    Observations come back as an (N, OBSERVATION_SIZE) array and rewards, terminated
+    and truncated flags as length-N arrays. When an episode ends, the returned row
+    is already the new episode's first observation and the finished one's final
+    score and length are reported in info["final_score"] / info["final_tick"]
+    (-1 for environments that kept playing).
+    """
+
+    observation_size = OBSERVATION_SIZE
+    action_count = 2
+
+    def __init__(self, count, max_ticks=MAX_EPISODE_TICKS, **world_settings):
+        self.count = count
+        self.max_ticks = max_ticks
+        self.world_settings = world_settings
+        self.seeds = random.Random()
+        self.worlds = []
+
+    def next_world(self):
+        return World(self.seeds.getrandbits(64), **self.world_settings)
+
+    def observations(self):
+        values = []
+        for world in self.worlds:
+            values += observation_values(world)
+        return np.array(values, dtype=np.float32).reshape(self.count, OBSERVATION_SIZE)
+
+    def reset(self, seed=None):
+        self.seeds.seed(new_seed() if seed is None else seed)
+        self.worlds = [self.next_world() for _ in range(self.count)]
+        return self.observations(), {"seeds": [world.seed for world in self.worlds]}
+
+    def step(self, actions):
+        """Advance every game by one tick; actions is any length-N sequence of 0/1"""
+        count = self.count
+        rewards = [0] * count
+        terminated = [False] * count
+        truncated = [False] * count
+        final_score = [-1] * count
+        final_tick = [-1] * count
+        max_ticks = self.max_ticks
+        worlds = self.worlds
+        for i, action in enumerate(actions.tolist() if isinstance(actions, np.ndarray) else actions):
+            world = worlds[i]
+            rewards[i] = world.step(bool(action))
+            if world.game_over or world.tick >= max_ticks:
+                terminated[i] = world.game_over
+                truncated[i] = not world.game_over
+                final_score[i] = world.score
+                final_tick[i] = world.tick
+                worlds[i] = self.next_world()
+        info = {"final_score": np.array(final_score), "final_tick": np.array(final_tick)}
+        return (self.observations(), np.array(rewards, dtype=np.float32), np.array(terminated),
+                np.array(truncated), info)
+
+
+def run_benchmark(envs, steps, seed=0):
+    """Env-steps per second for one FlappyChessEnv and for a VectorEnv of the given size"""
+    rng = np.random.default_rng(seed)
+
+    env = FlappyChessEnv()
+    env.reset(seed)
+    actions = (rng.random(steps) < 0.08).tolist()
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    single = steps / (time.perf_counter() - start)
+
+    vector = VectorEnv(envs)
+    vector.reset(seed)
+    batches = max(1, steps // envs)
+    action_batches = rng.random((batches, envs)) < 0.08
+    start = time.perf_counter()
+    for batch in action_batches:
+        vector.step(batch)
+    batched = batches * envs / (time.perf_counter() - start)
+    return single, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Flappy Chess training environments")
+    parser.add_argument("--envs", type=int, default=64, help="games in the vectorized environment")
+    parser.add_argument("--steps", type=int, default=200000, help="env-steps to time for each variant")
+    args = parser.parse_args()
+
+    single, batched = run_benchmark(args.envs, args.steps)
+    print(f"FlappyChessEnv: {single:,.0f} env-steps/s")
+    print(f"VectorEnv({args.envs}): {batched:,.0f} env-steps/s")
+
+
+if __name__ == "__main__":
+    main()
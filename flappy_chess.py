@@ -1,368 +1,323 @@
 import pygame
-import random
+import argparse
+import gc
 import math
+import os
 import sys
+import time
+from collections import OrderedDict
 
-# Initialize Pygame
-pygame.init()
-
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-FPS = 60
-GRAVITY = 0.5
-JUMP_STRENGTH = -8
-SCROLL_SPEED = 3
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FPS, TICK_RATE,
+    PIECE_COLORS, PIECE_TYPES, PIECE_SIZE, KING_SIZE,
+    JetpackMan, World,
+)
+from replay import ReplayRecorder
+from assets import (
+    PLAYER_SHEET, AssetLoader, load_piece_image, load_player_frames,
+    piece_image_path, piece_asset_name, player_asset_name,
+)
+from bundle import open_bundle, start_rebuild
+from collision import MaskNarrowphase
+from autopilot import Planner
+from profiler import FrameProfiler
+from music import MUSIC_END, MUSIC_READY, MusicPlayer
+from atlas import SKIN_SHEETS, TILT_ANGLES, AnimationAtlas, render_skin
+from savestore import SAVE_DIR, SaveStore
+from presenter import RESIZE_SETTLE, SCALE_MODES, Presenter, parse_size
+from latency import FramePacer, LatencyMeter
+from allocations import AllocationCounter
 
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 
-class JetpackMan:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.velocity = 0
-        self.width = 60
-        self.height = 60
-        
-        # Load sprite sheet and split into 4 frames
-        sprite_sheet = pygame.image.load("jetpack fly rough.png").convert_alpha()
-        sheet_width, sheet_height = sprite_sheet.get_size()
-        frame_width = sheet_width // 2
-        frame_height = sheet_height // 2
-        
-        self.frames = []
-        # Extract 4 frames from 2x2 grid
-        for row in range(2):
-            for col in range(2):
-                frame = sprite_sheet.subsurface(
-                    (col * frame_width, row * frame_height, frame_width, frame_height)
-                )
-                # Scale frame to desired size
-                self.frames.append(pygame.transform.scale(frame, (self.width, self.height)))
-        
-        self.current_frame = 0
-        self.animation_timer = 0
-        self.animation_speed = 8  # Frames per animation cycle
+# Attract mode: the autopilot starts a new game this long after losing one
+AUTOPILOT_RESTART_TICKS = 2 * TICK_RATE
+
+# Fixed-timestep loop: the simulation always advances in TICK_SECONDS steps
+TICK_SECONDS = 1.0 / TICK_RATE
+MAX_CATCH_UP_TICKS = 5  # Spiral-of-death guard: drop the backlog after this many ticks in one frame
+RENDER_MODES = ["capped", "uncapped", "vsync"]
+
+
+def interpolate(previous, current, alpha):
+    """Blend a position between the last two simulation ticks"""
+    return previous + (current - previous) * alpha
+
+
+class SpriteCache:
+    """Process-wide cache of scaled chess piece sprites keyed by (color, piece type, size)"""
+    
+    def __init__(self):
+        self.surfaces = {}
+        self.hits = 0
+        self.misses = 0
+        self.disk_loads = 0
+    
+    def get(self, color, piece_type, size):
+        """Return the shared Surface for a piece, loading it from disk only on the first request"""
+        key = (color, piece_type, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
         
-    def update(self):
-        # Apply gravity
-        self.velocity += GRAVITY
-        self.y += self.velocity
-        
-        # Keep player on screen
-        if self.y < 0:
-            self.y = 0
-            self.velocity = 0
-        if self.y > SCREEN_HEIGHT - self.height:
-            self.y = SCREEN_HEIGHT - self.height
-            self.velocity = 0
-        
-        # Animate
-        self.animation_timer += 1
-        if self.animation_timer >= self.animation_speed:
-            self.animation_timer = 0
-            self.current_frame = (self.current_frame + 1) % len(self.frames)
-    
-    def jump(self):
-        self.velocity = JUMP_STRENGTH
-    
-    def draw(self, screen):
-        screen.blit(self.frames[self.current_frame], (self.x, self.y))
-    
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
-
-
-class ChessPiece:
-    def __init__(self, piece_type, x, y):
-        self.piece_type = piece_type
-        self.x = x
-        self.y = y
-        self.width = 50
-        self.height = 50
-        
-        # Load appropriate chess piece image
-        # Note: King size will be set in setup_movement(), so we'll load image after
-        color = random.choice(['W', 'B'])
-        self.piece_color = color
-        self.piece_image_path = f"{color}_{piece_type}.png"
-        
-        # Movement properties based on piece type (sets width/height for King)
-        self.setup_movement()
-        
-        # Now load and scale image with correct size
-        try:
-            self.image = pygame.image.load(self.piece_image_path).convert_alpha()
-            self.image = pygame.transform.scale(self.image, (self.width, self.height))
-        except:
-            # Fallback if image not found
-            self.image = pygame.Surface((self.width, self.height))
-            self.image.fill((100, 100, 100))
-        
-        # Initial movement state
-        self.move_timer = 0
-        self.spawn_age = 0  # Track how long piece has been on screen
-        
-        # Horizontal speed: will be set by setup_movement() based on piece type
-        # Default for most pieces: random between 3.5-14 pixels per frame to cross screen in 1-4 seconds
-        # Screen is 800px wide, pieces spawn at 850px, so need to travel 850px
-        # At 60 FPS: 1 second = 60 frames (850/60 = 14.2), 4 seconds = 240 frames (850/240 = 3.5)
-        # Reduced by 20% (multiply by 0.8)
-        if not hasattr(self, 'horizontal_speed'):
-            self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8
-        
-        # Vertical movement direction (1 for down, -1 for up)
-        self.vertical_direction = random.choice([1, -1])
-        
-        # Note: vertical_speed is set by setup_movement() based on piece type
-        # For Bishop: diagonal horizontal component (also set by setup_movement)
-        # For Knight: L-shape movement state
-        self.knight_state = None
-        self.knight_target_y = None
-        self.knight_target_x = None
-        self.knight_move_speed = 0
-        
-    def setup_movement(self):
-        """Setup movement speeds based on chess piece type"""
-        if self.piece_type == "Pawn":
-            # Pawn: only leftward movement (no vertical)
-            self.vertical_speed = 0
-            self.diagonal_horizontal = 0
-            self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * (2/3)  # 1/3 slower
-            
-        elif self.piece_type == "Rook":
-            # Rook: fast vertical movement, slow leftward movement
-            # Moves from top to bottom in 2 seconds
-            # Screen height is 600px, piece is 50px, so travel ~550px in 120 frames (2 seconds at 60 FPS)
-            # Speed needed: 550 / 120 = ~4.6 pixels per frame
-            self.vertical_speed = 4.6 * (2/3)  # 1/3 slower
-            self.diagonal_horizontal = 0
-            # Slow horizontal movement (half of normal speed)
-            self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * 0.5 * (2/3)  # 1/3 slower
-            
-        elif self.piece_type == "Knight":
-            # Knight: L-shape movement (discrete jumps, not fluid)
-            # Moves 2 squares vertically, then 1 square horizontally left
-            # Using 60 pixels per "square"
-            self.square_size = 60
-            self.vertical_jump = 2 * self.square_size  # 120 pixels
-            self.horizontal_jump = 1 * self.square_size  # 60 pixels
-            self.knight_state = "vertical"  # "vertical" or "horizontal"
-            self.knight_target_y = None
-            self.knight_target_x = None
-            self.knight_move_speed = 8 * (2/3)  # pixels per frame for the jump (1/3 slower)
-            self.vertical_speed = 0  # Not used for knight
-            self.diagonal_horizontal = 0
-            self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * (2/3)  # 1/3 slower
-            
-        elif self.piece_type == "Bishop":
-            # Bishop: equal vertical and leftward movement (diagonal)
-            # Set both to same value for true 45-degree diagonal
-            self.vertical_speed = 5 * (2/3)  # 1/3 slower
-            self.diagonal_horizontal = 0
-            # Horizontal speed should equal vertical speed for true diagonal
-            self.horizontal_speed = 5 * (2/3)  # 1/3 slower
-            
-        elif self.piece_type == "Queen":
-            # Queen: randomly selects movement from any piece type with probabilities
-            movement_types = ['rook', 'bishop', 'knight', 'pawn']
-            self.queen_movement_type = random.choice(movement_types)
-            
-            if self.queen_movement_type == 'rook':
-                # Fast vertical, slow horizontal
-                self.vertical_speed = 4.6
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * 0.5
-            elif self.queen_movement_type == 'bishop':
-                # Equal vertical and horizontal
-                self.vertical_speed = 5
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = 5
-            elif self.queen_movement_type == 'knight':
-                # L-shape (handled separately in update)
-                # Initialize knight movement variables
-                self.square_size = 60
-                self.vertical_jump = 2 * self.square_size  # 120 pixels
-                self.horizontal_jump = 1 * self.square_size  # 60 pixels
-                self.knight_state = None  # Will be initialized in update
-                self.knight_target_y = None
-                self.knight_target_x = None
-                self.knight_move_speed = 8  # pixels per frame for the jump
-                self.vertical_speed = 0  # Not used for knight
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8
-            else:  # pawn
-                # Only leftward
-                self.vertical_speed = 0
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8
-            
-        elif self.piece_type == "King":
-            # King: slow leftward movement, no vertical movement, larger size
-            self.vertical_speed = 0
-            self.diagonal_horizontal = 0
-            # Slow horizontal movement (half of normal speed)
-            self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * 0.5 * (2/3)  # 1/3 slower
-            # Make King larger
-            self.width = 70
-            self.height = 70
-        else:
-            # Default: simple forward movement
-            self.vertical_speed = 0
-            self.diagonal_horizontal = 0
-            self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * (2/3)  # 1/3 slower
-    
-    def update(self, speed_multiplier=1.0):
-        # Increment age (for safety removal of stuck pieces)
-        self.spawn_age += 1
-        
-        # Apply speed multiplier to all movement
-        effective_horizontal_speed = self.horizontal_speed * speed_multiplier
-        effective_vertical_speed = self.vertical_speed * speed_multiplier
-        effective_knight_move_speed = self.knight_move_speed * speed_multiplier
-        
-        # Knight has special L-shape movement (discrete jumps)
-        # Queen can also use Knight movement when queen_movement_type == 'knight'
-        if self.piece_type == "Knight" or (self.piece_type == "Queen" and hasattr(self, 'queen_movement_type') and self.queen_movement_type == 'knight'):
-            # Knight does NOT have continuous leftward movement - only moves left during L-shape
-            
-            # Initialize knight movement if needed
-            if self.knight_state is None:
-                self.knight_state = "vertical"
-                # Choose initial vertical direction (up or down)
-                self.vertical_direction = random.choice([1, -1])
-                self.knight_target_y = self.y + (self.vertical_jump * self.vertical_direction)
-                # Clamp target to screen bounds
-                if self.knight_target_y < 0:
-                    self.knight_target_y = 0
-                    self.vertical_direction = 1
-                elif self.knight_target_y > SCREEN_HEIGHT - self.height:
-                    self.knight_target_y = SCREEN_HEIGHT - self.height
-                    self.vertical_direction = -1
-            
-            if self.knight_state == "vertical":
-                # Move toward vertical target (2 squares up or down)
-                distance_to_target = abs(self.knight_target_y - self.y)
-                if distance_to_target > effective_knight_move_speed:
-                    # Move toward target
-                    if self.y < self.knight_target_y:
-                        self.y += effective_knight_move_speed
-                    else:
-                        self.y -= effective_knight_move_speed
-                else:
-                    # Reached target, switch to horizontal movement
-                    self.y = self.knight_target_y
-                    self.knight_state = "horizontal"
-                    # Set target for 1 square left (in addition to continuous leftward movement)
-                    self.knight_target_x = self.x - self.horizontal_jump
-            
-            elif self.knight_state == "horizontal":
-                # Move toward horizontal target (1 square left) - this is the ONLY leftward movement
-                distance_to_target = abs(self.knight_target_x - self.x)
-                if distance_to_target > effective_knight_move_speed:
-                    # Move toward target (leftward movement for the L-shape)
-                    if self.x > self.knight_target_x:
-                        self.x -= effective_knight_move_speed
-                else:
-                    # Reached target, switch back to vertical movement
-                    self.x = self.knight_target_x
-                    self.knight_state = "vertical"
-                    # Choose next vertical direction (reverse if at boundary, otherwise random)
-                    if self.y <= 0:
-                        self.vertical_direction = 1  # Must go down
-                    elif self.y >= SCREEN_HEIGHT - self.height:
-                        self.vertical_direction = -1  # Must go up
-                    else:
-                        # Randomly choose up or down
-                        self.vertical_direction = random.choice([1, -1])
-                    self.knight_target_y = self.y + (self.vertical_jump * self.vertical_direction)
-                    # Clamp target to screen bounds
-                    if self.knight_target_y < 0:
-                        self.knight_target_y = 0
-                    elif self.knight_target_y > SCREEN_HEIGHT - self.height:
-                        self.knight_target_y = SCREEN_HEIGHT - self.height
+        self.misses += 1
+        surface = self.load(color, piece_type, size)
+        self.surfaces[key] = surface
+        return surface
+    
+    def load(self, color, piece_type, size):
+        """Decode and scale a piece sprite, falling back to a grey square if it is missing"""
+        self.disk_loads += 1
+        # The fallback is cached too, so a missing file is only tried once
+        return load_piece_image(color, piece_type, size)
+    
+    def add(self, color, piece_type, size, surface):
+        """Store a sprite loaded elsewhere (the startup loader thread)"""
+        self.disk_loads += 1
+        self.surfaces[(color, piece_type, size)] = surface
+    
+    def get_piece(self, piece):
+        """Sprite for a simulated ChessPiece"""
+        return self.get(piece.piece_color, piece.piece_type, (piece.width, piece.height))
+    
+    def preload(self):
+        """Load every color/piece combination at the size the game will ask for"""
+        for piece_type in PIECE_TYPES:
+            side = KING_SIZE if piece_type == "King" else PIECE_SIZE
+            for color in PIECE_COLORS:
+                self.get(color, piece_type, (side, side))
+    
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+        self.disk_loads = 0
+    
+    def stats(self):
+        """Hit/miss counters; disk_loads stays flat once the cache is warm"""
+        return {
+            "entries": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_loads": self.disk_loads,
+        }
+
+
+# Shared by every chess piece (needs a display mode set before the first load)
+SPRITE_CACHE = SpriteCache()
+
+
+class ScoreStamp:
+    """HUD score drawn into one reused Surface from digits rendered once, so a new score allocates nothing"""
+    
+    def __init__(self, font, label, color, max_digits=6):
+        self.label = font.render(label, True, color).convert_alpha()
+        self.digits = [font.render(str(digit), True, color).convert_alpha() for digit in range(10)]
+        width = self.label.get_width() + max_digits * max(digit.get_width() for digit in self.digits)
+        height = max(surface.get_height() for surface in self.digits + [self.label])
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+        self.value = None
+    
+    def render(self, value):
+        if value != self.value:
+            surface = self.surface
+            surface.fill((0, 0, 0, 0))
+            # MAX onto transparent pixels copies the glyphs' color and alpha as they are
+            surface.blit(self.label, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x = self.label.get_width()
+            for character in str(value):
+                digit = self.digits[ord(character) - 48]
+                surface.blit(digit, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+                x += digit.get_width()
+            self.value = value
+        return self.surface
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces keyed by (font, text, color)"""
+    
+    def __init__(self, max_entries=64):
+        self.surfaces = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def render(self, font, text, color):
+        """Return the antialiased surface for this text, rasterizing it only on a miss"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
         
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            # Drop the least recently used text (old scores, mostly)
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def stats(self):
+        """Hit/miss counters; misses stay flat on steady-state frames"""
+        return {
+            "entries": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Shared by every screen of the game
+TEXT_CACHE = TextCache()
+
+
+# Asset loaders, run on the loader thread: decode and scale only (no display conversion)
+def load_background():
+    try:
+        background = pygame.image.load("Background.png")
+        return pygame.transform.scale(background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    except:
+        return None
+
+
+def load_backdrop(presenter):
+    """Background.png at full resolution, scaled here (off the main thread) for the presenter's borders"""
+    try:
+        background = pygame.image.load("Background.png")
+    except (pygame.error, FileNotFoundError):
+        return None
+    presenter.backdrop_image("background", background, presenter.output_size)
+    return background
+
+
+def load_logo():
+    try:
+        logo = pygame.image.load("citadell games logo.png")
+        # Scale logo to fit in corner (about 150px wide)
+        logo_width = 150
+        logo_height = int(logo.get_height() * (logo_width / logo.get_width()))
+        return pygame.transform.scale(logo, (logo_width, logo_height))
+    except:
+        return None
+
+
+def load_buttons():
+    """(start button, shop button), either of which may be None"""
+    try:
+        start_button_full = pygame.image.load("start game button.png")
+        # Cut the image in half horizontally (take the top half)
+        button_width = start_button_full.get_width()
+        button_height = start_button_full.get_height() // 2
+        # Extract top half of the image
+        start_button = start_button_full.subsurface((0, 0, button_width, button_height))
+        # Scale button to reasonable size
+        scaled_width = 200
+        scaled_height = int(button_height * (scaled_width / button_width))
+        start_button = pygame.transform.scale(start_button, (scaled_width, scaled_height))
+    except:
+        start_button = None
+    
+    try:
+        shop_button = pygame.image.load("shop button.png")
+        # Scale button to match start button size
+        if start_button:
+            button_width = start_button.get_width()
+            button_height = int(shop_button.get_height() * (button_width / shop_button.get_width()))
         else:
-            # Other pieces: normal movement
-            # Move horizontally (each piece type has its own horizontal_speed set in setup_movement)
-            self.x -= effective_horizontal_speed
-            
-            # Move vertically based on piece type and direction
-            vertical_movement = effective_vertical_speed * self.vertical_direction
-            self.y += vertical_movement
-        
-        # For Queen, occasionally change movement type
-        if self.piece_type == "Queen" and random.random() < 0.05:
-            movement_types = ['rook', 'bishop', 'knight', 'pawn']
-            self.queen_movement_type = random.choice(movement_types)
-            
-            if self.queen_movement_type == 'rook':
-                # Fast vertical, slow horizontal
-                self.vertical_speed = 4.6 * (2/3)  # 1/3 slower
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * 0.5 * (2/3)  # 1/3 slower
-            elif self.queen_movement_type == 'bishop':
-                # Equal vertical and horizontal
-                self.vertical_speed = 5 * (2/3)  # 1/3 slower
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = 5 * (2/3)  # 1/3 slower
-            elif self.queen_movement_type == 'knight':
-                # L-shape (handled separately in update)
-                # Initialize knight movement variables
-                self.square_size = 60
-                self.vertical_jump = 2 * self.square_size  # 120 pixels
-                self.horizontal_jump = 1 * self.square_size  # 60 pixels
-                self.knight_state = None  # Will be initialized in update
-                self.knight_target_y = None
-                self.knight_target_x = None
-                self.knight_move_speed = 8 * (2/3)  # pixels per frame for the jump (1/3 slower)
-                self.vertical_speed = 0  # Not used for knight
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * (2/3)  # 1/3 slower
-            else:  # pawn
-                # Only leftward
-                self.vertical_speed = 0
-                self.diagonal_horizontal = 0
-                self.horizontal_speed = random.uniform(3.5, 14.0) * 0.8 * (2/3)  # 1/3 slower
-        
-        # Only change vertical direction when hitting top or bottom boundary (not for Knight or Queen in knight mode, they have their own logic)
-        is_knight_movement = (self.piece_type == "Knight" or 
-                             (self.piece_type == "Queen" and hasattr(self, 'queen_movement_type') and self.queen_movement_type == 'knight'))
-        if not is_knight_movement:
-            if self.y <= 0:
-                self.y = 0
-                self.vertical_direction = 1  # Change to moving down
-            elif self.y >= SCREEN_HEIGHT - self.height:
-                self.y = SCREEN_HEIGHT - self.height
-                self.vertical_direction = -1  # Change to moving up
-    
-    def draw(self, screen):
-        screen.blit(self.image, (self.x, self.y))
-    
-    def get_rect(self):
-        # Make hitbox smaller (80% of original size, centered)
-        hitbox_width = int(self.width * 0.8)
-        hitbox_height = int(self.height * 0.8)
-        hitbox_x = self.x + (self.width - hitbox_width) // 2
-        hitbox_y = self.y + (self.height - hitbox_height) // 2
-        return pygame.Rect(hitbox_x, hitbox_y, hitbox_width, hitbox_height)
+            button_width = 200
+            button_height = 50
+        shop_button = pygame.transform.scale(shop_button, (button_width, button_height))
+    except:
+        shop_button = None
+    return start_button, shop_button
+
+
+def load_point_sound():
+    try:
+        return pygame.mixer.Sound("SFX-06.wav")
+    except:
+        return None
+
+
+def piece_sprite_keys():
+    """(color, piece type, size) of every piece sprite the game draws"""
+    keys = []
+    for piece_type in PIECE_TYPES:
+        side = KING_SIZE if piece_type == "King" else PIECE_SIZE
+        for color in PIECE_COLORS:
+            keys.append((color, piece_type, (side, side)))
+    return keys
+
+
+def bundle_recipe():
+    """(name, source files, load) for every image the game draws, title screen first; bundle.py packs them"""
+    player_template = JetpackMan(0, 0)
+    player_size = (player_template.width, player_template.height)
+    recipe = [
+        ("background", ["Background.png"], load_background),
+        ("logo", ["citadell games logo.png"], load_logo),
+        ("buttons", ["start game button.png", "shop button.png"], load_buttons),
+        (player_asset_name(player_size), [PLAYER_SHEET], lambda: load_player_frames(player_size, convert=False)),
+    ]
+    for key in piece_sprite_keys():
+        recipe.append((piece_asset_name(*key), [piece_image_path(*key[:2])],
+                       lambda key=key: load_piece_image(*key, convert=False)))
+    return recipe
 
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    def __init__(self, swarm=False, render_mode="capped", seed=None, record_dir=None, dirty_rects=False,
+                 pixel_collisions=False, autopilot=False, profile=False, trace_path=None, music_speed=1.0,
+                 save_dir=None, effects=False, skin="default", tilt=False, scale_mode=None, window_size=None,
+                 fullscreen=False, low_latency=False, latency_report=False, steady_state=False):
+        self.startup_start = time.perf_counter()
+        self.startup_timings = {}  # Step -> seconds since startup_start
+        
+        # Start only the subsystems the game uses (pygame.init() would start every one)
+        pygame.display.init()
+        pygame.font.init()
+        
+        # capped: render at FPS; uncapped: render as fast as possible; vsync: present on refresh
+        self.render_mode = render_mode
+        self.screen = None
+        # Resolution-independent output: draw at SCREEN_WIDTH x SCREEN_HEIGHT, scaled to the window by the GPU
+        self.presenter = None
+        if scale_mode or window_size or fullscreen:
+            self.presenter = Presenter(window_size, fullscreen, scale_mode or "fit", vsync=render_mode == "vsync")
+            self.screen = self.presenter.screen
+            if render_mode == "vsync" and not self.presenter.vsync:
+                self.render_mode = "uncapped"
+        elif render_mode == "vsync":
+            try:
+                self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED, vsync=1)
+            except pygame.error:
+                # Driver can't do vsync; render uncapped instead
+                self.render_mode = "uncapped"
+        if self.screen is None:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Flappy Chess")
         self.clock = pygame.time.Clock()
         
-        # Initialize audio mixer
+        # Initialize audio mixer (before the loader thread decodes the sound effect)
         pygame.mixer.init()
+        self.log_startup("subsystems")
         
-        # Game state: "title", "playing", "game_over", "shop", "paused"
+        # Game state: "title", "playing", "game_over", "shop" (pause lives in the world)
         self.state = "title"
-        self.paused = False
         
         # Load background music files in specific order
         self.music_files = [
@@ -371,197 +326,424 @@ class Game:
             "trinity 150.mp3",
             "beautiful fields 138.mp3"
         ]
-        self.current_music_index = 0
-        self.music_playing = False
-        self.music_timer = 0
-        self.music_switch_interval = 90 * FPS  # 90 seconds in frames
-        self.music_speed = 1.0  # Playback speed multiplier
-        
-        # Load sound effects
-        try:
-            self.point_sound = pygame.mixer.Sound("SFX-06.wav")
-        except:
-            self.point_sound = None
-        
-        # Load background
-        try:
-            self.background = pygame.image.load("Background.png").convert()
-            self.background = pygame.transform.scale(self.background, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        except:
-            self.background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            self.background.fill((135, 206, 235))  # Sky blue fallback
-        
-        # Load title screen assets
-        try:
-            self.logo = pygame.image.load("citadell games logo.png").convert_alpha()
-            # Scale logo to fit in corner (about 150px wide)
-            logo_width = 150
-            logo_height = int(self.logo.get_height() * (logo_width / self.logo.get_width()))
-            self.logo = pygame.transform.scale(self.logo, (logo_width, logo_height))
-        except:
-            self.logo = None
-        
-        try:
-            start_button_full = pygame.image.load("start game button.png").convert_alpha()
-            # Cut the image in half horizontally (take the top half)
-            button_width = start_button_full.get_width()
-            button_height = start_button_full.get_height() // 2
-            # Extract top half of the image
-            self.start_button = start_button_full.subsurface((0, 0, button_width, button_height))
-            # Scale button to reasonable size
-            scaled_width = 200
-            scaled_height = int(button_height * (scaled_width / button_width))
-            self.start_button = pygame.transform.scale(self.start_button, (scaled_width, scaled_height))
-            self.start_button_rect = self.start_button.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
-        except:
-            self.start_button = None
-            self.start_button_rect = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 50, 200, 50)
-        
-        try:
-            self.shop_button = pygame.image.load("shop button.png").convert_alpha()
-            # Scale button to match start button size
-            if self.start_button:
-                button_width = self.start_button.get_width()
-                button_height = int(self.shop_button.get_height() * (button_width / self.shop_button.get_width()))
-            else:
-                button_width = 200
-                button_height = 50
-            self.shop_button = pygame.transform.scale(self.shop_button, (button_width, button_height))
-            self.shop_button_rect = self.shop_button.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
-        except:
-            self.shop_button = None
-            self.shop_button_rect = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 50, 200, 50)
-        
-        # Game objects (initialized when game starts)
-        self.player = None
-        self.chess_pieces = []
-        self.score = 0
-        self.game_over = False
+        self.music_speed = music_speed  # Tempo multiplier (pitch is kept)
+        # Decodes the next track ahead on its own thread and plays them back-to-back
+        self.music = MusicPlayer(self.music_files, self.music_speed)
+        
+        # Placeholders (the title screen has fallbacks for all of them) until the loader delivers the assets
+        self.point_sound = None
+        self.player_frames = None
+        self.background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.background.fill((135, 206, 235))  # Sky blue fallback
+        self.logo = None
+        self.start_button = None
+        self.start_button_rect = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 50, 200, 50)
+        self.shop_button = None
+        self.shop_button_rect = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 50, 200, 50)
+        self.pause_button_rect = pygame.Rect(SCREEN_WIDTH - 100, 10, 90, 30)
+        
+        # Player skin and velocity tilt: every variant is rendered up front into the atlas
+        # (None draws the default skin's frames upright, as they come)
+        self.skin = skin
+        self.atlas = None
+        if tilt or skin != "default":
+            player_template = JetpackMan(0, 0)
+            self.atlas = AnimationAtlas((player_template.width, player_template.height),
+                                        TILT_ANGLES if tilt else [0])
+        
+        # Decode and scale every asset on a background thread so the first frame isn't kept waiting
+        self.loader = self.asset_loader()
+        self.loader.start()
+        
+        # Simulated game session (created when game starts)
+        self.world = None
+        self.swarm = swarm  # Use the NumPy stress-mode world instead of the normal one
+        self.swarm_sprite_list = None
+        # Optional pixel-accurate collision check after the hitbox test (masks built once, shared by sessions)
+        self.narrowphase = MaskNarrowphase(self.bundle) if pixel_collisions and not swarm else None
+        
+        # Dirty-rect rendering: only restore and push the regions that changed during play
+        # (not for swarm mode, whose thousands of pieces cover the whole screen anyway)
+        self.dirty_rects = dirty_rects and not swarm
+        self.previous_rects = []  # Regions drawn last frame, to be restored from the background
+        self.last_frame_key = None
+        # Per render path: [frames, seconds, pixels pushed to the display]
+        self.frame_stats = {"full": [0, 0.0, 0], "dirty": [0, 0.0, 0]}
         self.font = pygame.font.Font(None, 36)
         self.big_font = pygame.font.Font(None, 72)
+        self.small_font = pygame.font.Font(None, 22)
+        
+        # HUD score text, re-rendered only when the score changes
+        self.score_surface = None
+        self.score_surface_value = None
+        
+        # Steady state: frames of a session leave nothing allocated (see allocations.py), so the garbage
+        # collector is switched off while one runs; the counter reports how well that holds on exit
+        self.steady_state = steady_state
+        self.score_stamp = ScoreStamp(self.font, "Score: ", WHITE) if steady_state else None
+        self.allocations = None
+        if steady_state:
+            self.allocations = AllocationCounter()
+            self.allocations.start()
+        
+        # Pause overlay never changes, so build it once
+        self.pause_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.pause_overlay.set_alpha(180)
+        self.pause_overlay.fill(BLACK)
+        
+        # Inputs requested since the last update, applied on the next simulation tick
+        self.jump_requested = False
+        self.pause_requested = False
+        # Arrival times of jump inputs not applied yet. A tick applies those that arrived by the end of its
+        # time slot (low-latency mode sets it per tick; otherwise it's open and the next tick takes them all)
+        self.jump_times = []
+        self.tick_slot_end = math.inf
+        
+        # Low latency: wait before each frame's work instead of after it, reading input until the frame
+        # has to start (uncapped rendering never waits anyway)
+        self.pacer = None
+        if low_latency and self.render_mode != "uncapped":
+            self.pacer = FramePacer(vsync=self.render_mode == "vsync")
+        # Input-to-present latency of jumps per session, reported on exit
+        self.latency = LatencyMeter() if latency_report else None
         
-        # Spawn timer
-        self.spawn_timer = 0
-        self.spawn_delay = 90  # Frames between spawns (~1.5 seconds at 60 FPS for one piece every 1-2 seconds)
+        # Seed for the next session (None picks a fresh one) and where to save replays
+        self.seed = seed
+        self.record_dir = record_dir
+        self.recorder = None
+        
+        # Coins, purchases and high score; saved on a background thread (None: nothing is saved)
+        self.save = SaveStore(save_dir) if save_dir else None
+        self.coins_earned = 0
+        
+        # Particle effects (exhaust, score sparks, explosion); imported here so the game doesn't need NumPy
+        self.effects = None
+        if effects:
+            from particles import ParticleEngine
+            self.effects = ParticleEngine()
+        
+        # Lookahead bot that plays by itself (attract mode and soak tests); not for swarm worlds
+        self.planner = Planner() if autopilot and not swarm else None
+        self.game_over_ticks = 0
+        self.autopilot_text = None
+        self.autopilot_text_value = None
+        
+        # Per-phase frame timing (F3 shows the overlay); None costs nothing
+        self.profiler = FrameProfiler(frame_budget=1.0 / FPS) if profile or trace_path else None
+        self.trace_path = trace_path
+    
+    def asset_loader(self):
+        """Loader for everything drawn after the first frame, title screen assets first
+
+        Images come straight out of the asset bundle when it is current; otherwise
+        they are decoded from the PNGs and the bundle is rebuilt once they are in.
+        """
+        recipe = bundle_recipe()
+        self.bundle = open_bundle(recipe)
+        self.stale_recipe = recipe if self.bundle is None else None
+        
+        player_template = JetpackMan(0, 0)
+        finishes = {
+            "background": self.set_background,
+            "logo": self.set_logo,
+            "buttons": self.set_buttons,
+            player_asset_name((player_template.width, player_template.height)): self.set_player_frames,
+        }
+        for key in piece_sprite_keys():
+            finishes[piece_asset_name(*key)] = lambda image, key=key: SPRITE_CACHE.add(*key, image.convert_alpha())
+        
+        loader = AssetLoader()
+        for name, _, load in recipe:
+            if self.bundle is not None and name in self.bundle:
+                load = lambda name=name: self.bundle.load(name)
+            loader.add(name, load, finishes[name])
+        loader.add("point sound", load_point_sound, self.set_point_sound)
+        if self.atlas is not None:
+            atlas = self.atlas
+            loader.add(f"{self.skin} atlas", lambda: render_skin(self.skin, atlas.size, atlas.angles),
+                       self.set_player_atlas)
+        if self.presenter is not None:
+            loader.add("backdrop", lambda: load_backdrop(self.presenter), self.set_backdrop)
+        return loader
+    
+    # Main-thread halves of the loader jobs: convert to the display format and swap in
+    def set_background(self, background):
+        if background is not None:
+            self.background = background.convert()
+    
+    def set_backdrop(self, background):
+        if background is not None:
+            self.presenter.set_backdrop("background", background)
+    
+    def set_logo(self, logo):
+        if logo is not None:
+            self.logo = logo.convert_alpha()
+    
+    def set_buttons(self, buttons):
+        start_button, shop_button = buttons
+        if start_button is not None:
+            self.start_button = start_button.convert_alpha()
+            self.start_button_rect = self.start_button.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
+        if shop_button is not None:
+            self.shop_button = shop_button.convert_alpha()
+            self.shop_button_rect = self.shop_button.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
+    
+    def set_point_sound(self, sound):
+        self.point_sound = sound
+    
+    def set_player_frames(self, frames):
+        self.player_frames = [frame.convert_alpha() for frame in frames]
+    
+    def set_player_atlas(self, variants):
+        self.atlas.store(self.skin, variants)
+        self.atlas.use(self.skin)
+    
+    def poll_assets(self):
+        """Swap in whatever the loader has finished, within a slice of the frame"""
+        if self.loader.poll():
+            self.assets_loaded()
+    
+    def finish_loading(self):
+        """Block until every asset is in (the game can't start without its sprites)"""
+        if self.loader is not None:
+            self.loader.wait()
+            self.assets_loaded()
+    
+    def assets_loaded(self):
+        self.log_startup("assets ready")
+        print(self.startup_report())
+        self.loader = None
+        if self.stale_recipe is not None:
+            # Nothing else is loading now; the next start gets a fresh bundle
+            start_rebuild(self.stale_recipe)
+            self.stale_recipe = None
+    
+    def log_startup(self, step):
+        self.startup_timings[step] = time.perf_counter() - self.startup_start
+    
+    def startup_report(self):
+        """Startup milestones and the slowest assets, in milliseconds"""
+        milestones = ", ".join(f"{step} {seconds * 1000:.1f} ms" for step, seconds in self.startup_timings.items())
+        lines = [f"Startup: {milestones}"]
+        if self.loader is not None:
+            slowest = sorted(self.loader.timings, key=lambda timing: -(timing[1] + timing[2]))[:3]
+            lines.append(f"  {len(self.loader.timings)} assets; slowest: " + ", ".join(
+                f"{name} {load * 1000:.1f} ms (+{finish * 1000:.1f} ms converting)" for name, load, finish in slowest))
+        return "\n".join(lines)
+    
+    # The renderer reads the session state straight from the simulated world
+    @property
+    def player(self):
+        return self.world.player if self.world else None
+    
+    @property
+    def chess_pieces(self):
+        return self.world.chess_pieces if self.world else []
+    
+    @property
+    def score(self):
+        return self.world.score if self.world else 0
+    
+    @property
+    def game_over(self):
+        return self.world.game_over if self.world else False
+    
+    @property
+    def paused(self):
+        return self.world.paused if self.world else False
     
     def start_game(self):
         """Initialize and start a new game"""
-        self.player = JetpackMan(100, SCREEN_HEIGHT // 2)
-        self.chess_pieces = []
-        self.score = 0
-        self.game_over = False
-        self.paused = False
-        self.spawn_timer = 0
+        self.finish_loading()
+        if self.swarm:
+            # Imported here so the normal game does not need NumPy
+            from swarm import SwarmWorld, SWARM_SETTINGS
+            self.world = SwarmWorld(self.seed, **SWARM_SETTINGS)
+        else:
+            self.world = World(self.seed, narrowphase=self.narrowphase)
+        self.world.profiler = self.profiler
+        self.seed = None  # Only the first session uses a seed given on the command line
+        self.jump_requested = False
+        self.pause_requested = False
+        self.jump_times = []
+        if self.latency is not None:
+            self.latency.start_session()
+        self.game_over_ticks = 0
+        if self.effects is not None:
+            self.effects.clear()
+        self.recorder = ReplayRecorder(self.world) if self.record_dir else None
         self.state = "playing"
+        if self.steady_state:
+            gc.disable()
         # Don't reset music timer - keep music playing
         
         # Start background music only if not already playing
-        if not self.music_playing:
+        if not self.music.active:
             self.play_background_music()
     
     def play_background_music(self):
-        """Play background music in the specified order"""
-        if len(self.music_files) > 0:
-            try:
-                pygame.mixer.music.load(self.music_files[self.current_music_index])
-                # Note: pygame.mixer.music doesn't support speed control directly
-                # We'll use a workaround by adjusting the switch interval
-                pygame.mixer.music.play()
-                self.music_playing = True
-            except:
-                pass
+        """Play background music in the specified order (the first track starts once it is decoded)"""
+        self.music.play()
     
     def check_music(self):
-        """Check if music ended and play next track"""
+        """Stop the music when not playing; track changes come from MUSIC_END events in run()"""
+        if self.state != "playing" and self.music.active:
+            self.music.stop()
+        
+    def request_jump(self, arrived=None):
+        """Queue a jump for the next simulation step (ignored while paused); arrived is when its input came in"""
+        if self.player:
+            self.jump_requested = True
+            if self.pacer is not None or self.latency is not None:
+                self.jump_times.append(time.perf_counter() if arrived is None else arrived)
+    
+    def take_jump_times(self, jumped):
+        """Drop the inputs this tick's jump applied (handing them to the latency meter); keep later ones queued"""
+        applied = 0
+        if jumped:
+            while applied < len(self.jump_times) and self.jump_times[applied] <= self.tick_slot_end:
+                applied += 1
+        if self.latency is not None and applied and not self.paused:
+            self.latency.apply(self.jump_times[:applied])
+        del self.jump_times[:applied]
+        self.jump_requested = bool(self.jump_times)
+    
+    def request_pause_toggle(self):
+        """Queue a pause/resume for the next simulation step"""
         if self.state == "playing" and not self.game_over:
-            if self.music_playing:
-                # Only switch when current track ends (let songs play in their entirety)
-                if not pygame.mixer.music.get_busy():
-                    # Move to next track in order
-                    self.current_music_index = (self.current_music_index + 1) % len(self.music_files)
-                    self.play_background_music()
-        elif self.state != "playing":
-            # Stop music when not playing
-            if self.music_playing:
-                pygame.mixer.music.stop()
-                self.music_playing = False
-                self.music_timer = 0
-        
-    def spawn_chess_piece(self):
-        """Spawn a random chess piece at a random position"""
-        piece_types = ["Pawn", "Rook", "Knight", "Bishop", "Queen", "King"]
-        piece_type = random.choice(piece_types)
-        
-        # Spawn off-screen to the right
-        x = SCREEN_WIDTH + 50
-        y = random.randint(50, SCREEN_HEIGHT - 50)
-        
-        self.chess_pieces.append(ChessPiece(piece_type, x, y))
-    
-    def check_collisions(self):
-        """Check for collisions between player and chess pieces"""
-        player_rect = self.player.get_rect()
-        
-        for piece in self.chess_pieces:
-            if player_rect.colliderect(piece.get_rect()):
-                return True
-        return False
+            self.pause_requested = not self.pause_requested
+    
+    def save_replay(self):
+        """Write the finished session's replay to the record directory"""
+        replay = self.recorder.finish()
+        self.recorder = None
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, f"replay-{replay.seed}-{replay.score}.fcr")
+        replay.save(path)
+        print(f"Saved replay to {path}")
+    
+    def bank_result(self):
+        """Add the finished game's coins (1 per point, as on the web) and high score to the save"""
+        self.coins_earned = 0
+        if self.save is None or self.planner:
+            # Attract mode doesn't earn anything
+            return
+        self.coins_earned = self.score
+        self.save.add("coins", self.coins_earned)
+        self.save.record_score(self.score)
+    
+    def emit_effects(self, jumped, points):
+        """Start the particle effects for what happened this tick"""
+        player = self.player
+        if jumped:
+            self.effects.burst("exhaust", player.x + player.width / 2, player.y + player.height)
+        if points:
+            # Sparks off the score counter, more for several points at once
+            self.effects.burst("score", 60, 22, scale=min(points, 5))
+        if self.game_over:
+            self.effects.burst("explosion", player.x + player.width / 2, player.y + player.height / 2)
     
     def update(self):
         if self.state != "playing":
             return
         
+        # Effects play on after the game ends (the explosion) but hold still while paused
+        if self.effects is not None and not self.paused:
+            self.effects.step()
+        
         if self.game_over:
+            if self.planner:
+                self.game_over_ticks += 1
+                if self.game_over_ticks >= AUTOPILOT_RESTART_TICKS:
+                    self.restart()
             return
         
-        # Update player
-        self.player.update()
+        if self.planner:
+            self.jump_requested = self.planner.choose(self.world) or self.jump_requested
         
-        # Spawn chess pieces (limit to 5 pieces on screen max to prevent overcrowding)
-        self.spawn_timer += 1
-        if self.spawn_timer >= self.spawn_delay and len(self.chess_pieces) < 5:
-            self.spawn_timer = 0
-            self.spawn_chess_piece()
+        jumped = self.jump_requested
+        if jumped and self.jump_times and self.jump_times[0] > self.tick_slot_end:
+            # The input came in after this tick's time slot; a later tick applies it
+            jumped = False
         
-        # Calculate speed multiplier based on score (gradually increase)
-        # Speed increases by 0.1 for every 10 points, max 2.0x speed
-        speed_multiplier = 1.0 + (self.score // 10) * 0.1
-        speed_multiplier = min(speed_multiplier, 2.0)  # Cap at 2x speed
-        
-        # Update chess pieces
-        for piece in self.chess_pieces[:]:
-            piece.update(speed_multiplier)
-            
-            # Remove pieces that are far off-screen (left side)
-            if piece.x < -150:
-                self.chess_pieces.remove(piece)
-                self.score += 1
-                # Play point sound effect
-                if self.point_sound:
-                    self.point_sound.play()
-            # Remove pieces that somehow went too far right (shouldn't happen, but safety check)
-            elif piece.x > SCREEN_WIDTH + 200:
-                self.chess_pieces.remove(piece)
-            # Safety: Remove pieces that have been on screen too long (10 seconds at 60 FPS = 600 frames)
-            # This prevents pieces from getting stuck and blocking new spawns
-            elif piece.spawn_age > 600:
-                self.chess_pieces.remove(piece)
-                self.score += 1
-                # Play point sound effect
-                if self.point_sound:
-                    self.point_sound.play()
+        # Advance the simulation by one frame
+        if self.recorder:
+            self.recorder.record(jumped, self.pause_requested)
+        points = self.world.step(jumped, self.pause_requested)
+        self.jump_requested = False
+        self.pause_requested = False
+        if self.jump_times:
+            self.take_jump_times(jumped)
+        if self.game_over and self.recorder:
+            self.save_replay()
+        if self.game_over:
+            self.bank_result()
+            if self.steady_state:
+                gc.enable()
+        if self.effects is not None:
+            self.emit_effects(jumped and not self.paused, points)
+        # Play point sound effect when a piece scored
+        if self.point_sound and points:
+            self.point_sound.play()
         
         # Check if music needs to continue
+        profiler = self.profiler
+        if profiler is not None:
+            started = profiler.clock()
         self.check_music()
+        if profiler is not None:
+            profiler.record("music", started)
+    
+    def draw(self, alpha=1.0):
+        """Draw a frame; alpha is how far the render time is between the last two ticks"""
+        start = time.perf_counter()
+        if self.loader is not None:
+            self.poll_assets()
+        
+        # Only steady gameplay frames can be patched; anything else redraws the whole screen
+        frame_key = (self.state, self.world, self.game_over, self.paused)
+        playing = self.state == "playing" and not self.game_over and not self.paused
+        if self.dirty_rects and playing and frame_key == self.last_frame_key:
+            path = "dirty"
+            changed = self.draw_dirty(alpha)
+        else:
+            path = "full"
+            self.draw_full(alpha)
+            changed = None
+        self.last_frame_key = frame_key
+        
+        profiler = self.profiler
+        if profiler is not None and profiler.overlay_visible:
+            overlay_rect = profiler.draw_overlay(self.screen, self.profiler_text)
+            # Restored from the background next frame like any sprite
+            self.previous_rects.append(overlay_rect)
+            if changed is not None:
+                changed.append(overlay_rect)
+        
+        if profiler is not None:
+            started = profiler.clock()
+        if self.pacer is not None:
+            self.pacer.rendered()
+        pixels = self.present(changed)
+        if self.pacer is not None:
+            self.pacer.presented()
+        if self.latency is not None:
+            self.latency.presented(time.perf_counter())
+        if profiler is not None:
+            profiler.record("flip", started)
         
-        # Check collisions
-        if self.check_collisions():
-            self.game_over = True
-            # Keep state as "playing" so game over screen shows
+        stats = self.frame_stats[path]
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+        stats[2] += pixels
+        if "first frame" not in self.startup_timings:
+            self.log_startup("first frame")
     
-    def draw(self):
+    def draw_full(self, alpha):
+        """Redraw the whole screen (draw() presents it)"""
         # Draw background
         self.screen.blit(self.background, (0, 0))
+        self.previous_rects = []
         
         if self.state == "title":
             self.draw_title_screen()
@@ -569,45 +751,27 @@ class Game:
             self.draw_shop_screen()
         elif self.state == "playing":
             if not self.game_over:
-                # Draw chess pieces
-                for piece in self.chess_pieces:
-                    piece.draw(self.screen)
-                
-                # Draw player
-                self.player.draw(self.screen)
-                
-                # Draw score
-                score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-                self.screen.blit(score_text, (10, 10))
-                
-                # Draw pause button
-                pause_button = pygame.Rect(SCREEN_WIDTH - 100, 10, 90, 30)
-                pygame.draw.rect(self.screen, (100, 100, 100), pause_button)
-                pygame.draw.rect(self.screen, WHITE, pause_button, 2)
-                pause_text = self.font.render("PAUSE", True, WHITE)
-                pause_text_rect = pause_text.get_rect(center=pause_button.center)
-                self.screen.blit(pause_text, pause_text_rect)
+                self.previous_rects = self.draw_playfield(alpha)
                 
                 # Draw pause overlay if paused
                 if self.paused:
-                    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                    overlay.set_alpha(180)
-                    overlay.fill(BLACK)
-                    self.screen.blit(overlay, (0, 0))
+                    self.screen.blit(self.pause_overlay, (0, 0))
                     
-                    pause_title = self.big_font.render("PAUSED", True, WHITE)
+                    pause_title = TEXT_CACHE.render(self.big_font, "PAUSED", WHITE)
                     pause_title_rect = pause_title.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
                     self.screen.blit(pause_title, pause_title_rect)
                     
-                    resume_text = self.font.render("Press P or click PAUSE to resume", True, WHITE)
+                    resume_text = TEXT_CACHE.render(self.font, "Press P or click PAUSE to resume", WHITE)
                     resume_text_rect = resume_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
                     self.screen.blit(resume_text, resume_text_rect)
             else:
-                # Game over screen
-                game_over_text = self.big_font.render("GAME OVER", True, RED)
-                score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
-                restart_text = self.font.render("Press SPACE to restart", True, WHITE)
-                escape_text = self.font.render("Press ESC to return to menu", True, WHITE)
+                # Game over screen (over the end of the explosion)
+                if self.effects is not None:
+                    self.effects.draw(self.screen)
+                game_over_text = TEXT_CACHE.render(self.big_font, "GAME OVER", RED)
+                score_text = TEXT_CACHE.render(self.font, f"Final Score: {self.score}", WHITE)
+                restart_text = TEXT_CACHE.render(self.font, "Press SPACE to restart", WHITE)
+                escape_text = TEXT_CACHE.render(self.font, "Press ESC to return to menu", WHITE)
                 
                 text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
                 score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
@@ -618,8 +782,122 @@ class Game:
                 self.screen.blit(score_text, score_rect)
                 self.screen.blit(restart_text, restart_rect)
                 self.screen.blit(escape_text, escape_rect)
+                
+                if self.save is not None:
+                    bank_text = TEXT_CACHE.render(
+                        self.small_font, f"+{self.coins_earned} coins ({self.save['coins']} total)   "
+                                         f"Best: {self.save['high_score']}", WHITE)
+                    self.screen.blit(bank_text, bank_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 10)))
+    
+    def draw_dirty(self, alpha):
+        """Restore last frame's sprite regions and redraw; returns the regions to push"""
+        for rect in self.previous_rects:
+            self.screen.blit(self.background, rect, rect)
+        rects = self.draw_playfield(alpha)
         
-        pygame.display.flip()
+        changed = self.previous_rects + rects
+        self.previous_rects = rects
+        return changed
+    
+    def present(self, changed=None):
+        """Push the frame to the display (only the changed regions if given); returns pixels pushed"""
+        if self.presenter is not None:
+            return self.presenter.present(changed)
+        if changed is None:
+            pygame.display.flip()
+            return SCREEN_WIDTH * SCREEN_HEIGHT
+        pygame.display.update(changed)
+        return sum(rect.width * rect.height for rect in changed)
+    
+    def profiler_text(self, text):
+        return TEXT_CACHE.render(self.small_font, text, WHITE)
+    
+    def draw_playfield(self, alpha):
+        """Draw pieces, player and HUD over the background; returns the rects drawn"""
+        # Draw chess pieces
+        rects = self.draw_chess_pieces(alpha)
+        if self.effects is not None:
+            rects.extend(self.effects.draw(self.screen))
+        
+        # Draw player
+        player = self.player
+        player_y = interpolate(player.prev_y, player.y, alpha)
+        if self.atlas is not None:
+            image, dx, dy = self.atlas.lookup(self.skin, player.current_frame, player.velocity)
+            rects.append(self.screen.blit(image, (player.x + dx, player_y + dy)))
+        else:
+            rects.append(self.screen.blit(self.player_frames[player.current_frame], (player.x, player_y)))
+        
+        # Draw score
+        rects.append(self.screen.blit(self.score_text(), (10, 10)))
+        if self.planner:
+            rects.append(self.screen.blit(self.autopilot_status(), (10, 40)))
+        
+        # Draw pause button
+        pause_button = self.pause_button_rect
+        pygame.draw.rect(self.screen, (100, 100, 100), pause_button)
+        pygame.draw.rect(self.screen, WHITE, pause_button, 2)
+        pause_text = TEXT_CACHE.render(self.font, "PAUSE", WHITE)
+        pause_text_rect = pause_text.get_rect(center=pause_button.center)
+        self.screen.blit(pause_text, pause_text_rect)
+        rects.append(pause_button)
+        return rects
+    
+    def score_text(self):
+        """HUD score surface, rendered again only after the score changes"""
+        score = self.score
+        if self.score_stamp is not None:
+            return self.score_stamp.render(score)
+        if score != self.score_surface_value:
+            self.score_surface = TEXT_CACHE.render(self.font, f"Score: {score}", WHITE)
+            self.score_surface_value = score
+        return self.score_surface
+    
+    def autopilot_status(self):
+        """HUD line with the planner's throughput, rounded so it rarely needs re-rendering"""
+        rate = round(self.planner.rollouts_per_second, -2)
+        if rate != self.autopilot_text_value:
+            self.autopilot_text = TEXT_CACHE.render(self.font, f"AUTOPILOT  {rate:,.0f} rollouts/s", WHITE)
+            self.autopilot_text_value = rate
+        return self.autopilot_text
+    
+    def frame_time_report(self):
+        """Average draw cost and display traffic for the full and dirty-rect paths"""
+        lines = []
+        for path, (frames, seconds, pixels) in self.frame_stats.items():
+            if frames:
+                lines.append(f"{path:>5}: {frames} frames, {seconds / frames * 1000:.3f} ms/frame, "
+                             f"{pixels / frames / (SCREEN_WIDTH * SCREEN_HEIGHT):.1%} of the screen pushed")
+        return "\n".join(lines)
+    
+    def draw_chess_pieces(self, alpha=1.0):
+        """Blit every piece in the world in one batched call; returns their rects (not in swarm mode)"""
+        world = self.world
+        if self.swarm:
+            # Swarm pieces live in arrays; index the sprites by color and type codes
+            if self.swarm_sprite_list is None:
+                self.swarm_sprite_list = self.swarm_sprites()
+            sprites = self.swarm_sprite_list
+            n = world.count
+            sprite_ids = (world.color[:n] * len(PIECE_TYPES) + world.piece_type[:n]).tolist()
+            xs = interpolate(world.prev_x[:n], world.x[:n], alpha)
+            ys = interpolate(world.prev_y[:n], world.y[:n], alpha)
+            positions = zip(xs.tolist(), ys.tolist())
+            self.screen.blits(zip(map(sprites.__getitem__, sprite_ids), positions), doreturn=False)
+            return []
+        else:
+            return self.screen.blits([(SPRITE_CACHE.get_piece(piece),
+                                (interpolate(piece.prev_x, piece.x, alpha), interpolate(piece.prev_y, piece.y, alpha)))
+                               for piece in world.chess_pieces])
+    
+    def swarm_sprites(self):
+        """Piece sprites ordered by color code * number of types + type code"""
+        sprites = []
+        for color in PIECE_COLORS:
+            for piece_type in PIECE_TYPES:
+                side = KING_SIZE if piece_type == "King" else PIECE_SIZE
+                sprites.append(SPRITE_CACHE.get(color, piece_type, (side, side)))
+        return sprites
     
     def draw_title_screen(self):
         """Draw the title screen with logo and buttons"""
@@ -628,7 +906,7 @@ class Game:
             self.screen.blit(self.logo, (10, 10))
         
         # Draw title text
-        title_text = self.big_font.render("FLAPPY CHESS", True, WHITE)
+        title_text = TEXT_CACHE.render(self.big_font, "FLAPPY CHESS", WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 150))
         self.screen.blit(title_text, title_rect)
         
@@ -638,7 +916,7 @@ class Game:
         else:
             # Fallback button
             pygame.draw.rect(self.screen, (0, 150, 0), self.start_button_rect)
-            start_text = self.font.render("START GAME", True, WHITE)
+            start_text = TEXT_CACHE.render(self.font, "START GAME", WHITE)
             start_text_rect = start_text.get_rect(center=self.start_button_rect.center)
             self.screen.blit(start_text, start_text_rect)
         
@@ -647,9 +925,20 @@ class Game:
         else:
             # Fallback button
             pygame.draw.rect(self.screen, (150, 100, 0), self.shop_button_rect)
-            shop_text = self.font.render("SHOP", True, WHITE)
+            shop_text = TEXT_CACHE.render(self.font, "SHOP", WHITE)
             shop_text_rect = shop_text.get_rect(center=self.shop_button_rect.center)
             self.screen.blit(shop_text, shop_text_rect)
+        
+        # Progress bar while the loader thread is still bringing in assets
+        if self.loader is not None:
+            bar = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT - 60, 300, 14)
+            pygame.draw.rect(self.screen, (40, 40, 40), bar)
+            filled = bar.copy()
+            filled.width = int(bar.width * self.loader.progress)
+            pygame.draw.rect(self.screen, (0, 180, 0), filled)
+            pygame.draw.rect(self.screen, WHITE, bar, 1)
+            loading_text = TEXT_CACHE.render(self.font, "Loading...", WHITE)
+            self.screen.blit(loading_text, loading_text.get_rect(midbottom=(SCREEN_WIDTH // 2, bar.top - 4)))
     
     def draw_shop_screen(self):
         """Draw the shop screen"""
@@ -658,17 +947,17 @@ class Game:
             self.screen.blit(self.logo, (10, 10))
         
         # Draw "Shop" title
-        shop_title = self.big_font.render("SHOP", True, WHITE)
+        shop_title = TEXT_CACHE.render(self.big_font, "SHOP", WHITE)
         shop_title_rect = shop_title.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 100))
         self.screen.blit(shop_title, shop_title_rect)
         
         # Draw "Not open yet" message
-        message_text = self.font.render("The shop is not open yet!", True, WHITE)
+        message_text = TEXT_CACHE.render(self.font, "The shop is not open yet!", WHITE)
         message_rect = message_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         self.screen.blit(message_text, message_rect)
         
         # Draw back instruction
-        back_text = self.font.render("Press ESC to return to menu", True, WHITE)
+        back_text = TEXT_CACHE.render(self.font, "Press ESC to return to menu", WHITE)
         back_rect = back_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
         self.screen.blit(back_text, back_rect)
     
@@ -678,14 +967,41 @@ class Game:
     
     def run(self):
         running = True
+        if self.planner:
+            # Attract mode skips the title screen
+            self.start_game()
+        accumulator = 0.0
+        previous_time = time.perf_counter()
+        profiler = self.profiler
         
         while running:
-            self.clock.tick(FPS)
+            if profiler is not None:
+                profiler.begin_frame()
+            if self.pacer is not None:
+                # Low latency: sleep before the frame's work, reading input (and when it came in) meanwhile
+                events = self.pacer.wait()
+                self.clock.tick()
+            elif self.render_mode == "capped":
+                self.clock.tick(FPS)
+            else:
+                # Uncapped/vsync: don't sleep, just keep the clock's FPS reading current
+                self.clock.tick()
+            if profiler is not None:
+                profiler.lap("wait")
             
-            for event in pygame.event.get():
+            now = time.perf_counter()
+            accumulator += now - previous_time
+            previous_time = now
+            
+            if self.pacer is None:
+                events = [(event, now) for event in pygame.event.get()]
+            for event, arrived in events:
                 if event.type == pygame.QUIT:
                     running = False
                 
+                if event.type == MUSIC_READY or event.type == MUSIC_END:
+                    self.music.handle_event(event)
+                
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         # Return to title screen from game over or shop
@@ -697,17 +1013,24 @@ class Game:
                         if self.state == "playing":
                             if self.game_over:
                                 self.restart()
-                            elif not self.paused:
-                                if self.player:
-                                    self.player.jump()
+                            else:
+                                self.request_jump(arrived)
                     elif event.key == pygame.K_p:
                         # Toggle pause
-                        if self.state == "playing" and not self.game_over:
-                            self.paused = not self.paused
+                        self.request_pause_toggle()
+                    elif event.key == pygame.K_F3 and profiler is not None:
+                        profiler.toggle_overlay()
+                
+                if event.type == pygame.VIDEORESIZE and self.presenter is not None:
+                    # A window being dragged sends a stream of these: rescale the backdrop once it stops
+                    self.presenter.resize(settle=RESIZE_SETTLE)
                 
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # Left mouse button
                         mouse_pos = pygame.mouse.get_pos()
+                        if self.presenter is not None:
+                            # Window pixels to game coordinates
+                            mouse_pos = self.presenter.to_logical(event.pos)
                         
                         if self.state == "title":
                             # Check if start button was clicked
@@ -719,21 +1042,110 @@ class Game:
                         elif self.state == "playing":
                             if not self.game_over:
                                 # Check if pause button was clicked
-                                pause_button = pygame.Rect(SCREEN_WIDTH - 100, 10, 90, 30)
-                                if pause_button.collidepoint(mouse_pos):
-                                    self.paused = not self.paused
-                                elif not self.paused:
+                                if self.pause_button_rect.collidepoint(mouse_pos):
+                                    self.request_pause_toggle()
+                                else:
                                     # Click to jump (anywhere on screen during gameplay)
-                                    if self.player:
-                                        self.player.jump()
+                                    self.request_jump(arrived)
             
-            self.update()
-            self.draw()
+            if profiler is not None:
+                profiler.lap("events")
+            
+            # Run as many fixed ticks as the elapsed time calls for
+            ticks = 0
+            due = min(int(accumulator / TICK_SECONDS), MAX_CATCH_UP_TICKS)
+            slots_start = now - accumulator  # When the first tick's time slot begins
+            while accumulator >= TICK_SECONDS and ticks < MAX_CATCH_UP_TICKS:
+                if self.pacer is not None and ticks < due - 1:
+                    # Each jump goes on the tick whose slot it came in during; the last tick takes newer ones
+                    self.tick_slot_end = slots_start + (ticks + 1) * TICK_SECONDS
+                else:
+                    self.tick_slot_end = math.inf
+                self.update()
+                accumulator -= TICK_SECONDS
+                ticks += 1
+            if accumulator >= TICK_SECONDS:
+                # Too far behind (slow machine or a long stall): drop the backlog instead of spiralling
+                accumulator %= TICK_SECONDS
+            if profiler is not None:
+                profiler.lap("update")
+            
+            self.draw(accumulator / TICK_SECONDS)
+            if profiler is not None:
+                profiler.lap("draw")
+            
+            if self.allocations is not None:
+                # Only frames of a running session are meant to be steady
+                if self.state == "playing" and not self.game_over:
+                    self.allocations.frame()
+                else:
+                    self.allocations.mark()
         
+        if self.dirty_rects:
+            print(self.frame_time_report())
+        if self.planner:
+            print(self.planner.stats())
+        if self.latency is not None:
+            print(self.latency.report())
+        if self.allocations is not None:
+            print(self.allocations.report())
+        if profiler is not None:
+            print(profiler.report())
+            if self.trace_path:
+                profiler.write_trace(self.trace_path)
+                print(f"Wrote frame trace to {self.trace_path}")
+        if self.save is not None:
+            self.save.close()
         pygame.quit()
         sys.exit()
 
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Flappy Chess")
+    parser.add_argument("--swarm", action="store_true",
+                        help="stress mode with thousands of pieces (needs NumPy)")
+    parser.add_argument("--render", choices=RENDER_MODES, default="capped",
+                        help="render rate: capped at %d FPS, uncapped, or synced to the display" % FPS)
+    parser.add_argument("--seed", type=int, help="seed for the first game (reproduces a replay's pieces)")
+    parser.add_argument("--record", metavar="DIR", help="save a replay of every finished game to DIR")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="redraw only changed regions during play (faster on software rendering)")
+    parser.add_argument("--pixel-collisions", action="store_true",
+                        help="only count hits where the sprites' opaque pixels overlap")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase of every frame (F3 toggles the frame-time overlay)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="on exit, write the profiled frames as Chrome trace-event JSON (implies --profile)")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let the lookahead bot play (attract mode; restarts itself after each game)")
+    parser.add_argument("--music-speed", type=float, default=1.0,
+                        help="music tempo multiplier, same pitch (tracks are stretched as they are decoded)")
+    parser.add_argument("--effects", action="store_true",
+                        help="particle effects: jetpack exhaust, score sparks and explosions (needs NumPy)")
+    parser.add_argument("--skin", choices=sorted(SKIN_SHEETS), default="default", help="player skin")
+    parser.add_argument("--tilt", action="store_true", help="tilt the player with its velocity")
+    parser.add_argument("--save-dir", default=SAVE_DIR,
+                        help="where coins and high scores are kept (empty: don't save)")
+    parser.add_argument("--scale", choices=SCALE_MODES,
+                        help="scale the game to a resizable window: fit it, or whole multiples only (sharp pixels)")
+    parser.add_argument("--window-size", type=parse_size, metavar="WxH",
+                        help="initial window size when scaling (implies --scale fit)")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="fill the screen at its native resolution (implies --scale fit)")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="pace frames to read input as late as possible and apply jumps on the tick they came in")
+    parser.add_argument("--latency-report", action="store_true",
+                        help="on exit, print each session's input-to-present latency of jumps (timed from when input "
+                             "is read, which only --low-latency does as it arrives)")
+    parser.add_argument("--steady-state", action="store_true",
+                        help="allocation-free frames with garbage collection off during play (kiosk sessions)")
+    args = parser.parse_args()
+    
+    game = Game(swarm=args.swarm, render_mode=args.render, seed=args.seed, record_dir=args.record,
+                dirty_rects=args.dirty_rects, pixel_collisions=args.pixel_collisions,
+                autopilot=args.autopilot, profile=args.profile, trace_path=args.trace,
+                music_speed=args.music_speed, save_dir=args.save_dir, effects=args.effects,
+                skin=args.skin, tilt=args.tilt, scale_mode=args.scale, window_size=args.window_size,
+                fullscreen=args.fullscreen, low_latency=args.low_latency, latency_report=args.latency_report,
+                steady_state=args.steady_state)
     game.run()
@@ -0,0 +1,241 @@
+"""Low-latency frame pacing and input-to-present latency measurement.
+
+The normal loop sleeps in clock.tick(FPS) first and reads input after, so a
+jump pressed early in the sleep waits for the rest of it, then for the tick,
+the draw and the flip. FramePacer turns that around: it waits until the last
+moment the frame can start and still make its present time (the next FPS slot,
+or with vsync the next refresh, learned from when flips return), reading
+events every millisecond meanwhile and busy-polling the last one. Input is
+read as late as possible and each event gets the time it arrived
+(pygame 2's events carry no timestamp of their own), so the game can apply a
+jump on the simulation tick whose time slot it arrived in.
+
+LatencyMeter records, per game session, the time from a jump's input
+arriving to the present() of the first frame showing it. Photons follow at the
+display's next scanout, which the game can't observe; with vsync the flip
+returns at the refresh, so the two are close.
+
+    python latency.py     # injected inputs through the normal loop and the paced one
+
+The dummy video driver doesn't sync to anything, so the benchmark's vsync runs
+emulate a 60 Hz display whose flip returns at the next refresh.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import deque
+
+import pygame
+
+from profiler import percentile
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+
+PACING_MARGIN = 0.002  # Seconds of slack kept between the expected end of a frame's work and its present time
+MARGIN_STEP = 0.001  # Added to the slack each time a vsync present misses its refresh
+WORK_WINDOW = 30  # Frames of work times the pacer plans with (the slowest of them)
+POLL_SLICE = 0.001  # Sleep between event polls while waiting
+SPIN = 0.001  # Busy-poll this close to the deadline (sleep overshoots)
+
+
+class FramePacer:
+    """Waits each frame out before its work instead of after, reading input the whole time"""
+
+    def __init__(self, period=1.0 / FPS, vsync=False, margin=PACING_MARGIN):
+        self.period = period
+        self.vsync = vsync
+        self.margin = margin
+        self.work = deque(maxlen=WORK_WINDOW)  # Seconds from waking to presenting, recent frames
+        self.intervals = deque(maxlen=WORK_WINDOW)  # Seconds between presents returning (vsync)
+        self.woke = None
+        self.rendered_at = None
+        self.presented_at = None
+        self.target = None  # When the next present should happen
+        self.misses = 0
+        self.clock = time.perf_counter
+
+    def deadline(self):
+        """Latest time to start the next frame's work"""
+        if self.target is None:
+            return self.clock()
+        return self.target - max(self.work, default=0.0) - self.margin
+
+    def wait(self):
+        """Sleep until the frame has to start; returns the events that came in as (event, arrival time)"""
+        deadline = self.deadline()
+        events = []
+        while True:
+            now = self.clock()
+            for event in pygame.event.get():
+                events.append((event, now))
+            remaining = deadline - now
+            if remaining <= 0:
+                break
+            if remaining > SPIN:
+                time.sleep(min(remaining - SPIN, POLL_SLICE))
+        self.woke = now
+        return events
+
+    def rendered(self):
+        """The frame is drawn and about to be presented"""
+        self.rendered_at = self.clock()
+
+    def presented(self):
+        """The frame is presented: plan the next one"""
+        now = self.clock()
+        if self.woke is not None:
+            # With vsync the present blocks until the refresh; that wait isn't work
+            self.work.append((self.rendered_at if self.vsync else now) - self.woke)
+        if self.vsync:
+            if self.target is not None and now > self.target + self.period / 2:
+                # Missed the refresh: presenting takes longer than the slack allows for
+                self.misses += 1
+                self.margin = min(self.margin + MARGIN_STEP, self.period / 2)
+            # The flip returned at a refresh, the next is one refresh period on
+            if self.presented_at is not None:
+                self.intervals.append(now - self.presented_at)
+                intervals = sorted(self.intervals)
+                self.period = intervals[len(intervals) // 2]
+            self.target = now + self.period
+        elif self.target is None or now > self.target + self.period:
+            # First frame, or too far behind to keep the cadence
+            self.target = now + self.period
+        else:
+            self.target += self.period
+        self.presented_at = now
+
+
+class LatencyMeter:
+    """Input-to-present latency of jumps, kept per game session"""
+
+    def __init__(self):
+        self.sessions = []  # Lists of latencies in seconds, one per session
+        self.applied = []  # Arrival times of inputs applied by ticks not yet presented
+
+    def start_session(self):
+        self.sessions.append([])
+        self.applied = []
+
+    def apply(self, arrivals):
+        """A tick applied the inputs that arrived at these times"""
+        self.applied.extend(arrivals)
+
+    def presented(self, now):
+        """A frame showing every applied input was presented at now"""
+        if self.applied and self.sessions:
+            self.sessions[-1].extend(now - arrival for arrival in self.applied)
+        self.applied = []
+
+    @staticmethod
+    def summary(latencies):
+        ordered = sorted(latencies)
+        return (f"{len(ordered)} jumps, p50 {percentile(ordered, 0.5) * 1000:.1f} ms, "
+                f"p95 {percentile(ordered, 0.95) * 1000:.1f} ms, p99 {percentile(ordered, 0.99) * 1000:.1f} ms, "
+                f"max {ordered[-1] * 1000:.1f} ms")
+
+    def report(self):
+        lines = ["Input-to-present latency:"]
+        for number, latencies in enumerate(self.sessions, 1):
+            if latencies:
+                lines.append(f"  session {number}: {self.summary(latencies)}")
+        everything = [latency for latencies in self.sessions for latency in latencies]
+        if not everything:
+            return "Input-to-present latency: no jumps"
+        if len(lines) > 2:
+            lines.append(f"  all: {self.summary(everything)}")
+        return "\n".join(lines)
+
+
+def post_inputs(count, rate, sent):
+    """Post count jump keypresses at random times, about rate per second, from another thread"""
+    for _ in range(count):
+        time.sleep(random.expovariate(rate))
+        sent.append(time.perf_counter())
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, sent=sent[-1]))
+
+
+def sleep_until(deadline):
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        if remaining > SPIN:
+            time.sleep(remaining - SPIN)
+
+
+class EmulatedDisplay:
+    """flip() that returns at the next refresh when vsync is on, like a real synced display (the dummy one isn't)"""
+
+    def __init__(self, vsync, period=1.0 / FPS):
+        self.vsync = vsync
+        self.period = period
+        self.epoch = time.perf_counter()
+
+    def flip(self):
+        pygame.display.flip()
+        if self.vsync:
+            refreshes = int((time.perf_counter() - self.epoch) / self.period) + 1
+            sleep_until(self.epoch + refreshes * self.period)
+
+
+def run_loop(screen, paced, vsync, seconds, work, inputs):
+    """Loop like Game.run with a fixed draw cost; returns latencies (from posting) and arrival stamp errors"""
+    clock = pygame.time.Clock()
+    display = EmulatedDisplay(vsync)
+    pacer = FramePacer(vsync=vsync) if paced else None
+    sent = []
+    poster = threading.Thread(target=post_inputs, args=(inputs, inputs / seconds, sent), daemon=True)
+    poster.start()
+    latencies = []
+    stamp_errors = []
+    pending = []
+    while poster.is_alive() or pending or pygame.event.peek(pygame.KEYDOWN):
+        if pacer is not None:
+            events = pacer.wait()
+        else:
+            # As Game.run: capped sleeps out the frame, vsync leaves the waiting to the flip
+            clock.tick(0 if vsync else FPS)
+            now = time.perf_counter()
+            events = [(event, now) for event in pygame.event.get()]
+        for event, arrived in events:
+            if event.type == pygame.KEYDOWN:
+                pending.append(event.sent)
+                stamp_errors.append(arrived - event.sent)
+        # Simulation tick and draw
+        deadline = time.perf_counter() + work
+        while time.perf_counter() < deadline:
+            pass
+        screen.fill((pending and 255 or 0, 0, 0))
+        if pacer is not None:
+            pacer.rendered()
+        display.flip()
+        now = time.perf_counter()
+        if pacer is not None:
+            pacer.presented()
+        latencies.extend(now - sent_at for sent_at in pending)
+        pending = []
+    return latencies, stamp_errors, pacer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input-to-present latency of the normal and the paced loop")
+    parser.add_argument("--seconds", type=float, default=10.0, help="per loop")
+    parser.add_argument("--inputs", type=int, default=200, help="jumps injected per loop")
+    parser.add_argument("--work-ms", type=float, default=4.0, help="simulated tick and draw cost per frame")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    for vsync in (False, True):
+        for paced in (False, True):
+            latencies, stamp_errors, pacer = run_loop(screen, paced, vsync, args.seconds, args.work_ms / 1000,
+                                                      args.inputs)
+            stamp_errors.sort()
+            name = ("vsync" if vsync else "capped") + (" + paced" if paced else "")
+            missed = f", {pacer.misses} refreshes missed" if pacer is not None and vsync else ""
+            print(f"{name:>14}: {LatencyMeter.summary(latencies)}; "
+                  f"arrival stamped {percentile(stamp_errors, 0.5) * 1000:.2f} ms late (median){missed}")
+
+
+if __name__ == "__main__":
+    main()
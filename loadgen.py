@@ -0,0 +1,139 @@
+"""Load generator for server.py: many bot clients playing at once over real sockets.
+
+Each client connects, starts a session and plays it with the autopilot rule
+(jump whenever the player sinks below the middle of the screen), starting a new
+session when one ends. It measures what a player would feel: the time from
+sending a jump to receiving the state that acknowledges it, plus message
+throughput and finished games. Clients connect gradually over --ramp seconds so
+the server isn't hit by thousands of handshakes in the same instant.
+
+    python server.py --seconds 40 &
+    python loadgen.py --clients 1000 --seconds 30
+"""
+import argparse
+import asyncio
+import json
+
+from profiler import percentile
+from server import DEFAULT_PORT, raise_file_limit
+from simulation import SCREEN_HEIGHT
+
+
+class LoadStats:
+    """Counters shared by every client"""
+
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.messages_in = 0
+        self.jumps = 0
+        self.games = 0
+        self.score_total = 0
+        self.best_score = 0
+        self.errors = 0
+        self.latencies = []  # Seconds from sending a jump to its ack
+
+
+async def run_client(number, host, port, stats, stop_at):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    loop = asyncio.get_running_loop()
+    sent = {}  # Jump seq -> time sent, until acknowledged
+    seq = 0
+    try:
+        writer.write(f'{{"op": "start", "name": "bot {number}"}}\n'.encode())
+        while loop.time() < stop_at:
+            try:
+                line = await asyncio.wait_for(reader.readline(), stop_at - loop.time())
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                break
+            stats.messages_in += 1
+            message = json.loads(line)
+            op = message["op"]
+            if op == "state":
+                now = loop.time()
+                ack = message["ack"]
+                for acked in [key for key in sent if key <= ack]:
+                    stats.latencies.append(now - sent.pop(acked))
+                # Only one jump in flight: the next state already reflects it
+                if not sent and message["y"] > SCREEN_HEIGHT // 2 and message["velocity"] > 0:
+                    seq += 1
+                    sent[seq] = now
+                    stats.jumps += 1
+                    writer.write(f'{{"op": "jump", "seq": {seq}}}\n'.encode())
+            elif op == "over":
+                stats.games += 1
+                stats.score_total += message["score"]
+                stats.best_score = max(stats.best_score, message["score"])
+                sent.clear()
+                writer.write(b'{"op": "start"}\n')
+            elif op == "error":
+                stats.errors += 1
+                break
+    except (ConnectionError, ValueError):
+        stats.failed += 1
+    finally:
+        stats.connected -= 1
+        writer.close()
+
+
+async def report_loop(stats, interval, stop_at):
+    loop = asyncio.get_running_loop()
+    previous = 0
+    while loop.time() < stop_at:
+        await asyncio.sleep(interval)
+        print(f"{stats.connected} connected | {(stats.messages_in - previous) / interval:,.0f} msgs/s in | "
+              f"{stats.games} games finished", flush=True)
+        previous = stats.messages_in
+
+
+async def generate_load(host, port, clients, seconds, ramp, report_seconds):
+    loop = asyncio.get_running_loop()
+    stats = LoadStats()
+    start = loop.time()
+    stop_at = start + ramp + seconds
+    tasks = []
+    reporter = asyncio.create_task(report_loop(stats, report_seconds, stop_at)) if report_seconds else None
+    for number in range(clients):
+        tasks.append(asyncio.create_task(run_client(number, host, port, stats, stop_at)))
+        if ramp:
+            await asyncio.sleep(ramp / clients)
+    await asyncio.gather(*tasks)
+    if reporter is not None:
+        reporter.cancel()
+    return stats, loop.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many bot sessions against a Flappy Chess server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=30.0, help="how long to play once every client is connected")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which clients connect")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between progress lines (0: none)")
+    args = parser.parse_args()
+
+    raise_file_limit()
+    stats, elapsed = asyncio.run(generate_load(args.host, args.port, args.clients, args.seconds, args.ramp,
+                                               args.report))
+    latencies = sorted(stats.latencies)
+    print(f"{args.clients} clients, {stats.failed} failed, {stats.errors} errors, {elapsed:.1f} s")
+    print(f"{stats.messages_in:,} messages received ({stats.messages_in / elapsed:,.0f}/s), "
+          f"{stats.jumps:,} jumps sent")
+    if latencies:
+        print(f"Jump to ack: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    if stats.games:
+        print(f"{stats.games} games finished, mean score {stats.score_total / stats.games:.1f}, "
+              f"best {stats.best_score}")
+
+
+if __name__ == "__main__":
+    main()
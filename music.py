@@ -0,0 +1,236 @@
+"""Background music: tracks decoded ahead on a worker thread and queued back-to-back.
+
+pygame.mixer.music opens and decodes a file on whichever thread calls load(), so
+every track change stalls a frame and leaves a gap. MusicPlayer instead decodes
+each track into a Sound on a worker thread (time-stretching it there when the
+speed isn't 1.0) and plays the playlist on a reserved mixer channel. While one
+track plays, the next is already decoded and queued on the channel, so SDL
+starts it on the very next sample. The worker's MUSIC_READY events and the
+channel's MUSIC_END events arrive through the normal pygame event queue; nothing
+is polled per frame and no file is touched on the main thread.
+
+    python music.py --speed 1.25 --seconds 20
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+
+import pygame
+
+MUSIC_READY = pygame.event.custom_type()  # Worker finished decoding a track (event.sound is None if it failed)
+MUSIC_END = pygame.event.custom_type()  # Music channel finished a track (or was stopped)
+MUSIC_CHANNEL = 0  # Reserved so sound effects never steal it
+STRETCH_FRAME = 2048  # Samples per overlap-add window (about 46 ms at 44.1 kHz)
+STRETCH_OVERLAP = 4  # Windows overlapping each output sample
+STRETCH_TOLERANCE = 512  # Furthest a window may shift from its nominal read position, in samples
+STRETCH_STEP = 4  # Sample stride of the alignment search
+
+
+def time_stretch(samples, speed, frame=STRETCH_FRAME):
+    """WSOLA time stretch of a sample array: speed 1.25 plays 25% faster at the same pitch
+
+    Windows are read from the input about every hop * speed samples and written
+    to the output every hop samples, so the tempo changes but each window's
+    waveform (and so the pitch) does not. Each read position is nudged by up to
+    STRETCH_TOLERANCE samples to where the input best continues the previous
+    window, so overlapping windows add up in phase instead of cancelling.
+    """
+    import numpy as np
+
+    hop_out = frame // STRETCH_OVERLAP
+    hop_in = max(1, round(hop_out * speed))
+    count = (len(samples) - frame) // hop_in + 1
+    if speed == 1.0 or count < STRETCH_OVERLAP:
+        return samples
+
+    window = np.hanning(frame + 1)[:-1].astype(np.float32)
+    channel_shape = (1,) * (samples.ndim - 1)
+    shaped_window = window.reshape((frame,) + channel_shape)
+    source = samples.astype(np.float32)
+    guide = source if source.ndim == 1 else source.mean(axis=1)  # Mono mix for the alignment search
+    last_read = len(samples) - frame
+    output = np.zeros(((count - 1) * hop_out + frame,) + samples.shape[1:], dtype=np.float32)
+    weight = np.zeros(len(output), dtype=np.float32)
+    offset = 0
+    for index in range(count):
+        read = min(max(index * hop_in + offset, 0), last_read)
+        write = index * hop_out
+        output[write:write + frame] += source[read:read + frame] * shaped_window
+        weight[write:write + frame] += window
+
+        # Find where the next window should start: the best match (on every
+        # STRETCH_STEP-th sample, which is plenty for alignment) for what
+        # naturally follows this one
+        natural = read + hop_out
+        nominal = (index + 1) * hop_in
+        low = max(nominal - STRETCH_TOLERANCE, 0)
+        high = min(nominal + STRETCH_TOLERANCE, last_read)
+        if high <= low or natural > last_read:
+            offset = 0
+            continue
+        template = guide[natural:natural + frame:STRETCH_STEP]
+        region = guide[low:high + frame:STRETCH_STEP]
+        scores = np.correlate(region, template, "valid")
+        offset = low + STRETCH_STEP * int(np.argmax(scores)) - nominal
+    # Undo the window gain (the edges, covered by fewer windows, have less of it)
+    output /= np.maximum(weight, 1e-3).reshape((len(weight),) + channel_shape)
+
+    if np.issubdtype(samples.dtype, np.integer):
+        limits = np.iinfo(samples.dtype)
+        np.clip(output, limits.min, limits.max, out=output)
+    return output.astype(samples.dtype)
+
+
+def decode_track(path, speed):
+    """Load a whole track into a Sound, stretched to the given tempo; None if it can't be loaded"""
+    try:
+        sound = pygame.mixer.Sound(path)
+    except:
+        return None
+    if speed != 1.0:
+        sound = pygame.sndarray.make_sound(time_stretch(pygame.sndarray.array(sound), speed))
+    return sound
+
+
+class MusicPlayer:
+    """Plays a playlist in order on a reserved channel, decoding the next track ahead of time
+
+    Call play() to start, stop() to stop, and pass MUSIC_READY / MUSIC_END events
+    to handle_event(). Missing or undecodable files are skipped.
+    """
+
+    def __init__(self, files, speed=1.0, channel=MUSIC_CHANNEL):
+        self.files = list(files)
+        self.speed = speed  # Tempo multiplier, applied to tracks decoded from now on
+        self.index = 0  # Playlist position of the track playing (or about to)
+        self.active = False
+        self.playing = None  # (index, Sound) on the channel
+        self.queued = None  # (index, Sound) queued behind it
+        self.missing = set()  # Indexes that failed to load
+        self.generation = 0  # Bumped by stop() so decodes requested earlier are dropped
+        self.timings = []  # (file, seconds decoding on the worker thread)
+
+        pygame.mixer.set_reserved(channel + 1)
+        self.channel = pygame.mixer.Channel(channel)
+        self.channel.set_endevent(MUSIC_END)
+        self.requests = queue.Queue()
+        self.thread = None
+
+    def decode_all(self):
+        while True:
+            generation, index, speed = self.requests.get()
+            start = time.perf_counter()
+            sound = decode_track(self.files[index], speed)
+            self.timings.append((self.files[index], time.perf_counter() - start))
+            pygame.event.post(pygame.event.Event(MUSIC_READY, generation=generation, index=index, sound=sound))
+
+    def request(self, index):
+        """Decode a track on the worker thread; a MUSIC_READY event follows"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.decode_all, name="music-decoder", daemon=True)
+            self.thread.start()
+        self.requests.put((self.generation, index, self.speed))
+
+    def next_index(self, index):
+        """The playlist entry after index, skipping files known to be missing"""
+        for step in range(1, len(self.files) + 1):
+            candidate = (index + step) % len(self.files)
+            if candidate not in self.missing:
+                return candidate
+        return None
+
+    def play(self):
+        if self.active or not self.files:
+            return
+        self.active = True
+        self.request(self.index)
+
+    def stop(self):
+        self.active = False
+        self.generation += 1
+        self.playing = None
+        self.queued = None
+        self.channel.stop()
+
+    def handle_event(self, event):
+        if event.type == MUSIC_READY:
+            self.track_ready(event)
+        elif event.type == MUSIC_END and self.active:
+            self.track_ended()
+
+    def track_ready(self, event):
+        if event.generation != self.generation or not self.active:
+            return
+        if event.sound is None:
+            self.missing.add(event.index)
+            following = self.next_index(event.index)
+            if following is None:
+                # Nothing in the playlist can be played
+                self.active = False
+            elif self.playing is None:
+                self.index = following
+                self.request(following)
+            else:
+                self.queue_next(following)
+            return
+
+        if self.playing is None:
+            self.index = event.index
+            self.playing = (event.index, event.sound)
+            self.channel.play(event.sound)
+            self.queue_next(self.next_index(event.index))
+        else:
+            self.queued = (event.index, event.sound)
+            self.channel.queue(event.sound)
+
+    def queue_next(self, index):
+        """Line up the track after the playing one: reuse the playing Sound or decode it"""
+        if index == self.playing[0]:
+            self.queued = self.playing
+            self.channel.queue(self.playing[1])
+        else:
+            self.request(index)
+
+    def track_ended(self):
+        if self.queued is None:
+            # The channel ran dry before the next track was decoded; it plays as soon as it arrives
+            self.playing = None
+            return
+        # The channel has already moved on to the queued track
+        self.playing = self.queued
+        self.queued = None
+        self.index = self.playing[0]
+        self.queue_next(self.next_index(self.index))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play the Flappy Chess playlist through the music player")
+    parser.add_argument("files", nargs="*", default=["booyeah 120.mp3"])
+    parser.add_argument("--speed", type=float, default=1.0, help="tempo multiplier")
+    parser.add_argument("--seconds", type=float, default=20.0, help="how long to play")
+    args = parser.parse_args()
+
+    # The event queue belongs to the video subsystem
+    pygame.display.init()
+    pygame.mixer.init()
+    player = MusicPlayer(args.files, args.speed)
+    player.play()
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds and (player.active or player.playing):
+        for event in pygame.event.get():
+            if event.type == MUSIC_READY:
+                print(f"{time.perf_counter() - start:6.2f}s decoded {os.path.basename(player.files[event.index])}"
+                      + ("" if event.sound is not None else " (failed)"))
+            elif event.type == MUSIC_END:
+                print(f"{time.perf_counter() - start:6.2f}s track ended")
+            player.handle_event(event)
+        time.sleep(0.01)
+    player.stop()
+    for name, seconds in player.timings:
+        print(f"{name}: decoded in {seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
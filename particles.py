@@ -0,0 +1,273 @@
+"""Array-backed particle effects: jetpack exhaust, score sparks and the game-over explosion.
+
+Each texture has a ParticlePool whose particles live in preallocated NumPy
+arrays. step() moves them all with in-place vectorized operations and packs the
+live ones to the front (into a spare set of arrays, which then swap with the
+live set), so dead slots are reused and nothing is allocated per particle.
+
+Textures are a few pixels across, and blitting tens of thousands of tiny
+Surfaces one by one is dominated by per-blit overhead (Surface.blits costs about
+0.5 us a particle; pygame-ce's fblits is not in pygame). So draw() stamps a
+texture's pixels straight into the target's pixel array, one vectorized write
+per texture pixel; targets whose pixels can't be referenced get one blits call
+per texture instead.
+
+    python particles.py --count 20000    # per-frame cost of step() and draw()
+"""
+import argparse
+import math
+import time
+from itertools import repeat
+
+import numpy as np
+import pygame
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT
+
+POOL_CAPACITY = 20000  # Live particles per texture; emits beyond it are dropped
+
+# Textures as (dx, dy, color) pixels. Each pixel is stamped for every particle
+# before the next, so where particles overlap later pixels (the bright cores) win
+EXHAUST_TEXTURE = [(1, 1, (230, 90, 20)), (1, 0, (255, 170, 60)), (0, 1, (255, 170, 60)), (0, 0, (255, 220, 120))]
+SPARK_TEXTURE = [(1, 0, (255, 200, 40)), (0, 1, (255, 200, 40)), (2, 1, (255, 200, 40)), (1, 2, (255, 200, 40)),
+                 (1, 1, (255, 255, 210))]
+DEBRIS_TEXTURE = [(dx, dy, (220, 70, 30)) for dx in range(3) for dy in range(3) if (dx, dy) != (1, 1)]
+DEBRIS_TEXTURE.append((1, 1, (255, 240, 160)))
+
+# Texture -> pixels, gravity (pixels per tick squared), drag (velocity kept per tick)
+POOLS = {
+    "exhaust": (EXHAUST_TEXTURE, 0.05, 0.9),
+    "spark": (SPARK_TEXTURE, 0.15, 0.96),
+    "debris": (DEBRIS_TEXTURE, 0.25, 0.97),
+}
+
+# Effect -> emit() arguments; angles in degrees, 90 is straight down
+EFFECTS = {
+    "exhaust": {"pool": "exhaust", "count": 10, "speed": (1.5, 4.0), "direction": 90, "spread": 50, "life": (8, 20)},
+    "score": {"pool": "spark", "count": 24, "speed": (2.0, 6.0), "direction": 0, "spread": 360, "life": (15, 35)},
+    "explosion": {"pool": "debris", "count": 400, "speed": (1.0, 9.0), "direction": 0, "spread": 360,
+                  "life": (30, 70)},
+}
+
+
+class ParticlePool:
+    """Particles sharing one texture, in parallel arrays with the live ones first"""
+
+    FIELDS = ["x", "y", "vx", "vy", "age", "life"]
+
+    def __init__(self, texture, gravity=0.0, drag=1.0, capacity=POOL_CAPACITY):
+        self.texture = texture
+        self.width = max(dx for dx, _, _ in texture) + 1
+        self.height = max(dy for _, dy, _ in texture) + 1
+        self.gravity = gravity
+        self.drag = drag
+        self.capacity = capacity
+        self.count = 0
+        self.arrays = {name: np.zeros(capacity, dtype=np.float32) for name in self.FIELDS}
+        self.spare = {name: np.zeros(capacity, dtype=np.float32) for name in self.FIELDS}
+        # Scratch space for emit() and draw()
+        self.random = np.zeros(capacity, dtype=np.float64)
+        self.mask = np.zeros(capacity, dtype=bool)
+        self.bounds = np.zeros(capacity, dtype=bool)
+        self.columns = np.zeros(capacity, dtype=np.intp)
+        self.rows = np.zeros(capacity, dtype=np.intp)
+        self.visible_columns = np.zeros(capacity, dtype=np.intp)
+        self.visible_rows = np.zeros(capacity, dtype=np.intp)
+        self.index = np.zeros(capacity, dtype=np.intp)
+        self.target = np.zeros(capacity, dtype=np.intp)
+        self.sprite = None  # Surface for the blits fallback, built on first use
+        self.mapped = None  # (surface format key, texture colors mapped to it)
+
+    def emit(self, rng, count, x, y, speed, direction, spread, life):
+        """Add up to count particles at (x, y) heading within spread degrees of direction"""
+        start = self.count
+        count = min(count, self.capacity - start)
+        if count <= 0:
+            return 0
+        end = start + count
+        arrays = self.arrays
+        arrays["x"][start:end] = x
+        arrays["y"][start:end] = y
+        arrays["age"][start:end] = 0
+
+        angle = self.random[:count]
+        rng.random(out=angle)
+        angle *= math.radians(spread)
+        angle += math.radians(direction - spread / 2)
+        vx = arrays["vx"][start:end]
+        vy = arrays["vy"][start:end]
+        np.cos(angle, out=vx)
+        np.sin(angle, out=vy)
+        magnitude = self.random[:count]
+        rng.random(out=magnitude)
+        magnitude *= speed[1] - speed[0]
+        magnitude += speed[0]
+        vx *= magnitude
+        vy *= magnitude
+
+        lifetime = self.random[:count]
+        rng.random(out=lifetime)
+        lifetime *= life[1] - life[0]
+        lifetime += life[0]
+        arrays["life"][start:end] = lifetime
+        self.count = end
+        return count
+
+    def step(self):
+        """Age, retire and move every particle by one tick"""
+        n = self.count
+        if not n:
+            return
+        arrays = self.arrays
+        age = arrays["age"][:n]
+        age += 1
+        alive = np.less(age, arrays["life"][:n], out=self.mask[:n])
+        live = int(np.count_nonzero(alive))
+        if live < n:
+            # Pack the survivors into the spare arrays and make those the live set
+            spare = self.spare
+            for name in self.FIELDS:
+                np.compress(alive, arrays[name][:n], out=spare[name][:live])
+            self.arrays, self.spare = spare, arrays
+            arrays = spare
+            n = self.count = live
+
+        vx = arrays["vx"][:n]
+        vy = arrays["vy"][:n]
+        if self.drag != 1.0:
+            vx *= self.drag
+            vy *= self.drag
+        if self.gravity:
+            vy += self.gravity
+        arrays["x"][:n] += vx
+        arrays["y"][:n] += vy
+
+    def draw(self, surface):
+        """Draw the particles whose texture fits on the surface; returns a Rect around them or None"""
+        n = self.count
+        if not n:
+            return None
+        width, height = surface.get_size()
+        columns = self.columns[:n]
+        rows = self.rows[:n]
+        np.copyto(columns, self.arrays["x"][:n], casting="unsafe")
+        np.copyto(rows, self.arrays["y"][:n], casting="unsafe")
+        # Only particles the whole texture fits around (edge ones vanish a pixel or two early)
+        inside = np.greater_equal(columns, 0, out=self.mask[:n])
+        inside &= np.less_equal(columns, width - self.width, out=self.bounds[:n])
+        inside &= np.greater_equal(rows, 0, out=self.bounds[:n])
+        inside &= np.less_equal(rows, height - self.height, out=self.bounds[:n])
+        visible = int(np.count_nonzero(inside))
+        if not visible:
+            return None
+        columns = np.compress(inside, columns, out=self.visible_columns[:visible])
+        rows = np.compress(inside, rows, out=self.visible_rows[:visible])
+
+        try:
+            pixels = pygame.surfarray.pixels2d(surface)
+        except ValueError:
+            # 24-bit and other surfaces that can't be referenced as integers
+            self.blit(surface, columns, rows)
+        else:
+            # Row-major pixel buffer (pixels2d is indexed [x, y]): one index per particle, then offsets
+            pitch = pixels.strides[1] // pixels.itemsize
+            flat = np.lib.stride_tricks.as_strided(pixels, shape=(pitch * (height - 1) + width,),
+                                                   strides=(pixels.itemsize,))
+            index = np.multiply(rows, pitch, out=self.index[:visible])
+            index += columns
+            target = self.target[:visible]
+            for dx, dy, color in self.mapped_texture(surface):
+                flat[np.add(index, dy * pitch + dx, out=target)] = color
+            del pixels, flat  # Unlocks the surface
+        left = int(columns.min())
+        top = int(rows.min())
+        return pygame.Rect(left, top, int(columns.max()) - left + self.width, int(rows.max()) - top + self.height)
+
+    def mapped_texture(self, surface):
+        """Texture pixels with their colors in the surface's pixel format"""
+        key = (surface.get_bitsize(), surface.get_masks(), surface.get_shifts())
+        if self.mapped is None or self.mapped[0] != key:
+            self.mapped = (key, [(dx, dy, surface.map_rgb(color)) for dx, dy, color in self.texture])
+        return self.mapped[1]
+
+    def blit(self, surface, columns, rows):
+        if self.sprite is None:
+            self.sprite = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            for dx, dy, color in self.texture:
+                self.sprite.set_at((dx, dy), color)
+        surface.blits(zip(repeat(self.sprite), zip(columns.tolist(), rows.tolist())), doreturn=False)
+
+
+class ParticleEngine:
+    """Every effect's particle pools; cosmetic only, with its own random generator"""
+
+    def __init__(self, seed=None, capacity=POOL_CAPACITY):
+        self.rng = np.random.default_rng(seed)
+        self.pools = {name: ParticlePool(texture, gravity, drag, capacity)
+                      for name, (texture, gravity, drag) in POOLS.items()}
+
+    def __len__(self):
+        return sum(pool.count for pool in self.pools.values())
+
+    def emit(self, pool, count, x, y, speed, direction=0, spread=360, life=(20, 40)):
+        return self.pools[pool].emit(self.rng, count, x, y, speed, direction, spread, life)
+
+    def burst(self, effect, x, y, scale=1):
+        """Emit one of the EFFECTS at (x, y), scale times its usual particle count"""
+        settings = dict(EFFECTS[effect])
+        settings["count"] = int(settings["count"] * scale)
+        return self.emit(x=x, y=y, **settings)
+
+    def step(self):
+        for pool in self.pools.values():
+            pool.step()
+
+    def draw(self, surface):
+        """Draw every pool; returns Rects around what was drawn (one per non-empty pool)"""
+        rects = []
+        for pool in self.pools.values():
+            rect = pool.draw(surface)
+            if rect is not None:
+                rects.append(rect)
+        return rects
+
+    def clear(self):
+        for pool in self.pools.values():
+            pool.count = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the particle engine with many live particles")
+    parser.add_argument("--count", type=int, default=20000, help="live particles to keep on screen")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    engine = ParticleEngine(seed=0, capacity=args.count)
+    rng = np.random.default_rng(1)
+    step_times = []
+    draw_times = []
+    for _ in range(args.frames):
+        # Keep the pools topped up with bursts all over the screen
+        while len(engine) < args.count:
+            effect = ("exhaust", "score", "explosion")[int(rng.integers(3))]
+            engine.burst(effect, rng.uniform(100, SCREEN_WIDTH - 100), rng.uniform(100, SCREEN_HEIGHT - 100))
+        screen.fill((0, 0, 0))
+        start = time.perf_counter()
+        engine.step()
+        stepped = time.perf_counter()
+        engine.draw(screen)
+        drawn = time.perf_counter()
+        step_times.append(stepped - start)
+        draw_times.append(drawn - stepped)
+        pygame.display.flip()
+    step_times.sort()
+    draw_times.sort()
+    middle = len(step_times) // 2
+    print(f"{args.count:,} particles: step {step_times[middle] * 1000:.2f} ms, draw {draw_times[middle] * 1000:.2f} ms "
+          f"per frame (median of {args.frames})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Resolution-independent output: the game draws at 800x600 and the GPU scales it to the screen.
+
+Presenter opens a pygame.SCALED display, so the display Surface the game draws
+on stays SCREEN_WIDTH x SCREEN_HEIGHT whatever the window or monitor size, and
+then presents it itself through the display's SDL renderer. Each frame is
+uploaded to a streaming texture (only the changed regions when the game passes
+them) and copied into a viewport on the renderer, so scaling costs the CPU
+nothing. It also lets the viewport be chosen:
+
+    fit      the largest size with the game's aspect ratio (uneven pixels)
+    integer  the largest whole multiple (sharp pixels, wider borders)
+
+The borders show a backdrop, the game's background scaled to cover the output.
+It is scaled once per output resolution (and can be, off the main thread, by
+backdrop_image) and uploaded as a static texture, so it costs nothing per frame
+either. Only the current size is kept, and while a window is being resized the
+previous backdrop is stretched over the borders until the size has settled for
+RESIZE_SETTLE seconds, so a drag rescales it once rather than on every step.
+
+    python presenter.py     # present cost at 800x600, 1080p and 4K against software scaling
+"""
+import argparse
+import time
+
+import pygame
+from pygame._sdl2.video import Renderer, Texture, Window
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT
+
+SCALE_MODES = ["fit", "integer"]
+BACKDROP_TINT = (90, 90, 90)  # Multiplied into the backdrop so the borders read as borders
+RESIZE_SETTLE = 0.25  # Seconds without a resize before the backdrop is rescaled to the new size
+BENCHMARK_SIZES = [(800, 600), (1920, 1080), (3840, 2160)]
+
+
+def viewport(logical, output, scale_mode="fit"):
+    """Rect of the output that shows the logical frame, centred"""
+    scale = min(output[0] / logical[0], output[1] / logical[1])
+    if scale_mode == "integer":
+        scale = max(int(scale), 1)
+    width = round(logical[0] * scale)
+    height = round(logical[1] * scale)
+    return pygame.Rect((output[0] - width) // 2, (output[1] - height) // 2, width, height)
+
+
+def parse_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def cover(surface, size):
+    """surface smooth-scaled to cover size (keeping its aspect ratio), cropped around its centre"""
+    scale = max(size[0] / surface.get_width(), size[1] / surface.get_height())
+    scaled = pygame.transform.smoothscale(surface, (max(round(surface.get_width() * scale), size[0]),
+                                                    max(round(surface.get_height() * scale), size[1])))
+    crop = pygame.Rect((0, 0), size)
+    crop.center = scaled.get_rect().center
+    return scaled.subsurface(crop).copy()
+
+
+class Presenter:
+    """A SCALED display the game draws on at its logical size, shown through the display's renderer"""
+
+    def __init__(self, window_size=None, fullscreen=False, scale_mode="fit", vsync=False,
+                 logical_size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.logical_size = logical_size
+        self.scale_mode = scale_mode
+        flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else pygame.RESIZABLE)
+        self.vsync = vsync
+        try:
+            self.screen = pygame.display.set_mode(logical_size, flags, vsync=int(vsync))
+        except pygame.error:
+            # No vsync on this driver
+            self.vsync = False
+            self.screen = pygame.display.set_mode(logical_size, flags)
+        self.window = Window.from_display_module()
+        if window_size is not None and not fullscreen:
+            self.window.size = window_size
+        self.renderer = Renderer.from_window(self.window)
+        self.frame = Texture(self.renderer, logical_size, streaming=True)
+        self.backdrop_cache = (None, None)  # ((name, output size), scaled backdrop Surface), the latest only
+        self.backdrop_source = None
+        self.backdrop = None
+        self.backdrop_due = None  # When to rescale the backdrop after a resize
+        self.resize()
+
+    def resize(self, size=None, settle=0.0):
+        """Lay out the frame for a new output size (by default the window's, after it was resized)
+
+        The backdrop is rescaled once no other resize came for settle seconds.
+        """
+        self.output_size = tuple(size or self.window.size)
+        # Renderer coordinates in output pixels: the viewport does the scaling
+        self.renderer.logical_size = self.output_size
+        self.viewport = viewport(self.logical_size, self.output_size, self.scale_mode)
+        self.scale = self.viewport.width / self.logical_size[0]
+        if self.backdrop_source is not None:
+            self.backdrop_due = time.perf_counter() + settle
+            if not settle:
+                self.set_backdrop(*self.backdrop_source)
+
+    def backdrop_image(self, name, surface, size):
+        """surface scaled to cover size and dimmed, kept for the latest (name, size); safe off the main thread"""
+        key = (name, tuple(size))
+        cached_key, image = self.backdrop_cache
+        if cached_key != key:
+            image = cover(surface, key[1])
+            image.fill(BACKDROP_TINT, special_flags=pygame.BLEND_MULT)
+            self.backdrop_cache = (key, image)
+        return image
+
+    def set_backdrop(self, name, surface):
+        """Show surface, scaled to cover the output and dimmed, around the frame"""
+        self.backdrop_source = (name, surface)
+        self.backdrop_due = None
+        if self.viewport.size == self.output_size:
+            self.backdrop = None
+        else:
+            self.backdrop = Texture.from_surface(self.renderer, self.backdrop_image(name, surface, self.output_size))
+
+    def present(self, changed=None):
+        """Upload the frame (only the changed rects if given) and show it; returns pixels uploaded"""
+        screen = self.screen
+        if changed is None:
+            self.frame.update(screen)
+            uploaded = self.logical_size[0] * self.logical_size[1]
+        else:
+            uploaded = 0
+            bounds = screen.get_rect()
+            for rect in changed:
+                rect = bounds.clip(rect)
+                if rect.width and rect.height:
+                    self.frame.update(screen.subsurface(rect), rect)
+                    uploaded += rect.width * rect.height
+        if self.backdrop_due is not None and time.perf_counter() >= self.backdrop_due:
+            self.set_backdrop(*self.backdrop_source)
+        renderer = self.renderer
+        renderer.draw_color = (0, 0, 0, 255)
+        renderer.clear()
+        if self.backdrop is not None:
+            renderer.blit(self.backdrop)
+        renderer.blit(self.frame, self.viewport)
+        renderer.present()
+        return uploaded
+
+    def to_logical(self, position):
+        """Map a window position (a mouse event's, say) to the game's coordinates"""
+        return (int((position[0] - self.viewport.x) / self.scale),
+                int((position[1] - self.viewport.y) / self.scale))
+
+
+def software_scaled(frame, window, rect, scaled):
+    """The per-frame alternative: scale the whole frame on the CPU into the window surface"""
+    pygame.transform.smoothscale(frame, rect.size, scaled)
+    window.blit(scaled, rect)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of presenting the 800x600 frame at several output sizes")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=BENCHMARK_SIZES, metavar="WxH")
+    parser.add_argument("--scale", choices=SCALE_MODES, default="fit")
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    background = pygame.image.load("Background.png")
+    for size in args.sizes:
+        presenter = Presenter(size, scale_mode=args.scale)
+        presenter.screen.blit(pygame.transform.smoothscale(background.convert(), presenter.logical_size), (0, 0))
+        start = time.perf_counter()
+        presenter.set_backdrop("background", background)
+        backdrop_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            presenter.present()
+        full = (time.perf_counter() - start) / args.frames
+        dirty = [pygame.Rect(100, 300, 60, 60), pygame.Rect(400, 200, 200, 120), pygame.Rect(10, 10, 120, 30)]
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            presenter.present(dirty)
+        partial = (time.perf_counter() - start) / args.frames
+
+        # Software scaling into a window-sized surface, for comparison
+        window = pygame.Surface(size).convert()
+        rect = presenter.viewport
+        scaled = pygame.Surface(rect.size).convert()
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            software_scaled(presenter.screen, window, rect, scaled)
+        software = (time.perf_counter() - start) / args.frames
+
+        print(f"{size[0]}x{size[1]} ({args.scale}, frame at {rect.width}x{rect.height}): "
+              f"present {full * 1000:.2f} ms, with dirty rects {partial * 1000:.2f} ms; "
+              f"software smoothscale {software * 1000:.2f} ms; backdrop built once in {backdrop_seconds * 1000:.1f} ms")
+        # A SCALED display can't be set again while textures of its renderer are alive
+        del presenter
+        pygame.display.quit()
+        pygame.display.init()
+    print(f"Renderer: {pygame.display.get_driver()} video driver")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Per-phase frame profiler: ring buffer of timed spans, an on-screen graph and Chrome traces.
+
+Game.run laps through its top-level phases (waiting on the clock, event polling,
+simulation ticks, drawing) and a few hot calls inside them are timed as nested
+spans. Nothing is recorded unless a FrameProfiler is attached, so a disabled
+profiler costs one None check per phase.
+
+Traces open in chrome://tracing or https://ui.perfetto.dev.
+"""
+import json
+import time
+from collections import deque
+
+PROFILE_FRAMES = 3600  # One minute of frames at 60 FPS
+SPIKE_FACTOR = 2.0  # Frames taking this many times the median are spikes
+OVERLAY_REFRESH = 30  # Frames between recomputing the overlay's statistics
+GRAPH_WIDTH = 240  # One pixel column per frame
+GRAPH_HEIGHT = 60
+GRAPH_SCALE_MS = 50.0  # Frame time at the top of the graph
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class FrameProfiler:
+    """Records (phase, start, duration) spans for each frame into a bounded ring buffer"""
+
+    def __init__(self, capacity=PROFILE_FRAMES, frame_budget=1.0 / 60):
+        self.frames = deque(maxlen=capacity)  # (start, duration, spans), oldest first
+        self.frame_budget = frame_budget
+        self.frame_start = None
+        self.lap_start = None
+        self.spans = []
+        self.clock = time.perf_counter
+        self.overlay_visible = False
+        self.overlay_lines = []
+        self.frames_since_refresh = OVERLAY_REFRESH
+        self.spike_threshold = frame_budget * SPIKE_FACTOR
+
+    def begin_frame(self):
+        """Close the previous frame and start timing a new one"""
+        now = self.clock()
+        if self.frame_start is not None:
+            self.frames.append((self.frame_start, now - self.frame_start, self.spans))
+        self.frame_start = now
+        self.lap_start = now
+        self.spans = []
+
+    def lap(self, name):
+        """Record the time since the last lap (or the frame start) as a top-level phase"""
+        now = self.clock()
+        self.spans.append((name, self.lap_start, now - self.lap_start))
+        self.lap_start = now
+
+    def record(self, name, start):
+        """Record a nested span that started at `start` (a value from self.clock())"""
+        self.spans.append((name, start, self.clock() - start))
+
+    def frame_times(self):
+        return [duration for _, duration, _ in self.frames]
+
+    def phase_totals(self):
+        """Mean seconds per frame spent in each phase over the buffered frames"""
+        totals = {}
+        for _, _, spans in self.frames:
+            for name, _, duration in spans:
+                totals[name] = totals.get(name, 0.0) + duration
+        count = max(len(self.frames), 1)
+        return {name: total / count for name, total in totals.items()}
+
+    def summary(self):
+        """Frame-time percentiles, spike count and per-phase means, in milliseconds"""
+        times = sorted(self.frame_times())
+        p50 = percentile(times, 0.5)
+        self.spike_threshold = max(p50 * SPIKE_FACTOR, self.frame_budget * 1.5)
+        return {
+            "frames": len(times),
+            "p50_ms": p50 * 1000,
+            "p99_ms": percentile(times, 0.99) * 1000,
+            "max_ms": (times[-1] if times else 0.0) * 1000,
+            "spikes": sum(1 for duration in times if duration > self.spike_threshold),
+            "phases_ms": {name: mean * 1000 for name, mean in self.phase_totals().items()},
+        }
+
+    def report(self):
+        stats = self.summary()
+        phases = ", ".join(f"{name} {ms:.2f}" for name, ms in stats["phases_ms"].items())
+        return (f"Profiler: {stats['frames']} frames, p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, "
+                f"max {stats['max_ms']:.2f} ms, {stats['spikes']} spikes\n  mean ms/frame: {phases}")
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.frames_since_refresh = OVERLAY_REFRESH
+
+    def draw_overlay(self, surface, render_text, position=(10, 70)):
+        """Draw the frame-time graph and stats; returns the rect covered
+
+        render_text(text) must return a text surface (the game passes its text cache).
+        """
+        import pygame
+
+        # Statistics only change every few frames, which keeps the text cache warm
+        self.frames_since_refresh += 1
+        if self.frames_since_refresh >= OVERLAY_REFRESH:
+            self.frames_since_refresh = 0
+            stats = self.summary()
+            phases = sorted(stats["phases_ms"].items(), key=lambda item: -item[1])[:4]
+            self.overlay_lines = [
+                f"p50 {stats['p50_ms']:.1f} ms  p99 {stats['p99_ms']:.1f} ms  spikes {stats['spikes']}",
+                "  ".join(f"{name} {ms:.1f}" for name, ms in phases),
+            ]
+
+        x, y = position
+        line_height = 18
+        panel = pygame.Rect(x, y, GRAPH_WIDTH + 10, GRAPH_HEIGHT + 10 + line_height * len(self.overlay_lines))
+        surface.fill((0, 0, 0), panel)
+
+        # One column per recent frame; spikes in red, a line at the frame budget
+        bottom = y + 5 + GRAPH_HEIGHT
+        pixels_per_second = GRAPH_HEIGHT / (GRAPH_SCALE_MS / 1000)
+        recent = list(self.frames)[-GRAPH_WIDTH:]
+        for column, (_, duration, _) in enumerate(recent):
+            height = min(int(duration * pixels_per_second), GRAPH_HEIGHT)
+            color = (230, 60, 60) if duration > self.spike_threshold else (80, 200, 120)
+            left = x + 5 + column
+            pygame.draw.line(surface, color, (left, bottom), (left, bottom - height))
+            if duration > self.spike_threshold:
+                pygame.draw.line(surface, (230, 60, 60), (left, y + 5), (left, y + 8))
+        budget_y = bottom - int(self.frame_budget * pixels_per_second)
+        pygame.draw.line(surface, (200, 200, 200), (x + 5, budget_y), (x + 5 + GRAPH_WIDTH, budget_y))
+
+        for index, line in enumerate(self.overlay_lines):
+            surface.blit(render_text(line), (x + 5, bottom + 5 + index * line_height))
+        return panel
+
+    def trace_events(self):
+        """Buffered frames as Chrome trace-event dicts (timestamps in microseconds)"""
+        if not self.frames:
+            return []
+        origin = self.frames[0][0]
+        events = []
+        for index, (start, duration, spans) in enumerate(self.frames):
+            events.append({"name": "frame", "cat": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": (start - origin) * 1e6, "dur": duration * 1e6, "args": {"frame": index}})
+            if duration > self.spike_threshold:
+                events.append({"name": "spike", "cat": "frame", "ph": "i", "s": "t", "pid": 1, "tid": 1,
+                               "ts": (start - origin) * 1e6, "args": {"ms": duration * 1000}})
+            for name, span_start, span_duration in spans:
+                events.append({"name": name, "cat": "phase", "ph": "X", "pid": 1, "tid": 1,
+                               "ts": (span_start - origin) * 1e6, "dur": span_duration * 1e6})
+        return events
+
+    def write_trace(self, path):
+        self.summary()  # Refresh the spike threshold
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,207 @@
+"""Compact input replays: record a session's seed and inputs, re-run them headlessly.
+
+File layout (all integers are unsigned LEB128 varints):
+
+    b"FCRP" magic, format version
+    rule flags (version 2+): bit 0 = swept collisions, bit 1 = pixel collisions
+    seed
+    event count, then one varint per event: (ticks since previous event << 2) | flags
+        flags bit 0 = jump, bit 1 = pause toggle
+    final tick, final score, collision tick (0 if the session ended without one)
+
+A typical minute of play is a few hundred bytes.
+"""
+import argparse
+import io
+import os
+import time
+
+from simulation import World
+
+MAGIC = b"FCRP"
+VERSION = 2  # Version 1 replays predate swept collisions and have no rule flags
+
+JUMP = 1
+TOGGLE_PAUSE = 2
+
+# Rule flags
+SWEPT_COLLISIONS = 1
+PIXEL_COLLISIONS = 2
+KNOWN_RULES = SWEPT_COLLISIONS | PIXEL_COLLISIONS
+
+
+class ReplayError(Exception):
+    """Raised for files that aren't replays or use an unknown format version"""
+
+
+def write_varint(stream, value):
+    if value < 0:
+        # The shift below would never reach 0
+        raise ValueError(f"varints are unsigned, got {value}")
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            stream.write(bytes((byte | 0x80,)))
+        else:
+            stream.write(bytes((byte,)))
+            return
+
+
+def read_varint(stream):
+    value = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise ReplayError("replay is truncated")
+        value |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            return value
+        shift += 7
+
+
+class Replay:
+    """A recorded session: seed, tick-indexed input events and the result it reached"""
+
+    def __init__(self, seed, events=None, final_tick=0, score=0, collision_tick=None, rules=SWEPT_COLLISIONS):
+        self.seed = seed
+        self.rules = rules
+        self.events = events if events is not None else []  # (tick, flags) in tick order
+        self.final_tick = final_tick
+        self.score = score
+        self.collision_tick = collision_tick
+
+    def to_bytes(self):
+        stream = io.BytesIO()
+        stream.write(MAGIC)
+        write_varint(stream, VERSION)
+        write_varint(stream, self.rules)
+        write_varint(stream, self.seed)
+        write_varint(stream, len(self.events))
+        previous_tick = 0
+        for tick, flags in self.events:
+            write_varint(stream, ((tick - previous_tick) << 2) | flags)
+            previous_tick = tick
+        write_varint(stream, self.final_tick)
+        write_varint(stream, self.score)
+        write_varint(stream, self.collision_tick or 0)
+        return stream.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        stream = io.BytesIO(data)
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ReplayError("not a Flappy Chess replay")
+        version = read_varint(stream)
+        if version not in (1, VERSION):
+            raise ReplayError(f"unsupported replay version {version}")
+        rules = read_varint(stream) if version >= 2 else 0
+        seed = read_varint(stream)
+        events = []
+        tick = 0
+        for _ in range(read_varint(stream)):
+            value = read_varint(stream)
+            tick += value >> 2
+            events.append((tick, value & 3))
+        final_tick = read_varint(stream)
+        score = read_varint(stream)
+        collision_tick = read_varint(stream) or None
+        return cls(seed, events, final_tick, score, collision_tick, rules)
+
+    def matches(self, world):
+        """True if a re-run world ended where this recording did"""
+        return (world.tick == self.final_tick and world.score == self.score and
+                world.collision_tick == self.collision_tick)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """Collects the inputs fed to a World so the session can be replayed"""
+
+    def __init__(self, world):
+        self.world = world
+        rules = ((SWEPT_COLLISIONS if world.swept else 0) |
+                 (PIXEL_COLLISIONS if world.narrowphase is not None else 0))
+        self.replay = Replay(world.seed, rules=rules)
+
+    def record(self, jump, toggle_pause):
+        """Log the inputs for the tick the world is about to step"""
+        flags = (JUMP if jump else 0) | (TOGGLE_PAUSE if toggle_pause else 0)
+        if flags:
+            self.replay.events.append((self.world.tick + 1, flags))
+
+    def finish(self):
+        """Stamp the result the world reached and return the replay"""
+        self.replay.final_tick = self.world.tick
+        self.replay.score = self.world.score
+        self.replay.collision_tick = self.world.collision_tick
+        return self.replay
+
+
+def play_replay(replay, narrowphase=None):
+    """Re-run a replay headlessly as fast as possible and return the resulting World
+
+    narrowphase is used if the replay has pixel collisions (pass one in to reuse
+    its masks across replays); otherwise a fresh MaskNarrowphase is built.
+    """
+    if not replay.rules & PIXEL_COLLISIONS:
+        narrowphase = None
+    elif narrowphase is None:
+        # Needs pygame to build the sprite masks, but no display
+        from collision import MaskNarrowphase
+        narrowphase = MaskNarrowphase()
+    world = World(replay.seed, swept=bool(replay.rules & SWEPT_COLLISIONS), narrowphase=narrowphase)
+    events = iter(replay.events)
+    next_event = next(events, None)
+    while world.tick < replay.final_tick and not world.game_over:
+        flags = 0
+        if next_event is not None and next_event[0] == world.tick + 1:
+            flags = next_event[1]
+            next_event = next(events, None)
+        world.step(bool(flags & JUMP), bool(flags & TOGGLE_PAUSE))
+    return world
+
+
+def verify_replay(replay):
+    """True if re-running the replay reaches the recorded score and collision tick"""
+    return replay.matches(play_replay(replay))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run Flappy Chess replays headlessly and check their results")
+    parser.add_argument("paths", nargs="+", help="replay files or directories of .fcr files")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".fcr"))
+        else:
+            paths.append(path)
+
+    failures = 0
+    for path in paths:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        world = play_replay(replay)
+        elapsed = time.perf_counter() - start
+        ok = replay.matches(world)
+        failures += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {path}: seed {replay.seed}, score {world.score} "
+              f"(recorded {replay.score}), collision tick {world.collision_tick} "
+              f"(recorded {replay.collision_tick}), {world.tick / max(elapsed, 1e-9):,.0f} ticks/s")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
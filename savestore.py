@@ -0,0 +1,331 @@
+"""Local save data (coins, shop purchases, high score) kept in a journal plus a snapshot.
+
+Every change is applied to the in-memory data at once and handed to a writer
+thread, which appends it to an append-only journal and fsyncs, taking whatever
+else was queued meanwhile along in the same write. The game thread never touches
+the disk, so banking coins at game over costs it a queue put. Every COMPACT_EVERY
+entries (and when the store is closed) the writer folds the journal into a
+snapshot, written beside the old one and swapped in atomically, and empties the
+journal.
+
+Recovery loads the snapshot and replays the journal entries newer than it; a
+torn last line (the process died mid-write) is cut off. The keys mirror the web
+build's localStorage ones.
+
+    python savestore.py --entries 20000    # writes per second and recovery time
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+SAVE_DIR = "save"
+SNAPSHOT_NAME = "snapshot.json"
+JOURNAL_NAME = "journal.log"
+SAVE_VERSION = 1
+COMPACT_EVERY = 1000  # Journal entries between snapshots
+COMPACT_SECONDS = 30.0  # A quiet writer folds a non-empty journal after this long
+
+DEFAULTS = {
+    "coins": 0,
+    "high_score": 0,
+    "purchased_skins": [],
+    "purchased_backgrounds": [],
+    "selected_skin": "default",
+    "selected_background": "default",
+    "unlocked_rare_skins": [],
+    "player_name": "",
+    "music_enabled": True,
+}
+
+
+def default_data():
+    return {key: list(value) if isinstance(value, list) else value for key, value in DEFAULTS.items()}
+
+
+SAVE_OPERATIONS = ("set", "add", "add_item")
+
+
+def apply_entry(data, op, key, value):
+    """Apply one journal entry: set a value, add to a number or add an item to a list"""
+    if op == "set":
+        data[key] = list(value) if isinstance(value, list) else value
+    elif op == "add":
+        data[key] = data.get(key, 0) + value
+    elif op == "add_item":
+        items = data.setdefault(key, [])
+        if value not in items:
+            items.append(value)
+    else:
+        raise ValueError(f"unknown save operation {op!r}")
+
+
+def fsync_directory(directory):
+    """Make a rename in the directory durable (not possible on every platform)"""
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class SaveStore:
+    """The player's save data; reads come from memory and writes go to disk on a background thread"""
+
+    def __init__(self, directory=SAVE_DIR, compact_every=COMPACT_EVERY):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.compact_every = compact_every
+        self.seq = 0  # Sequence number of the latest entry
+
+        start = time.perf_counter()
+        self.data = default_data()
+        self.journal_entries = self.recover()
+        self.recovered_entries = self.journal_entries
+        self.recovery_seconds = time.perf_counter() - start
+
+        # Writer thread state: its own copy of the data (as of the last entry it wrote) for snapshots
+        self.written_data = json.loads(json.dumps(self.data))
+        self.written_seq = self.seq
+        self.pending = queue.Queue()
+        self.thread = None
+        self.journal = None
+        self.error = None  # The last write failure, if any (the game keeps running on memory)
+        self.writes = 0
+        self.batches = 0
+        self.compactions = 0
+
+    def recover(self):
+        """Load the snapshot and replay the journal after it; returns the journal entries replayed"""
+        snapshot_seq = 0
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            self.data.update(snapshot["data"])
+            snapshot_seq = snapshot["seq"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Ignoring unreadable save snapshot {self.snapshot_path}: {error}")
+        self.seq = self.snapshot_seq = snapshot_seq
+
+        try:
+            with open(self.journal_path, "rb") as f:
+                journal = f.read()
+        except FileNotFoundError:
+            return 0
+        replayed = 0
+        good_end = 0
+        for line in journal.splitlines(keepends=True):
+            try:
+                # A torn line can still parse, as a number or null (TypeError) or a list of another length
+                seq, op, key, value = json.loads(line)
+                if not line.endswith(b"\n"):
+                    raise ValueError("unterminated entry")
+                if type(seq) is not int:
+                    raise ValueError(f"bad sequence number {seq!r}")
+                if op not in SAVE_OPERATIONS:
+                    raise ValueError(f"unknown save operation {op!r}")
+                # Entries the snapshot already holds (compaction stopped before emptying the journal)
+                if seq > snapshot_seq:
+                    # Fails before changing anything when the entry doesn't fit the data (adding text to coins)
+                    apply_entry(self.data, op, key, value)
+                    self.seq = seq
+                    replayed += 1
+            except (ValueError, TypeError) as error:
+                # Torn write at the tail: everything from here on is lost
+                if line.endswith(b"\n"):
+                    print(f"Ignoring the rest of the save journal {self.journal_path} from a bad entry: {error}")
+                break
+            good_end += len(line)
+        if good_end < len(journal):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_end)
+        return replayed
+
+    # Reads
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    # Writes: applied now, persisted by the writer thread
+    def log(self, op, key, value):
+        apply_entry(self.data, op, key, value)
+        self.seq += 1
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.write_all, name="save-writer", daemon=True)
+            self.thread.start()
+        self.pending.put((self.seq, op, key, list(value) if isinstance(value, list) else value))
+
+    def set(self, key, value):
+        self.log("set", key, value)
+
+    def add(self, key, amount):
+        self.log("add", key, amount)
+
+    def add_item(self, key, item):
+        if item not in self.data.get(key, []):
+            self.log("add_item", key, item)
+
+    def record_score(self, score):
+        """Raise the high score; True if this was a new best"""
+        if score <= self.data["high_score"]:
+            return False
+        self.set("high_score", score)
+        return True
+
+    # Writer thread
+    def write_all(self):
+        while True:
+            try:
+                entry = self.pending.get(timeout=COMPACT_SECONDS)
+            except queue.Empty:
+                if self.journal_entries:
+                    self.try_compact()
+                continue
+            entries = [entry]
+            # Group commit: everything queued by now goes out with the same fsync
+            while True:
+                try:
+                    entries.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stop = entries[-1] is None
+            if stop:
+                entries.pop()
+            try:
+                if entries:
+                    self.write_entries(entries)
+                if stop or self.journal_entries >= self.compact_every:
+                    self.compact()
+            except OSError as error:
+                self.error = error
+            for _ in range(len(entries) + stop):
+                self.pending.task_done()
+            if stop:
+                return
+
+    def write_entries(self, entries):
+        if self.journal is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.journal = open(self.journal_path, "ab")
+        self.journal.write(b"".join(json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+                                    for entry in entries))
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        for seq, op, key, value in entries:
+            apply_entry(self.written_data, op, key, value)
+        self.written_seq = entries[-1][0]
+        self.journal_entries += len(entries)
+        self.writes += len(entries)
+        self.batches += 1
+
+    def try_compact(self):
+        try:
+            self.compact()
+        except OSError as error:
+            self.error = error
+
+    def compact(self):
+        """Write the data as of the last journal entry to a new snapshot, then empty the journal"""
+        if self.written_seq == self.snapshot_seq:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({"version": SAVE_VERSION, "seq": self.written_seq, "data": self.written_data}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+        fsync_directory(self.directory)
+        self.snapshot_seq = self.written_seq
+        # A crash before this truncate is harmless: recovery skips entries the snapshot holds
+        if self.journal is not None:
+            self.journal.truncate(0)
+            os.fsync(self.journal.fileno())
+        self.journal_entries = 0
+        self.compactions += 1
+
+    def flush(self):
+        """Block until every change so far is on disk"""
+        if self.thread is not None:
+            self.pending.join()
+
+    def close(self):
+        """Write everything out, fold it into the snapshot and stop the writer"""
+        if self.thread is not None:
+            self.pending.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the save store: writes per second and recovery time")
+    parser.add_argument("--entries", type=int, default=20000, help="changes to write")
+    parser.add_argument("--dir", help="save directory to use (default: a temporary one)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="flappy-save-")
+    try:
+        # No compaction during the run, so recovery has the whole journal to replay
+        store = SaveStore(directory, compact_every=args.entries + 1)
+        start = time.perf_counter()
+        for index in range(args.entries):
+            if index % 10 == 0:
+                store.add_item("purchased_skins", f"skin {index % 100}")
+            else:
+                store.add("coins", 1)
+        queued = time.perf_counter() - start
+        store.flush()
+        written = time.perf_counter() - start
+        print(f"{args.entries:,} changes: {queued / args.entries * 1e6:.2f} us each on the calling thread, "
+              f"{args.entries / written:,.0f} writes/s to disk ({store.batches:,} fsyncs)")
+
+        # One change at a time, each waited for: the rate when nothing can be grouped
+        count = min(args.entries, 500)
+        start = time.perf_counter()
+        for _ in range(count):
+            store.add("coins", 1)
+            store.flush()
+        committed = time.perf_counter() - start
+        print(f"{count} changes written one by one: {count / committed:,.0f} writes/s "
+              f"({committed / count * 1000:.2f} ms per fsync)")
+
+        # Simulate a crash: leave the journal as it is, with half an entry torn off the end
+        store.thread = None
+        store.journal.write(b'[999999999,"add","coins",')
+        store.journal.flush()
+        recovered = SaveStore(directory)
+        print(f"Recovered {recovered.recovered_entries:,} journal entries in {recovered.recovery_seconds * 1000:.1f} ms "
+              f"(coins {recovered['coins']:,}, {len(recovered['purchased_skins'])} skins)")
+        assert recovered["coins"] == store["coins"] and recovered.seq == store.seq
+
+        start = time.perf_counter()
+        recovered.set("high_score", 1)
+        recovered.close()
+        compacted = time.perf_counter() - start
+        reopened = SaveStore(directory)
+        print(f"Compacted into a snapshot in {compacted * 1000:.1f} ms; "
+              f"reopening it takes {reopened.recovery_seconds * 1000:.2f} ms")
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Authoritative game server: hosts headless Flappy Chess sessions and owns their scores.
+
+Clients only send jump inputs; the server steps every session's simulation.World
+itself, so the score it reports (and puts on the leaderboard) is the one the rules
+produced. One task ticks all sessions in a batch at TICK_RATE, and connections
+only queue inputs, so thousands of sessions share one event loop.
+
+The protocol is newline-delimited JSON over TCP. Client to server:
+
+    {"op": "start", "name": "Ada"}    start a session (ends any running one)
+    {"op": "jump", "seq": 12}         jump on the session's next tick
+    {"op": "leaderboard"}
+
+Server to client:
+
+    {"op": "started", "session": 7, "seed": 123, "tick_rate": 60}
+    {"op": "state", "tick": 240, "score": 3, "y": 301.5, "velocity": -2.0, "ack": 12}
+        every STATE_INTERVAL ticks, and on any tick that applied a jump (ack is the
+        seq of the last jump applied, -1 before the first)
+    {"op": "over", "tick": 512, "score": 9}
+    {"op": "leaderboard", "scores": [["Ada", 9, 123], ...]}
+    {"op": "error", "message": "..."}
+
+The seed is chosen by the server, so a client can predict its own session (the
+rules are deterministic) but cannot pick a favourable one.
+
+    python server.py --port 8765
+    python loadgen.py --clients 1000 --seconds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:
+    # Not on Windows, whose socket limit isn't a file-descriptor rlimit
+    resource = None
+
+from profiler import percentile
+from replay import ReplayRecorder
+from simulation import TICK_RATE, World, new_seed
+
+DEFAULT_PORT = 8765
+TICK_SECONDS = 1.0 / TICK_RATE
+STATE_INTERVAL = 6  # Ticks between unprompted state messages (10 per second)
+MAX_CATCH_UP_TICKS = 5  # Further behind than this, the server drops the backlog instead of racing
+LEADERBOARD_SIZE = 10
+MAX_LINE = 1024  # Longest client message accepted, in bytes
+WRITE_BUFFER_LIMIT = 256 * 1024  # Clients that stop reading are dropped once this much output is queued
+TICK_HISTORY = 600  # Server ticks kept for the duration percentiles
+REPORT_SECONDS = 5.0
+
+
+def player_name(name):
+    """Same rules as the web build: at most 20 letters, digits and spaces, Anonymous if empty"""
+    name = re.sub(r"[^a-zA-Z0-9\s]", "", str(name or "").strip()[:20])
+    return name or "Anonymous"
+
+
+class Session:
+    """One player's game: their world, the inputs waiting for the next tick and their connection"""
+
+    def __init__(self, session_id, name, writer, record):
+        self.session_id = session_id
+        self.name = name
+        self.writer = writer
+        self.world = World(new_seed())
+        self.recorder = ReplayRecorder(self.world) if record else None
+        self.jump_pending = False
+        self.last_seq = -1  # seq of the latest jump received
+        self.acked_seq = -1  # seq of the latest jump applied
+
+
+class GameServer:
+    """Accepts connections and steps every live session once per server tick"""
+
+    def __init__(self, max_sessions=10000, record_dir=None):
+        self.max_sessions = max_sessions
+        self.record_dir = record_dir
+        self.sessions = {}  # Session id -> Session, in start order
+        self.next_session_id = 1
+        self.leaderboard = []  # (score, name, seed), best first
+        self.running = True
+
+        # Metrics
+        self.connections = 0
+        self.peak_sessions = 0
+        self.sessions_started = 0
+        self.sessions_finished = 0
+        self.session_ticks = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self.bytes_out = 0
+        self.dropped_clients = 0
+        self.server_ticks = 0
+        self.skipped_ticks = 0  # Ticks dropped after falling too far behind
+        self.tick_durations = deque(maxlen=TICK_HISTORY)
+        self.tick_lateness = deque(maxlen=TICK_HISTORY)  # How long after its due time each tick started
+
+    def send(self, writer, line):
+        """Queue one message line; clients that stopped reading are disconnected"""
+        if writer.transport.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+            self.dropped_clients += 1
+            writer.transport.abort()
+            return
+        data = line.encode()
+        writer.write(data)
+        self.messages_out += 1
+        self.bytes_out += len(data)
+
+    def send_json(self, writer, message):
+        self.send(writer, json.dumps(message) + "\n")
+
+    async def handle_client(self, reader, writer):
+        self.connections += 1
+        session = None
+        try:
+            while self.running:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.messages_in += 1
+                try:
+                    message = json.loads(line)
+                    op = message["op"]
+                except (ValueError, KeyError, TypeError):
+                    self.send_json(writer, {"op": "error", "message": "expected a JSON object with an op"})
+                    continue
+
+                if op == "jump":
+                    if session is not None and session.session_id in self.sessions:
+                        seq = message.get("seq")
+                        session.jump_pending = True
+                        session.last_seq = seq if isinstance(seq, int) else session.last_seq + 1
+                elif op == "start":
+                    if session is not None:
+                        self.sessions.pop(session.session_id, None)
+                    session = self.start_session(message.get("name"), writer)
+                elif op == "leaderboard":
+                    scores = [[name, score, seed] for score, name, seed in self.leaderboard]
+                    self.send_json(writer, {"op": "leaderboard", "scores": scores})
+                else:
+                    self.send_json(writer, {"op": "error", "message": f"unknown op {op!r}"})
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if session is not None:
+                self.sessions.pop(session.session_id, None)
+            self.connections -= 1
+            writer.close()
+
+    def start_session(self, name, writer):
+        if len(self.sessions) >= self.max_sessions:
+            self.send_json(writer, {"op": "error", "message": "server full"})
+            return None
+        session = Session(self.next_session_id, player_name(name), writer, self.record_dir is not None)
+        self.next_session_id += 1
+        self.sessions[session.session_id] = session
+        self.sessions_started += 1
+        self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+        self.send_json(writer, {"op": "started", "session": session.session_id, "seed": session.world.seed,
+                                "tick_rate": TICK_RATE})
+        return session
+
+    def tick(self):
+        """Step every live session by one tick and send out their states"""
+        finished = []
+        send = self.send
+        for session in self.sessions.values():
+            world = session.world
+            jump = session.jump_pending
+            if jump:
+                session.jump_pending = False
+                session.acked_seq = session.last_seq
+            if session.recorder is not None:
+                session.recorder.record(jump, False)
+            world.step(jump)
+            if world.game_over:
+                finished.append(session)
+            elif jump or world.tick % STATE_INTERVAL == 0:
+                player = world.player
+                # Formatted by hand: this runs for every session several times a second
+                send(session.writer, f'{{"op": "state", "tick": {world.tick}, "score": {world.score}, '
+                                     f'"y": {player.y:.2f}, "velocity": {player.velocity:.2f}, '
+                                     f'"ack": {session.acked_seq}}}\n')
+        self.session_ticks += len(self.sessions)
+        for session in finished:
+            self.finish_session(session)
+
+    def finish_session(self, session):
+        world = session.world
+        del self.sessions[session.session_id]
+        self.sessions_finished += 1
+        self.send_json(session.writer, {"op": "over", "tick": world.tick, "score": world.score})
+        self.leaderboard.append((world.score, session.name, world.seed))
+        self.leaderboard.sort(key=lambda entry: -entry[0])
+        del self.leaderboard[LEADERBOARD_SIZE:]
+        if session.recorder is not None:
+            replay = session.recorder.finish()
+            os.makedirs(self.record_dir, exist_ok=True)
+            replay.save(os.path.join(self.record_dir, f"session-{session.session_id}-{replay.score}.fcr"))
+
+    async def tick_loop(self):
+        """Run tick() at TICK_RATE against the event loop's clock"""
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while self.running:
+            due += TICK_SECONDS
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Behind schedule: still let the connections run between ticks
+                await asyncio.sleep(0)
+                if -delay > MAX_CATCH_UP_TICKS * TICK_SECONDS:
+                    self.skipped_ticks += int(-delay / TICK_SECONDS)
+                    due = loop.time()
+            start = loop.time()
+            self.tick_lateness.append(max(start - due, 0.0))
+            self.tick()
+            self.server_ticks += 1
+            self.tick_durations.append(loop.time() - start)
+
+    def report(self, elapsed, previous):
+        """One line of metrics; previous is the (session ticks, messages out) at the last report"""
+        durations = sorted(self.tick_durations)
+        lateness = sorted(self.tick_lateness)
+        session_ticks, messages_out = previous
+        return (f"{len(self.sessions)} sessions (peak {self.peak_sessions}), {self.connections} connections | "
+                f"{(self.session_ticks - session_ticks) / elapsed:,.0f} session-ticks/s, "
+                f"{(self.messages_out - messages_out) / elapsed:,.0f} msgs/s out | "
+                f"tick p50 {percentile(durations, 0.5) * 1000:.2f} ms, p99 {percentile(durations, 0.99) * 1000:.2f} ms, "
+                f"late p99 {percentile(lateness, 0.99) * 1000:.2f} ms, {self.skipped_ticks} skipped | "
+                f"{self.sessions_finished} games finished, {self.dropped_clients} dropped")
+
+    async def report_loop(self, interval):
+        previous = (self.session_ticks, self.messages_out)
+        last = time.perf_counter()
+        while self.running:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            print(self.report(now - last, previous), flush=True)
+            previous = (self.session_ticks, self.messages_out)
+            last = now
+
+    async def serve(self, host, port, report_seconds=REPORT_SECONDS, duration=None):
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE, backlog=4096)
+        print(f"Serving Flappy Chess on {host}:{port} at {TICK_RATE} ticks/s", flush=True)
+        tasks = [asyncio.create_task(self.tick_loop())]
+        if report_seconds:
+            tasks.append(asyncio.create_task(self.report_loop(report_seconds)))
+        try:
+            async with server:
+                if duration is None:
+                    await server.serve_forever()
+                else:
+                    await asyncio.sleep(duration)
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+
+
+def raise_file_limit():
+    """Allow as many open sockets as the hard limit permits (each client is one)"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Authoritative Flappy Chess session server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--record", metavar="DIR", help="save a replay of every finished session to DIR")
+    parser.add_argument("--report", type=float, default=REPORT_SECONDS, help="seconds between metric lines (0: none)")
+    parser.add_argument("--seconds", type=float, help="stop after this long (default: run until interrupted)")
+    args = parser.parse_args()
+
+    raise_file_limit()
+    game_server = GameServer(args.max_sessions, args.record)
+    try:
+        asyncio.run(game_server.serve(args.host, args.port, args.report, args.seconds))
+    except KeyboardInterrupt:
+        pass
+    print(f"{game_server.sessions_started} sessions started, {game_server.sessions_finished} finished, "
+          f"{game_server.server_ticks} server ticks, {game_server.session_ticks:,} session ticks")
+    for score, name, seed in game_server.leaderboard:
+        print(f"  {score:4d}  {name} (seed {seed})")
+
+
+if __name__ == "__main__":
+    main()
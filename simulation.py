@@ -0,0 +1,656 @@
+"""Headless Flappy Chess rules: world state, stepping and collisions.
+
+Nothing in here touches pygame, so the game logic can run on a server with
+no video or audio device. flappy_chess.py draws this world and feeds it input.
+"""
+import argparse
+import random
+import time
+
+from collision import BROADPHASE_MIN_PIECES, UniformGrid, swept_collision
+
+# Constants (all speeds are in pixels per simulation tick)
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+FPS = 60
+TICK_RATE = FPS  # Simulation ticks per second, independent of the render rate
+GRAVITY = 0.5
+JUMP_STRENGTH = -8
+SCROLL_SPEED = 3
+
+# Chess piece variants (King is drawn larger than the other pieces)
+PIECE_COLORS = ['W', 'B']
+PIECE_TYPES = ["Pawn", "Rook", "Knight", "Bishop", "Queen", "King"]
+PIECE_SIZE = 50
+KING_SIZE = 70
+
+# Spawning and clean-up rules
+MAX_PIECES = 5  # Limit pieces on screen to prevent overcrowding
+SPAWN_DELAY = 90  # Frames between spawns (~1.5 seconds at 60 FPS for one piece every 1-2 seconds)
+MAX_PIECE_AGE = 600  # 10 seconds at 60 FPS
+
+# Difficulty curve: speed increases by SPEED_STEP for every 10 points, up to SPEED_CAP
+SPEED_STEP = 0.1
+SPEED_CAP = 2.0
+
+PLAYER_START_X = 100
+PLAYER_FRAME_COUNT = 4  # Frames in the 2x2 jetpack sprite sheet
+
+
+def new_seed():
+    """Fresh 64-bit seed for a session that wasn't given one"""
+    return random.getrandbits(64)
+
+
+def rects_collide(a, b):
+    """Same overlap test as pygame.Rect.colliderect for (x, y, w, h) tuples"""
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+class JetpackMan:
+    # Slots keep the state compact and make clone() a handful of attribute copies
+    __slots__ = ("x", "y", "velocity", "width", "height", "prev_y",
+                 "current_frame", "animation_timer", "animation_speed")
+    
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.velocity = 0
+        self.width = 60
+        self.height = 60
+        self.prev_y = y  # Position at the previous tick, for render interpolation
+        
+        self.current_frame = 0
+        self.animation_timer = 0
+        self.animation_speed = 8  # Frames per animation cycle
+        
+    def update(self):
+        self.prev_y = self.y
+        
+        # Apply gravity
+        self.velocity += GRAVITY
+        self.y += self.velocity
+        
+        # Keep player on screen
+        if self.y < 0:
+            self.y = 0
+            self.velocity = 0
+        if self.y > SCREEN_HEIGHT - self.height:
+            self.y = SCREEN_HEIGHT - self.height
+            self.velocity = 0
+        
+        # Animate
+        self.animation_timer += 1
+        if self.animation_timer >= self.animation_speed:
+            self.animation_timer = 0
+            self.current_frame = (self.current_frame + 1) % PLAYER_FRAME_COUNT
+    
+    def jump(self):
+        self.velocity = JUMP_STRENGTH
+    
+    def get_rect(self):
+        return (int(self.x), int(self.y), self.width, self.height)
+    
+    def get_prev_rect(self):
+        return (int(self.x), int(self.prev_y), self.width, self.height)
+    
+    def clone(self):
+        player = JetpackMan.__new__(JetpackMan)
+        player.x = self.x
+        player.y = self.y
+        player.velocity = self.velocity
+        player.width = self.width
+        player.height = self.height
+        player.prev_y = self.prev_y
+        player.current_frame = self.current_frame
+        player.animation_timer = self.animation_timer
+        player.animation_speed = self.animation_speed
+        return player
+
+
+# Movement patterns, as data. A new piece takes its speeds from its pattern and
+# the pattern's step function moves it every tick. Speeds are kept in the form
+# they were tuned in (a random base times factors applied in order, or a fixed
+# value) so every piece moves bit-for-bit as before and saved replays still match.
+SLOWER = 2/3  # Every piece type was slowed down by a third after the first playtests
+BASE_SPEED_RANGE = (3.5, 14.0)  # Pixels per tick; 850 px takes 1-4 seconds at 60 FPS (spawns are at 850 px)
+KNIGHT_SQUARE = 60  # Pixels per "square" of a Knight's L-move
+KNIGHT_VERTICAL_JUMP = 2 * KNIGHT_SQUARE
+KNIGHT_HORIZONTAL_JUMP = 1 * KNIGHT_SQUARE
+QUEEN_MODES = ['rook', 'bishop', 'knight', 'pawn']
+QUEEN_REROLL_CHANCE = 0.05  # Chance per tick that a Queen switches to a new random mode
+
+
+def bounce(piece):
+    """Reverse vertical direction at the top and bottom of the screen"""
+    if piece.y <= 0:
+        piece.y = 0
+        if piece.vertical_direction != 1:
+            piece.vertical_direction = 1  # Change to moving down
+            piece.step_speed = None
+    elif piece.y >= SCREEN_HEIGHT - piece.height:
+        piece.y = SCREEN_HEIGHT - piece.height
+        if piece.vertical_direction != -1:
+            piece.vertical_direction = -1  # Change to moving up
+            piece.step_speed = None
+
+
+def straight_move(piece, speed):
+    """Leftward at the horizontal speed plus up or down at the vertical speed"""
+    if speed != piece.step_speed:
+        # The per-tick velocity only changes with the speed multiplier or direction, so it is kept
+        piece.step_speed = speed
+        piece.velocity_x = piece.horizontal_speed * speed
+        piece.velocity_y = piece.vertical_speed * speed * piece.vertical_direction
+    piece.x -= piece.velocity_x
+    piece.y += piece.velocity_y
+
+
+def straight_step(piece, speed):
+    """Bookkeeping, straight_move and bounce in one call: this runs for most pieces every tick"""
+    if speed != piece.step_speed:
+        piece.step_speed = speed
+        piece.velocity_x = piece.horizontal_speed * speed
+        piece.velocity_y = piece.vertical_speed * speed * piece.vertical_direction
+    x = piece.x
+    y = piece.y
+    piece.prev_x = x
+    piece.prev_y = y
+    piece.spawn_age += 1
+    piece.x = x - piece.velocity_x
+    y += piece.velocity_y
+    if y <= 0:
+        piece.y = 0
+        if piece.vertical_direction != 1:
+            piece.vertical_direction = 1
+            piece.step_speed = None
+    elif y >= SCREEN_HEIGHT - piece.height:
+        piece.y = SCREEN_HEIGHT - piece.height
+        if piece.vertical_direction != -1:
+            piece.vertical_direction = -1
+            piece.step_speed = None
+    else:
+        piece.y = y
+
+
+def knight_target(piece):
+    """Aim the vertical leg of the next L-move 2 squares up or down, clamped to the screen"""
+    piece.knight_target_y = piece.y + (piece.vertical_jump * piece.vertical_direction)
+    if piece.knight_target_y < 0:
+        piece.knight_target_y = 0
+        return 1
+    if piece.knight_target_y > SCREEN_HEIGHT - piece.height:
+        piece.knight_target_y = SCREEN_HEIGHT - piece.height
+        return -1
+    return piece.vertical_direction
+
+
+def knight_move(piece, speed):
+    """L-shape movement in discrete jumps: 2 squares up or down, then 1 square left
+
+    Knights have no continuous leftward movement; the L-move's horizontal leg is the only one.
+    """
+    jump_speed = piece.knight_move_speed * speed
+    state = piece.knight_state
+    if state is None:
+        # First move: choose an initial vertical direction
+        state = piece.knight_state = "vertical"
+        piece.vertical_direction = piece.rng.choice([1, -1])
+        piece.vertical_direction = knight_target(piece)
+
+    if state == "vertical":
+        # Move toward the vertical target, then aim 1 square left
+        target = piece.knight_target_y
+        if abs(target - piece.y) > jump_speed:
+            if piece.y < target:
+                piece.y += jump_speed
+            else:
+                piece.y -= jump_speed
+        else:
+            piece.y = target
+            piece.knight_state = "horizontal"
+            piece.knight_target_x = piece.x - piece.horizontal_jump
+    else:
+        target = piece.knight_target_x
+        if abs(target - piece.x) > jump_speed:
+            if piece.x > target:
+                piece.x -= jump_speed
+        else:
+            # Landed: next vertical leg reverses at a boundary, otherwise goes a random way
+            piece.x = target
+            piece.knight_state = "vertical"
+            if piece.y <= 0:
+                piece.vertical_direction = 1  # Must go down
+            elif piece.y >= SCREEN_HEIGHT - piece.height:
+                piece.vertical_direction = -1  # Must go up
+            else:
+                piece.vertical_direction = piece.rng.choice([1, -1])
+            knight_target(piece)
+
+
+def knight_step(piece, speed):
+    piece.prev_x = piece.x
+    piece.prev_y = piece.y
+    piece.spawn_age += 1
+    knight_move(piece, speed)
+
+
+def queen_step(piece, speed):
+    """Move in the current mode, maybe switch mode, then bounce unless the new mode is the L-move"""
+    piece.prev_x = piece.x
+    piece.prev_y = piece.y
+    piece.spawn_age += 1
+    pattern = piece.pattern
+    if pattern.jump_speed is None:
+        straight_move(piece, speed)
+    else:
+        knight_move(piece, speed)
+    rng = piece.rng
+    if rng.random() < QUEEN_REROLL_CHANCE:
+        piece.queen_movement_type = rng.choice(QUEEN_MODES)
+        pattern = QUEEN_PATTERNS[piece.queen_movement_type]
+        piece.apply_pattern(pattern)
+    if pattern.jump_speed is None:
+        bounce(piece)
+
+
+class MovePattern:
+    """How one kind of piece moves: its speeds and size, and the step function that moves it
+    
+    step(piece, speed) advances a piece by one tick (previous position, age and
+    movement) at the given speed multiplier.
+    """
+    
+    def __init__(self, speed_factors=None, horizontal_speed=0, vertical_speed=0, jump_speed=None,
+                 size=PIECE_SIZE, queen=False):
+        self.speed_factors = speed_factors  # Horizontal speed: uniform(BASE_SPEED_RANGE) times each of these
+        self.horizontal_speed = horizontal_speed  # ...or this fixed speed when there are no factors
+        self.vertical_speed = vertical_speed
+        self.jump_speed = jump_speed  # L-move speed in pixels per tick; None moves in a straight line
+        self.size = size
+        if queen:
+            self.step = queen_step
+        elif jump_speed is not None:
+            self.step = knight_step
+        else:
+            self.step = straight_step
+            
+    def roll_horizontal_speed(self, rng):
+        if self.speed_factors is None:
+            return self.horizontal_speed
+        speed = rng.uniform(*BASE_SPEED_RANGE)
+        for factor in self.speed_factors:
+            speed *= factor
+        return speed
+
+
+PIECE_PATTERNS = {
+    # Only leftward movement
+    "Pawn": MovePattern((0.8, SLOWER)),
+    # Top to bottom in about 2 seconds ((600 - 50) px / 120 ticks = 4.6), half the usual leftward speed
+    "Rook": MovePattern((0.8, 0.5, SLOWER), vertical_speed=4.6 * SLOWER),
+    "Knight": MovePattern((0.8, SLOWER), jump_speed=8 * SLOWER),
+    # True 45-degree diagonal
+    "Bishop": MovePattern(horizontal_speed=5 * SLOWER, vertical_speed=5 * SLOWER),
+    # Slow and large
+    "King": MovePattern((0.8, 0.5, SLOWER), size=KING_SIZE),
+}
+DEFAULT_PATTERN = PIECE_PATTERNS["Pawn"]
+
+# A Queen moves like one of the other pieces, switching at random now and then.
+# Its first mode runs at the speeds from before the one-third slowdown; modes it
+# switches to later are slowed like the other pieces.
+QUEEN_START_PATTERNS = {
+    "rook": MovePattern((0.8, 0.5), vertical_speed=4.6, queen=True),
+    "bishop": MovePattern(horizontal_speed=5, vertical_speed=5, queen=True),
+    "knight": MovePattern((0.8,), jump_speed=8, queen=True),
+    "pawn": MovePattern((0.8,), queen=True),
+}
+QUEEN_PATTERNS = {
+    mode: MovePattern(base.speed_factors, base.horizontal_speed, base.vertical_speed, base.jump_speed, queen=True)
+    for mode, base in [("rook", PIECE_PATTERNS["Rook"]), ("bishop", PIECE_PATTERNS["Bishop"]),
+                       ("knight", PIECE_PATTERNS["Knight"]), ("pawn", PIECE_PATTERNS["Pawn"])]
+}
+
+
+class ChessPiece:
+    # State every piece has once __init__ finishes
+    STATE = ("piece_type", "rng", "x", "y", "prev_x", "prev_y", "spawn_index", "speed_scale",
+             "width", "height", "piece_color", "move_timer", "spawn_age",
+             "pattern", "step_speed", "velocity_x", "velocity_y",
+             "horizontal_speed", "vertical_speed", "diagonal_horizontal", "vertical_direction",
+             "knight_state", "knight_target_y", "knight_target_x", "knight_move_speed")
+    # Only set for Knights and Queens
+    OPTIONAL_STATE = ("square_size", "vertical_jump", "horizontal_jump", "queen_movement_type")
+    __slots__ = STATE + OPTIONAL_STATE
+    
+    def __init__(self, piece_type, x, y, rng=random):
+        self.piece_type = piece_type
+        self.rng = rng  # Random stream of the owning session
+        self.x = x
+        self.y = y
+        # Position at the previous tick, for render interpolation
+        self.prev_x = x
+        self.prev_y = y
+        self.spawn_index = 0  # Set by the world; keeps collision order stable
+        self.speed_scale = 1.0  # Per-type tuning factor, set by the world
+        
+        # Per-tick velocity at the speed multiplier step_speed (see straight_move)
+        self.step_speed = None
+        self.velocity_x = 0.0
+        self.velocity_y = 0.0
+        
+        # Pick the piece color (the renderer looks up the matching sprite)
+        color = self.rng.choice(PIECE_COLORS)
+        self.piece_color = color
+        
+        # Speeds and size from the piece type's movement pattern
+        self.setup_movement()
+        
+        # Initial movement state
+        self.move_timer = 0
+        self.spawn_age = 0  # Track how long piece has been on screen
+        
+        # Vertical movement direction (1 for down, -1 for up)
+        self.vertical_direction = self.rng.choice([1, -1])
+        
+        # For Knight: L-shape movement state (set up on the first update). The jump speed is
+        # reset too, which leaves new Knights (and Queens starting in knight mode) standing
+        # still; the tuning has been done with them that way
+        self.knight_state = None
+        self.knight_target_y = None
+        self.knight_target_x = None
+        self.knight_move_speed = 0
+        
+    def setup_movement(self):
+        """Setup movement speeds based on chess piece type"""
+        if self.piece_type == "Queen":
+            # Queen: randomly selects movement from any piece type
+            self.queen_movement_type = self.rng.choice(QUEEN_MODES)
+            self.apply_pattern(QUEEN_START_PATTERNS[self.queen_movement_type])
+        else:
+            self.apply_pattern(PIECE_PATTERNS.get(self.piece_type, DEFAULT_PATTERN))
+            
+    def apply_pattern(self, pattern):
+        """Switch to a movement pattern, rolling a new horizontal speed if it has a random one"""
+        self.pattern = pattern
+        self.step_speed = None
+        self.width = pattern.size
+        self.height = pattern.size
+        self.vertical_speed = pattern.vertical_speed
+        self.diagonal_horizontal = 0
+        if pattern.jump_speed is not None:
+            self.square_size = KNIGHT_SQUARE
+            self.vertical_jump = KNIGHT_VERTICAL_JUMP
+            self.horizontal_jump = KNIGHT_HORIZONTAL_JUMP
+            self.knight_state = None  # Starts on the next update
+            self.knight_target_y = None
+            self.knight_target_x = None
+            self.knight_move_speed = pattern.jump_speed
+        self.horizontal_speed = pattern.roll_horizontal_speed(self.rng)
+    
+    def update(self, speed_multiplier=1.0):
+        """Advance one tick: remember the previous position, age (for safety removal of stuck pieces) and move"""
+        # Apply speed multiplier (and this piece type's tuning scale) to all movement
+        self.pattern.step(self, speed_multiplier * self.speed_scale)
+    
+    def reuse(self, piece_type, x, y, rng):
+        """Make a retired piece into a new one, exactly as ChessPiece(piece_type, x, y, rng) would"""
+        for name in ChessPiece.OPTIONAL_STATE:
+            if getattr(self, name, None) is not None:
+                delattr(self, name)
+        self.__init__(piece_type, x, y, rng)
+    
+    def get_rect(self):
+        return self.hitbox_at(self.x, self.y)
+    
+    def get_prev_rect(self):
+        return self.hitbox_at(self.prev_x, self.prev_y)
+    
+    def clone(self, rng=None):
+        """Copy of this piece drawing from rng (default: the same stream object)"""
+        piece = ChessPiece.__new__(ChessPiece)
+        for name in ChessPiece.STATE:
+            setattr(piece, name, getattr(self, name))
+        for name in ChessPiece.OPTIONAL_STATE:
+            value = getattr(self, name, None)
+            if value is not None:
+                setattr(piece, name, value)
+        if rng is not None:
+            piece.rng = rng
+        return piece
+    
+    def hitbox_at(self, x, y):
+        # Make hitbox smaller (80% of original size, centered)
+        hitbox_width = int(self.width * 0.8)
+        hitbox_height = int(self.height * 0.8)
+        hitbox_x = x + (self.width - hitbox_width) // 2
+        hitbox_y = y + (self.height - hitbox_height) // 2
+        return (int(hitbox_x), int(hitbox_y), hitbox_width, hitbox_height)
+
+
+class World:
+    """One game session: the player, the chess pieces and the score"""
+    
+    def __init__(self, seed=None, spawn_delay=SPAWN_DELAY, max_pieces=MAX_PIECES, spawn_count=1, invincible=False,
+                 swept=True, narrowphase=None, speed_step=SPEED_STEP, speed_cap=SPEED_CAP, speed_scales=None):
+        # Every session owns its random stream, so the same seed and inputs replay the same game
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+        
+        self.player = JetpackMan(PLAYER_START_X, SCREEN_HEIGHT // 2)
+        self.chess_pieces = []
+        self.score = 0
+        self.game_over = False
+        self.paused = False
+        self.tick = 0
+        self.collision_tick = None
+        self.collided_piece = None
+        self.collisions = 0  # Counted even when invincible
+        self.invincible = invincible  # Keep playing through collisions (stress tests)
+        
+        # Collisions test hitboxes swept over the whole tick so fast pieces can't tunnel
+        # through the player; swept=False is the old end-of-tick overlap test
+        self.swept = swept
+        # Optional callable(player, piece, t) confirming a hitbox hit (e.g. pixel masks)
+        self.narrowphase = narrowphase
+        # Grid of nearby pieces, only worth keeping when many pieces are allowed
+        self.broadphase = UniformGrid() if max_pieces >= BROADPHASE_MIN_PIECES else None
+        self.spawned = 0
+        # Retired pieces, reused by the next spawns instead of allocating new ones
+        self.free_pieces = []
+        # Optional profiler.FrameProfiler timing the collision check (set by the game)
+        self.profiler = None
+        
+        # Spawn timer
+        self.spawn_timer = 0
+        self.spawn_delay = spawn_delay
+        self.max_pieces = max_pieces
+        self.spawn_count = spawn_count  # Pieces spawned each time the timer fires
+        
+        # Difficulty tuning (defaults are the shipped game)
+        self.speed_step = speed_step
+        self.speed_cap = speed_cap
+        self.speed_scales = speed_scales or {}  # Piece type -> speed factor
+    
+    def clone(self, rng=None):
+        """Independent copy of the session for lookahead (no surfaces, no replay, no shared pieces)
+        
+        By default the copy continues this session's random stream exactly; pass rng
+        to have it roll its own spawns and piece moves instead.
+        """
+        world = World.__new__(World)
+        world.__dict__.update(self.__dict__)
+        if rng is None:
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        world.rng = rng
+        world.profiler = None
+        world.player = self.player.clone()
+        world.chess_pieces = [piece.clone(rng) for piece in self.chess_pieces]
+        world.free_pieces = []
+        if self.broadphase is not None:
+            world.broadphase = UniformGrid(self.broadphase.cell_size)
+            for piece in world.chess_pieces:
+                world.broadphase.place(piece, min(piece.prev_x, piece.x), min(piece.prev_y, piece.y))
+        return world
+    
+    def speed_multiplier(self):
+        # Speed increases by 0.1 for every 10 points, max 2.0x speed
+        speed_multiplier = 1.0 + (self.score // 10) * self.speed_step
+        return min(speed_multiplier, self.speed_cap)  # Cap at 2x speed
+    
+    def spawn_chess_piece(self):
+        """Spawn a random chess piece at a random position"""
+        piece_type = self.rng.choice(PIECE_TYPES)
+        
+        # Spawn off-screen to the right
+        x = SCREEN_WIDTH + 50
+        y = self.rng.randint(50, SCREEN_HEIGHT - 50)
+        
+        if self.free_pieces:
+            piece = self.free_pieces.pop()
+            piece.reuse(piece_type, x, y, self.rng)
+        else:
+            piece = ChessPiece(piece_type, x, y, self.rng)
+        piece.spawn_index = self.spawned
+        piece.speed_scale = self.speed_scales.get(piece_type, 1.0)
+        self.spawned += 1
+        self.chess_pieces.append(piece)
+    
+    def check_collisions(self):
+        """Return the first chess piece (in spawn order) touching the player this tick, or None"""
+        player = self.player
+        player_rect = player.get_rect()
+        
+        if not self.swept:
+            for piece in self.chess_pieces:
+                if rects_collide(player_rect, piece.get_rect()):
+                    return piece
+            return None
+        
+        player_start = player.get_prev_rect()
+        if self.broadphase is not None:
+            bounds = (player_rect[0], min(player_start[1], player_rect[1]),
+                      player_rect[2], abs(player_start[1] - player_rect[1]) + player_rect[3])
+            candidates = sorted(self.broadphase.query(bounds), key=lambda piece: piece.spawn_index)
+        else:
+            candidates = self.chess_pieces
+        
+        left = player_rect[0]
+        right = left + player_rect[2]
+        for piece in candidates:
+            # Cheap reject: the piece's sprite never reaches the player's column this tick
+            if piece.x >= right and piece.prev_x >= right:
+                continue
+            if piece.x + piece.width <= left and piece.prev_x + piece.width <= left:
+                continue
+            t = swept_collision(player_start, player_rect, piece.get_prev_rect(), piece.get_rect())
+            if t is not None and (self.narrowphase is None or self.narrowphase(player, piece, t)):
+                return piece
+        return None
+    
+    def step(self, jump=False, toggle_pause=False):
+        """Advance the world by one frame and return the points scored during it"""
+        if self.game_over:
+            return 0
+        
+        self.tick += 1
+        if toggle_pause:
+            self.paused = not self.paused
+        # Jumps are ignored while paused
+        if jump and not self.paused:
+            self.player.jump()
+        
+        # Update player
+        self.player.update()
+        
+        # Spawn chess pieces
+        self.spawn_timer += 1
+        if self.spawn_timer >= self.spawn_delay and len(self.chess_pieces) < self.max_pieces:
+            self.spawn_timer = 0
+            for _ in range(min(self.spawn_count, self.max_pieces - len(self.chess_pieces))):
+                self.spawn_chess_piece()
+        
+        speed_multiplier = self.speed_multiplier()
+        
+        # Update chess pieces, packing the ones still in play to the front of the list
+        points = 0
+        pieces = self.chess_pieces
+        kept = 0
+        broadphase = self.broadphase
+        for piece in pieces:
+            piece.pattern.step(piece, speed_multiplier * piece.speed_scale)  # piece.update, one call cheaper
+            
+            # Pieces that are far off-screen (left side) score a point
+            if piece.x < -150:
+                points += 1
+            # Pieces that somehow went too far right are dropped (shouldn't happen, but safety check)
+            elif piece.x > SCREEN_WIDTH + 200:
+                pass
+            # Safety: pieces that have been on screen too long also score
+            # This prevents pieces from getting stuck and blocking new spawns
+            elif piece.spawn_age > MAX_PIECE_AGE:
+                points += 1
+            else:
+                pieces[kept] = piece
+                kept += 1
+                if broadphase is not None:
+                    broadphase.place(piece, min(piece.prev_x, piece.x), min(piece.prev_y, piece.y))
+                continue
+            if broadphase is not None:
+                broadphase.remove(piece)
+            self.free_pieces.append(piece)
+        del pieces[kept:]
+        self.score += points
+        
+        # Check collisions
+        profiler = self.profiler
+        if profiler is not None:
+            started = profiler.clock()
+        piece = self.check_collisions()
+        if profiler is not None:
+            profiler.record("collisions", started)
+        if piece is not None:
+            self.collisions += 1
+            if not self.invincible:
+                self.game_over = True
+                self.collision_tick = self.tick
+                self.collided_piece = piece
+        
+        return points
+
+
+def autopilot_jump(world):
+    """Minimal bot for benchmarks: flap whenever the player sinks below the middle"""
+    player = world.player
+    return player.y > SCREEN_HEIGHT // 2 and player.velocity > 0
+
+
+def run_benchmark(frames, policy=autopilot_jump, seed=0):
+    """Step fresh worlds for the given number of frames and return simulated frames per second"""
+    world = World(seed)
+    games = 1
+    start = time.perf_counter()
+    for _ in range(frames):
+        if world.game_over:
+            world = World(seed + games)
+            games += 1
+        world.step(policy(world))
+    elapsed = time.perf_counter() - start
+    return frames / elapsed, games
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the headless Flappy Chess simulation")
+    parser.add_argument("--frames", type=int, default=200000, help="frames to simulate")
+    args = parser.parse_args()
+    
+    fps, games = run_benchmark(args.frames)
+    print(f"Simulated {args.frames} frames over {games} games: {fps:,.0f} frames/s "
+          f"({fps / FPS:,.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""NumPy structure-of-arrays backend for the high-density "swarm" stress mode.
+
+SwarmWorld follows the same rules as simulation.World but keeps every piece in
+parallel arrays and updates them with vectorized operations. Random draws are
+made in exactly the order the object path makes them, so a seeded run of both
+backends produces identical pieces, scores and collisions.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PIECE_COLORS, PIECE_TYPES, MAX_PIECE_AGE,
+    PLAYER_START_X, KNIGHT_VERTICAL_JUMP, KNIGHT_HORIZONTAL_JUMP, QUEEN_MODES, QUEEN_PATTERNS,
+    QUEEN_REROLL_CHANCE, SPEED_STEP, SPEED_CAP, JetpackMan, ChessPiece, World, autopilot_jump, new_seed,
+)
+
+# Integer codes stored in the arrays
+TYPE_CODES = {piece_type: code for code, piece_type in enumerate(PIECE_TYPES)}
+KNIGHT = TYPE_CODES["Knight"]
+QUEEN = TYPE_CODES["Queen"]
+COLOR_CODES = {color: code for code, color in enumerate(PIECE_COLORS)}
+MODE_CODES = {mode: code for code, mode in enumerate(QUEEN_MODES)}
+MODE_KNIGHT = MODE_CODES['knight']
+NO_MODE = -1  # Pieces other than the Queen
+
+KNIGHT_NONE = 0
+KNIGHT_VERTICAL = 1
+KNIGHT_HORIZONTAL = 2
+KNIGHT_STATE_CODES = {None: KNIGHT_NONE, "vertical": KNIGHT_VERTICAL, "horizontal": KNIGHT_HORIZONTAL}
+
+# Settings for the stress mode: a fresh piece every frame in large batches
+SWARM_SETTINGS = {
+    "spawn_delay": 1,
+    "spawn_count": 40,
+    "max_pieces": 20000,
+    "invincible": True,
+}
+
+
+def axis_entry_exit(start, size, other_start, other_size, delta):
+    """Vectorized collision.axis_entry_exit over arrays of other boxes"""
+    low = other_start - size - start
+    high = other_start + other_size - start
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first = low / delta
+        second = high / delta
+    entry = np.minimum(first, second)
+    leave = np.maximum(first, second)
+    # Not moving on this axis: overlapping for the whole tick or never
+    still = delta == 0
+    if still.any():
+        inside = still & (low < 0) & (high > 0)
+        outside = still & ~inside
+        entry[inside] = -np.inf
+        leave[inside] = np.inf
+        entry[outside] = np.inf
+        leave[outside] = -np.inf
+    return entry, leave
+
+
+class SwarmWorld:
+    """Array-backed equivalent of simulation.World for thousands of pieces"""
+
+    # Per-piece arrays, compacted together whenever pieces are removed
+    FIELDS = {
+        "x": np.float64,
+        "y": np.float64,
+        "prev_x": np.float64,
+        "prev_y": np.float64,
+        "horizontal_speed": np.float64,
+        "vertical_speed": np.float64,
+        "vertical_direction": np.int64,
+        "knight_move_speed": np.float64,
+        "knight_state": np.int8,
+        "knight_target_x": np.float64,
+        "knight_target_y": np.float64,
+        "spawn_age": np.int64,
+        "size": np.int64,
+        "piece_type": np.int8,
+        "queen_mode": np.int8,
+        "color": np.int8,
+    }
+
+    def __init__(self, seed=None, spawn_delay=1, max_pieces=20000, spawn_count=1, invincible=False, swept=True,
+                 capacity=1024, speed_step=SPEED_STEP, speed_cap=SPEED_CAP):
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+
+        self.player = JetpackMan(PLAYER_START_X, SCREEN_HEIGHT // 2)
+        self.score = 0
+        self.game_over = False
+        self.paused = False
+        self.tick = 0
+        self.collision_tick = None
+        self.collided_piece = None  # Index into the arrays at the time of the collision
+        self.collisions = 0  # Counted even when invincible
+        self.invincible = invincible
+        self.swept = swept  # Same swept-hitbox test as World (no pixel narrowphase here)
+        self.profiler = None  # Optional profiler.FrameProfiler timing the collision check
+
+        self.spawn_timer = 0
+        self.spawn_delay = spawn_delay
+        self.max_pieces = max_pieces
+        self.spawn_count = spawn_count
+        self.speed_step = speed_step
+        self.speed_cap = speed_cap
+
+        self.count = 0
+        self.capacity = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        """Reallocate the arrays with room for at least `capacity` pieces"""
+        capacity = max(capacity, self.capacity * 2)
+        for name, dtype in self.FIELDS.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def add_piece(self, piece):
+        """Copy a freshly constructed ChessPiece into the next free slot"""
+        if self.count == self.capacity:
+            self.grow(self.count + 1)
+        i = self.count
+        self.x[i] = piece.x
+        self.y[i] = piece.y
+        self.prev_x[i] = piece.prev_x
+        self.prev_y[i] = piece.prev_y
+        self.horizontal_speed[i] = piece.horizontal_speed
+        self.vertical_speed[i] = piece.vertical_speed
+        self.vertical_direction[i] = piece.vertical_direction
+        self.knight_move_speed[i] = piece.knight_move_speed
+        self.knight_state[i] = KNIGHT_STATE_CODES[piece.knight_state]
+        self.knight_target_x[i] = piece.knight_target_x if piece.knight_target_x is not None else 0
+        self.knight_target_y[i] = piece.knight_target_y if piece.knight_target_y is not None else 0
+        self.spawn_age[i] = piece.spawn_age
+        self.size[i] = piece.width
+        self.piece_type[i] = TYPE_CODES[piece.piece_type]
+        self.queen_mode[i] = MODE_CODES[piece.queen_movement_type] if piece.piece_type == "Queen" else NO_MODE
+        self.color[i] = COLOR_CODES[piece.piece_color]
+        self.count += 1
+
+    def spawn_chess_piece(self):
+        """Spawn a piece with the same random draws as World.spawn_chess_piece"""
+        piece_type = self.rng.choice(PIECE_TYPES)
+        x = SCREEN_WIDTH + 50
+        y = self.rng.randint(50, SCREEN_HEIGHT - 50)
+        self.add_piece(ChessPiece(piece_type, x, y, self.rng))
+
+    def speed_multiplier(self):
+        # Same difficulty curve as World.speed_multiplier
+        speed_multiplier = 1.0 + (self.score // 10) * self.speed_step
+        return min(speed_multiplier, self.speed_cap)
+
+    def draw_random_events(self, indices, needs_direction, queens):
+        """Make this frame's per-piece random draws in piece order, like the object path does"""
+        directions = {}
+        switches = []
+        choice = self.rng.choice
+        roll = self.rng.random
+        for i in indices.tolist():
+            if needs_direction[i]:
+                directions[i] = choice([1, -1])
+            if queens[i] and roll() < QUEEN_REROLL_CHANCE:
+                mode = choice(QUEEN_MODES)
+                pattern = QUEEN_PATTERNS[mode]
+                switches.append((i, mode, pattern.vertical_speed, pattern.roll_horizontal_speed(self.rng)))
+        return directions, switches
+
+    def update_pieces(self, speed_multiplier):
+        """Vectorized equivalent of ChessPiece.update for every live piece"""
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        direction = self.vertical_direction[:n]
+        state = self.knight_state[:n]
+        target_x = self.knight_target_x[:n]
+        target_y = self.knight_target_y[:n]
+        floor = SCREEN_HEIGHT - self.size[:n]
+
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        self.spawn_age[:n] += 1
+
+        effective_horizontal_speed = self.horizontal_speed[:n] * speed_multiplier
+        effective_vertical_speed = self.vertical_speed[:n] * speed_multiplier
+        effective_knight_move_speed = self.knight_move_speed[:n] * speed_multiplier
+
+        queens = self.piece_type[:n] == QUEEN
+        knight_movement = (self.piece_type[:n] == KNIGHT) | (self.queen_mode[:n] == MODE_KNIGHT)
+
+        # Work out which pieces need a random vertical direction this frame
+        starting = knight_movement & (state == KNIGHT_NONE)
+        horizontal = knight_movement & (state == KNIGHT_HORIZONTAL)
+        landed = horizontal & ~(np.abs(target_x - x) > effective_knight_move_speed)
+        free_landing = landed & (y > 0) & (y < floor)
+        needs_direction = starting | free_landing
+
+        directions, switches = self.draw_random_events(
+            np.flatnonzero(needs_direction | queens), needs_direction, queens)
+        if directions:
+            drawn = np.fromiter(directions.keys(), dtype=np.int64, count=len(directions))
+            direction[drawn] = np.fromiter(directions.values(), dtype=np.int64, count=len(directions))
+
+        # Knight: first L-move starts going 2 squares up or down, clamped to the screen
+        if starting.any():
+            state[starting] = KNIGHT_VERTICAL
+            start_target = y + KNIGHT_VERTICAL_JUMP * direction
+            above = starting & (start_target < 0)
+            below = starting & ~above & (start_target > floor)
+            target_y[starting] = start_target[starting]
+            target_y[above] = 0
+            direction[above] = 1
+            target_y[below] = floor[below]
+            direction[below] = -1
+
+        # Knight vertical leg (includes pieces that only just started)
+        vertical = knight_movement & (state == KNIGHT_VERTICAL)
+        if vertical.any():
+            moving = vertical & (np.abs(target_y - y) > effective_knight_move_speed)
+            step = np.where(y < target_y, effective_knight_move_speed, -effective_knight_move_speed)
+            y[moving] += step[moving]
+            arrived = vertical & ~moving
+            y[arrived] = target_y[arrived]
+            state[arrived] = KNIGHT_HORIZONTAL
+            target_x[arrived] = x[arrived] - KNIGHT_HORIZONTAL_JUMP
+
+        # Knight horizontal leg (only pieces that started the frame on it)
+        if horizontal.any():
+            sliding = horizontal & ~landed & (x > target_x)
+            x[sliding] -= effective_knight_move_speed[sliding]
+            x[landed] = target_x[landed]
+            state[landed] = KNIGHT_VERTICAL
+            # Reverse at the boundary, otherwise the drawn random direction applies
+            direction[landed & (y <= 0)] = 1
+            direction[landed & (y > 0) & (y >= floor)] = -1
+            next_target = np.clip(y + KNIGHT_VERTICAL_JUMP * direction, 0, floor)
+            target_y[landed] = next_target[landed]
+
+        # Other pieces: normal movement
+        normal = ~knight_movement
+        x[normal] -= effective_horizontal_speed[normal]
+        y[normal] += effective_vertical_speed[normal] * direction[normal]
+
+        # Queens that re-rolled switch movement after this frame's move
+        for i, mode, vertical_speed, horizontal_speed in switches:
+            self.queen_mode[i] = MODE_CODES[mode]
+            self.vertical_speed[i] = vertical_speed
+            self.horizontal_speed[i] = horizontal_speed
+            if mode == 'knight':
+                self.knight_state[i] = KNIGHT_NONE
+                self.knight_move_speed[i] = QUEEN_PATTERNS[mode].jump_speed
+
+        # Bounce off the top and bottom (not for knight movement, it has its own logic)
+        if switches:
+            knight_movement = (self.piece_type[:n] == KNIGHT) | (self.queen_mode[:n] == MODE_KNIGHT)
+        normal = ~knight_movement
+        top = normal & (y <= 0)
+        bottom = normal & ~top & (y >= floor)
+        y[top] = 0
+        direction[top] = 1
+        y[bottom] = floor[bottom]
+        direction[bottom] = -1
+
+    def remove_pieces(self):
+        """Drop finished pieces in one compaction pass and return the points they scored"""
+        n = self.count
+        x = self.x[:n]
+        passed = x < -150
+        lost = ~passed & (x > SCREEN_WIDTH + 200)
+        expired = ~passed & ~lost & (self.spawn_age[:n] > MAX_PIECE_AGE)
+        points = int(np.count_nonzero(passed) + np.count_nonzero(expired))
+
+        keep = ~(passed | lost | expired)
+        remaining = int(np.count_nonzero(keep))
+        if remaining != n:
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[:remaining] = array[:n][keep]
+            self.count = remaining
+        return points
+
+    def hitboxes(self, x, y):
+        """Integer (x, y, size) hitbox columns, 80% of each sprite, as in ChessPiece.hitbox_at"""
+        size = self.size[:self.count]
+        hitbox_size = (size * 8) // 10
+        offset = (size - hitbox_size) // 2
+        hitbox_x = (x + offset).astype(np.int64)
+        hitbox_y = (y + offset).astype(np.int64)
+        return hitbox_x, hitbox_y, hitbox_size
+
+    def check_collisions(self):
+        """Return the index of the first piece touching the player this tick, or None"""
+        n = self.count
+        if not n:
+            return None
+        px, py, pw, ph = self.player.get_rect()
+        hitbox_x, hitbox_y, hitbox_size = self.hitboxes(self.x[:n], self.y[:n])
+        if self.swept:
+            start_x, start_y, _, _ = self.player.get_prev_rect()
+            prev_x, prev_y, _ = self.hitboxes(self.prev_x[:n], self.prev_y[:n])
+            # Player motion relative to each piece, as in collision.swept_collision
+            entry_x, exit_x = axis_entry_exit(start_x, pw, prev_x, hitbox_size, (px - start_x) - (hitbox_x - prev_x))
+            entry_y, exit_y = axis_entry_exit(start_y, ph, prev_y, hitbox_size, (py - start_y) - (hitbox_y - prev_y))
+            entry = np.maximum(entry_x, entry_y)
+            leave = np.minimum(exit_x, exit_y)
+            hits = (entry < leave) & (entry < 1) & (leave > 0)
+        else:
+            hits = ((px < hitbox_x + hitbox_size) & (hitbox_x < px + pw) &
+                    (py < hitbox_y + hitbox_size) & (hitbox_y < py + ph))
+        hit = np.flatnonzero(hits)
+        return int(hit[0]) if hit.size else None
+
+    def step(self, jump=False, toggle_pause=False):
+        """Advance the swarm by one frame and return the points scored during it"""
+        if self.game_over:
+            return 0
+
+        self.tick += 1
+        if toggle_pause:
+            self.paused = not self.paused
+        if jump and not self.paused:
+            self.player.jump()
+        self.player.update()
+
+        self.spawn_timer += 1
+        if self.spawn_timer >= self.spawn_delay and self.count < self.max_pieces:
+            self.spawn_timer = 0
+            for _ in range(min(self.spawn_count, self.max_pieces - self.count)):
+                self.spawn_chess_piece()
+
+        speed_multiplier = self.speed_multiplier()
+        if self.count:
+            self.update_pieces(speed_multiplier)
+        points = self.remove_pieces()
+        self.score += points
+
+        profiler = self.profiler
+        if profiler is not None:
+            started = profiler.clock()
+        piece = self.check_collisions()
+        if profiler is not None:
+            profiler.record("collisions", started)
+        if piece is not None:
+            self.collisions += 1
+            if not self.invincible:
+                self.game_over = True
+                self.collision_tick = self.tick
+                self.collided_piece = piece
+
+        return points
+
+    def piece_positions(self):
+        """(type, x, y) of every live piece, in spawn order"""
+        n = self.count
+        return list(zip((PIECE_TYPES[code] for code in self.piece_type[:n].tolist()),
+                        self.x[:n].tolist(), self.y[:n].tolist()))
+
+
+def verify_against_objects(seed, frames, spawn_delay=5, max_pieces=300, spawn_count=3, invincible=True, swept=True):
+    """Run World and SwarmWorld on the same seed and return the first frame they disagree on, or None"""
+    settings = dict(spawn_delay=spawn_delay, max_pieces=max_pieces, spawn_count=spawn_count, invincible=invincible,
+                    swept=swept)
+
+    objects = World(seed, **settings)
+    object_frames = []
+    for _ in range(frames):
+        objects.step(autopilot_jump(objects))
+        object_frames.append((objects.score, objects.game_over, objects.collisions,
+                              [(p.piece_type, p.x, p.y) for p in objects.chess_pieces]))
+
+    swarm = SwarmWorld(seed, **settings)
+    for frame, expected in enumerate(object_frames):
+        swarm.step(autopilot_jump(swarm))
+        if (swarm.score, swarm.game_over, swarm.collisions, swarm.piece_positions()) != expected:
+            return frame + 1
+    return None
+
+
+def run_benchmark(frames, seed=0, **settings):
+    """Step a swarm world and return (frames per second, average live pieces)"""
+    world = SwarmWorld(seed, **settings)
+    live = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        world.step(autopilot_jump(world))
+        live += world.count
+    elapsed = time.perf_counter() - start
+    return frames / elapsed, live / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and verify the NumPy swarm backend")
+    parser.add_argument("--frames", type=int, default=3000, help="frames to simulate")
+    parser.add_argument("--spawn-count", type=int, default=SWARM_SETTINGS["spawn_count"],
+                        help="pieces spawned per frame (sets the steady-state piece count)")
+    parser.add_argument("--verify", type=int, metavar="SEED",
+                        help="check the swarm against the object path on this seed instead")
+    args = parser.parse_args()
+
+    if args.verify is not None:
+        mismatch = verify_against_objects(args.verify, args.frames)
+        if mismatch is None:
+            print(f"Seed {args.verify}: swarm matches the object path for {args.frames} frames")
+        else:
+            print(f"Seed {args.verify}: swarm diverges from the object path at frame {mismatch}")
+            raise SystemExit(1)
+        return
+
+    settings = dict(SWARM_SETTINGS, spawn_count=args.spawn_count)
+    fps, live = run_benchmark(args.frames, **settings)
+    print(f"{live:,.0f} live pieces on average: {fps:,.0f} frames/s "
+          f"({'meets' if fps >= FPS else 'misses'} the {FPS} FPS target)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+from allocations import soak
+
+
+def test_steady_state_frames_leave_nothing_for_the_collector():
+    # After the usual warm-up (headless, it plays far faster than real time) the free list and caches are full
+    counter = soak(minutes=10 / 60)
+    assert counter.frames > 0
+    assert counter.leaky_frames == 0, counter.report()
+    assert counter.collections == 0, counter.report()
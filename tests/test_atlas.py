@@ -0,0 +1,21 @@
+import pygame
+
+from atlas import SKIN_SHEETS, AnimationAtlas
+from simulation import PLAYER_FRAME_COUNT
+
+
+def frames_played(atlas, skin, frames):
+    variants = atlas.variants(skin)
+    return [next(index for index, tilts in enumerate(variants) if atlas.lookup(skin, frame, 0.0) in tilts)
+            for frame in frames]
+
+
+def test_three_frame_skin_plays_each_frame_once_per_cycle():
+    pygame.display.init()
+    pygame.display.set_mode((800, 600))
+    skin = next(skin for skin, (_, layout) in SKIN_SHEETS.items() if layout == (3, 1))
+    atlas = AnimationAtlas((60, 60))
+    assert len(atlas.variants(skin)) == 3
+    assert frames_played(atlas, skin, range(PLAYER_FRAME_COUNT)) == [0, 0, 1, 2]
+    # Any frame count wraps around the cycle (the benchmark passes its loop index)
+    assert frames_played(atlas, skin, range(PLAYER_FRAME_COUNT, 3 * PLAYER_FRAME_COUNT)) == [0, 0, 1, 2] * 2
@@ -0,0 +1,255 @@
+"""Monte Carlo difficulty tuning: play many headless games with a bot and summarize them.
+
+Games are split into fixed-size shards of consecutive seeds, so a run with the
+same --seed, --games and settings gives the same totals on any number of
+workers. Shards are merged as they finish, with progress printed as they come in.
+
+    python tuning.py --games 1000000 --policy dodge --spawn-delay 75 --speed-scale Queen=0.9
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import (
+    SCREEN_HEIGHT, TICK_RATE, SPAWN_DELAY, MAX_PIECES, SPEED_STEP, SPEED_CAP, PIECE_TYPES,
+    World, autopilot_jump,
+)
+
+MAX_TICKS = 10 * 60 * TICK_RATE  # Games still going after 10 minutes count as survived
+RANDOM_JUMP_CHANCE = 0.08
+DODGE_LOOKAHEAD = 220  # Pixels ahead of the player the dodge bot pays attention to
+
+
+def idle_policy(seed):
+    """Never jumps (measures how long the pieces alone take to hit a sinking player)"""
+    return lambda world: False
+
+
+def hover_policy(seed):
+    """Flaps whenever the player sinks below the middle of the screen"""
+    return autopilot_jump
+
+
+def random_policy(seed):
+    """Jumps at random with a fixed chance per tick"""
+    rng = random.Random(seed ^ 0x5EED)
+    return lambda world: rng.random() < RANDOM_JUMP_CHANCE
+
+
+def dodge_policy(seed):
+    """Hovers mid-screen but climbs away from pieces about to pass below the player"""
+    def policy(world):
+        player = world.player
+        player_center = player.y + player.height / 2
+        target = SCREEN_HEIGHT / 2
+        for piece in world.chess_pieces:
+            ahead = piece.x - player.x
+            if -piece.width < ahead < DODGE_LOOKAHEAD:
+                piece_center = piece.y + piece.height / 2
+                if abs(piece_center - player_center) < 90:
+                    # Pass on whichever side has more room
+                    target = piece_center - 120 if piece_center > SCREEN_HEIGHT / 2 else piece_center + 120
+                    break
+        return player_center > target and player.velocity > -2
+    return policy
+
+
+POLICIES = {
+    "idle": idle_policy,
+    "hover": hover_policy,
+    "random": random_policy,
+    "dodge": dodge_policy,
+}
+
+
+def death_cause(piece):
+    """Piece type, plus the movement mode for Queens"""
+    if piece.piece_type == "Queen":
+        return f"Queen/{piece.queen_movement_type}"
+    return piece.piece_type
+
+
+def empty_results():
+    return {
+        "games": 0,
+        "survived": 0,
+        "scores": Counter(),
+        "deaths": Counter(),
+        "survival_ticks": Counter(),
+    }
+
+
+def merge_results(total, shard):
+    total["games"] += shard["games"]
+    total["survived"] += shard["survived"]
+    total["scores"].update(shard["scores"])
+    total["deaths"].update(shard["deaths"])
+    total["survival_ticks"].update(shard["survival_ticks"])
+    return total
+
+
+def play_game(seed, policy_name, settings, max_ticks):
+    """Play one headless game and return the finished World"""
+    world = World(seed, **settings)
+    policy = POLICIES[policy_name](seed)
+    step = world.step
+    while not world.game_over and world.tick < max_ticks:
+        step(policy(world))
+    return world
+
+
+def run_shard(first_seed, count, policy_name, settings, max_ticks):
+    """Play `count` games with consecutive seeds and return their aggregated results"""
+    results = empty_results()
+    for seed in range(first_seed, first_seed + count):
+        world = play_game(seed, policy_name, settings, max_ticks)
+        results["games"] += 1
+        results["scores"][world.score] += 1
+        results["survival_ticks"][world.tick] += 1
+        if world.game_over:
+            results["deaths"][death_cause(world.collided_piece)] += 1
+        else:
+            results["survived"] += 1
+    return results
+
+
+def percentile(histogram, fraction):
+    """Value at the given fraction of a {value: count} histogram"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = fraction * total
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= threshold:
+            return value
+    return value
+
+
+def summarize(results):
+    """JSON-friendly summary: score distribution, death causes and survival percentiles"""
+    games = results["games"]
+    scores = results["scores"]
+    deaths = results["deaths"]
+    survival = results["survival_ticks"]
+    fractions = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+    # No games, no percentiles
+    survival_seconds = {f"p{round(f * 100)}": percentile(survival, f) / TICK_RATE if survival else None
+                        for f in fractions}
+    return {
+        "games": games,
+        "survived": results["survived"],
+        "mean_score": sum(score * count for score, count in scores.items()) / games if games else 0,
+        "score_percentiles": {f"p{round(f * 100)}": percentile(scores, f) for f in fractions},
+        "survival_seconds": survival_seconds,
+        "deaths": {cause: {"count": count, "share": count / games}
+                   for cause, count in deaths.most_common()},
+        "score_histogram": {str(score): scores[score] for score in sorted(scores)},
+    }
+
+
+def run_tuning(games, policy_name="hover", settings=None, seed=0, workers=None, shard_size=500,
+               max_ticks=MAX_TICKS, progress=None):
+    """Play `games` games over a process pool and return the merged results"""
+    settings = settings or {}
+    shards = [(seed + start, min(shard_size, games - start)) for start in range(0, games, shard_size)]
+    total = empty_results()
+    if workers == 1:
+        for first_seed, count in shards:
+            merge_results(total, run_shard(first_seed, count, policy_name, settings, max_ticks))
+            if progress:
+                progress(total)
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_shard, first_seed, count, policy_name, settings, max_ticks)
+                   for first_seed, count in shards]
+        for future in as_completed(futures):
+            merge_results(total, future.result())
+            if progress:
+                progress(total)
+    return total
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected at least 1, got {value}")
+    return value
+
+
+def parse_speed_scales(values):
+    scales = {}
+    for value in values:
+        piece_type, _, scale = value.partition("=")
+        if piece_type not in PIECE_TYPES or not scale:
+            raise argparse.ArgumentTypeError(f"expected Type=scale with Type in {PIECE_TYPES}, got {value!r}")
+        scales[piece_type] = float(scale)
+    return scales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo difficulty tuning for Flappy Chess")
+    parser.add_argument("--games", type=positive_int, default=10000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="dodge")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; games use consecutive seeds")
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count(), help="processes (1 runs in-process)")
+    parser.add_argument("--shard-size", type=positive_int, default=500, help="games per task sent to a worker")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS, help="ticks after which a game counts as survived")
+    parser.add_argument("--spawn-delay", type=int, default=SPAWN_DELAY)
+    parser.add_argument("--max-pieces", type=int, default=MAX_PIECES)
+    parser.add_argument("--speed-step", type=float, default=SPEED_STEP, help="speed gained per 10 points")
+    parser.add_argument("--speed-cap", type=float, default=SPEED_CAP)
+    parser.add_argument("--speed-scale", action="append", default=[], metavar="TYPE=SCALE",
+                        help="scale one piece type's speeds, e.g. Queen=0.8 (repeatable)")
+    parser.add_argument("--json", metavar="PATH", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    settings = {
+        "spawn_delay": args.spawn_delay,
+        "max_pieces": args.max_pieces,
+        "speed_step": args.speed_step,
+        "speed_cap": args.speed_cap,
+        "speed_scales": parse_speed_scales(args.speed_scale),
+    }
+
+    start = time.perf_counter()
+    last_report = [start]
+
+    def progress(total):
+        now = time.perf_counter()
+        if now - last_report[0] >= 2 or total["games"] == args.games:
+            last_report[0] = now
+            rate = total["games"] / (now - start)
+            remaining = (args.games - total["games"]) / rate if rate else 0
+            print(f"{total['games']:,}/{args.games:,} games, {rate:,.0f} games/s, ~{remaining:,.0f}s left")
+
+    results = run_tuning(args.games, args.policy, settings, args.seed, args.workers, args.shard_size,
+                         args.max_ticks, progress)
+    summary = summarize(results)
+    summary["policy"] = args.policy
+    summary["settings"] = settings
+    summary["seconds"] = time.perf_counter() - start
+
+    print(f"\n{summary['games']:,} games with the {args.policy} bot in {summary['seconds']:.1f}s "
+          f"({summary['survived']:,} survived {args.max_ticks / TICK_RATE:.0f}s)")
+    print(f"Mean score {summary['mean_score']:.2f}; score percentiles: "
+          + ", ".join(f"{name} {value}" for name, value in summary["score_percentiles"].items()))
+    print("Survival seconds: "
+          + ", ".join(f"{name} {value:.1f}" for name, value in summary["survival_seconds"].items()))
+    print("Deaths by piece:")
+    for cause, death in summary["deaths"].items():
+        print(f"  {cause:<14} {death['count']:>10,}  {death['share']:6.1%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()